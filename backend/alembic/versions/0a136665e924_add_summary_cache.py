@@ -0,0 +1,36 @@
+"""Add summary cache
+
+Revision ID: 0a136665e924
+Revises: 68f4dbd5d7ea
+Create Date: 2026-10-18 11:02:47.918305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a136665e924'
+down_revision: Union[str, Sequence[str], None] = '68f4dbd5d7ea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('summary_cache',
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('summary_text', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('cache_key')
+    )
+    op.create_index(op.f('ix_summary_cache_expires_at'), 'summary_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_summary_cache_expires_at'), table_name='summary_cache')
+    op.drop_table('summary_cache')
@@ -0,0 +1,45 @@
+"""Add summary jobs
+
+Revision ID: 2f8b3ad1db97
+Revises: 0a136665e924
+Create Date: 2026-10-18 11:41:09.530271
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f8b3ad1db97'
+down_revision: Union[str, Sequence[str], None] = '0a136665e924'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('summary_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_ids', sa.String(), nullable=True),
+    sa.Column('is_consolidated', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('summary_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['summary_id'], ['summaries.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_summary_jobs_id'), 'summary_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_summary_jobs_status'), 'summary_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_summary_jobs_status'), table_name='summary_jobs')
+    op.drop_index(op.f('ix_summary_jobs_id'), table_name='summary_jobs')
+    op.drop_table('summary_jobs')
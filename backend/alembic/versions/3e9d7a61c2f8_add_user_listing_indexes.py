@@ -0,0 +1,30 @@
+"""Add user listing indexes
+
+Revision ID: 3e9d7a61c2f8
+Revises: 7c5e21b9a04d
+Create Date: 2026-10-18 15:02:11.583920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e9d7a61c2f8'
+down_revision: Union[str, Sequence[str], None] = '7c5e21b9a04d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_files_user_id_upload_date', 'files', ['user_id', sa.text('upload_date DESC')], unique=False)
+    op.create_index('ix_summaries_user_id_created_at', 'summaries', ['user_id', sa.text('created_at DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_summaries_user_id_created_at', table_name='summaries')
+    op.drop_index('ix_files_user_id_upload_date', table_name='files')
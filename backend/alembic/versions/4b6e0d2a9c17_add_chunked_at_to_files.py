@@ -0,0 +1,34 @@
+"""Add chunked_at to files
+
+Revision ID: 4b6e0d2a9c17
+Revises: c3f18a9e6d21
+Create Date: 2026-10-18 19:02:44.518903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b6e0d2a9c17'
+down_revision: Union[str, Sequence[str], None] = 'c3f18a9e6d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('files', sa.Column('chunked_at', sa.DateTime(), nullable=True))
+    # arquivos que já têm trechos contam como indexados; os demais são
+    # indexados no próximo startup (resume_pending_extractions)
+    op.execute(
+        "UPDATE files SET chunked_at = CURRENT_TIMESTAMP "
+        "WHERE EXISTS (SELECT 1 FROM document_chunks c WHERE c.file_id = files.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('files', 'chunked_at')
@@ -0,0 +1,56 @@
+"""Add document pages
+
+Revision ID: 5a0c93e7d4b2
+Revises: e8a27c4f5b13
+Create Date: 2026-10-18 17:21:44.301567
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a0c93e7d4b2'
+down_revision: Union[str, Sequence[str], None] = 'e8a27c4f5b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('document_pages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('page_no', sa.Integer(), nullable=True),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['file_id'], ['files.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_document_pages_file_id'), 'document_pages', ['file_id'], unique=False)
+    op.create_index(op.f('ix_document_pages_user_id'), 'document_pages', ['user_id'], unique=False)
+
+    # busca textual nativa do Postgres; nos demais bancos a busca usa BM25 em memória
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "ALTER TABLE document_pages ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('portuguese', coalesce(text, ''))) STORED"
+        )
+        op.create_index(
+            'ix_document_pages_search_vector', 'document_pages', ['search_vector'],
+            unique=False, postgresql_using='gin',
+        )
+    # as páginas dos arquivos já extraídos são indexadas no próximo startup
+    # (resume_pending_extractions), a partir do cache de texto
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_document_pages_search_vector', table_name='document_pages')
+    op.drop_index(op.f('ix_document_pages_user_id'), table_name='document_pages')
+    op.drop_index(op.f('ix_document_pages_file_id'), table_name='document_pages')
+    op.drop_table('document_pages')
@@ -0,0 +1,33 @@
+"""Add extraction status to files
+
+Revision ID: 68f4dbd5d7ea
+Revises: fc2ea791b3b2
+Create Date: 2026-10-18 10:12:31.204118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '68f4dbd5d7ea'
+down_revision: Union[str, Sequence[str], None] = 'fc2ea791b3b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # arquivos antigos ficam como 'pending' e são extraídos ao subir a aplicação
+    op.add_column('files', sa.Column('extraction_status', sa.String(length=20), server_default='pending', nullable=True))
+    op.add_column('files', sa.Column('page_count', sa.Integer(), nullable=True))
+    op.add_column('files', sa.Column('extracted_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('files', 'extracted_at')
+    op.drop_column('files', 'page_count')
+    op.drop_column('files', 'extraction_status')
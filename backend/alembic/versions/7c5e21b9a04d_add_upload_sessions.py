@@ -0,0 +1,40 @@
+"""Add upload sessions
+
+Revision ID: 7c5e21b9a04d
+Revises: df69d0d1f976
+Create Date: 2026-10-18 14:21:37.402119
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c5e21b9a04d'
+down_revision: Union[str, Sequence[str], None] = 'df69d0d1f976'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('upload_sessions',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('file_name', sa.String(length=200), nullable=True),
+    sa.Column('total_size', sa.Integer(), nullable=True),
+    sa.Column('offset', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_sessions_expires_at'), 'upload_sessions', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_upload_sessions_expires_at'), table_name='upload_sessions')
+    op.drop_table('upload_sessions')
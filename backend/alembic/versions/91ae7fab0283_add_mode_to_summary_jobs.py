@@ -0,0 +1,28 @@
+"""Add mode to summary jobs
+
+Revision ID: 91ae7fab0283
+Revises: 2f8b3ad1db97
+Create Date: 2026-10-18 12:20:55.146320
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '91ae7fab0283'
+down_revision: Union[str, Sequence[str], None] = '2f8b3ad1db97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('summary_jobs', sa.Column('mode', sa.String(length=20), server_default='raw', nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('summary_jobs', 'mode')
@@ -0,0 +1,92 @@
+"""Normalize summary files
+
+Revision ID: b41f6c2d9e07
+Revises: 3e9d7a61c2f8
+Create Date: 2026-10-18 15:47:29.116402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41f6c2d9e07'
+down_revision: Union[str, Sequence[str], None] = '3e9d7a61c2f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+summaries_table = sa.table(
+    'summaries',
+    sa.column('id', sa.Integer),
+    sa.column('file_ids', sa.String),
+)
+summary_files_table = sa.table(
+    'summary_files',
+    sa.column('summary_id', sa.Integer),
+    sa.column('file_id', sa.Integer),
+    sa.column('position', sa.Integer),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('summary_files',
+    sa.Column('summary_id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['file_id'], ['files.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['summary_id'], ['summaries.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('summary_id', 'file_id')
+    )
+    op.create_index(op.f('ix_summary_files_file_id'), 'summary_files', ['file_id'], unique=False)
+
+    # backfill a partir das strings "1,2,3"; ids de arquivos já apagados
+    # são descartados (não há como satisfazer a FK)
+    bind = op.get_bind()
+    existing_files = set(bind.execute(sa.text('SELECT id FROM files')).scalars())
+    rows = []
+    for summary_id, file_ids in bind.execute(sa.select(summaries_table.c.id, summaries_table.c.file_ids)):
+        seen = set()
+        for raw in (file_ids or '').split(','):
+            raw = raw.strip()
+            if not raw.isdigit():
+                continue
+            file_id = int(raw)
+            if file_id in seen or file_id not in existing_files:
+                continue
+            seen.add(file_id)
+            rows.append({'summary_id': summary_id, 'file_id': file_id, 'position': len(seen) - 1})
+        if len(rows) >= BATCH_SIZE:
+            op.bulk_insert(summary_files_table, rows)
+            rows = []
+    if rows:
+        op.bulk_insert(summary_files_table, rows)
+
+    op.drop_column('summaries', 'file_ids')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('summaries', sa.Column('file_ids', sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    links = bind.execute(
+        sa.select(summary_files_table.c.summary_id, summary_files_table.c.file_id)
+        .order_by(summary_files_table.c.summary_id, summary_files_table.c.position)
+    )
+    grouped = {}
+    for summary_id, file_id in links:
+        grouped.setdefault(summary_id, []).append(str(file_id))
+    for summary_id, file_ids in grouped.items():
+        bind.execute(
+            summaries_table.update()
+            .where(summaries_table.c.id == summary_id)
+            .values(file_ids=','.join(file_ids))
+        )
+
+    op.drop_index(op.f('ix_summary_files_file_id'), table_name='summary_files')
+    op.drop_table('summary_files')
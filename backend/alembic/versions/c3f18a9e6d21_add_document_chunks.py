@@ -0,0 +1,43 @@
+"""Add document chunks
+
+Revision ID: c3f18a9e6d21
+Revises: 5a0c93e7d4b2
+Create Date: 2026-10-18 18:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f18a9e6d21'
+down_revision: Union[str, Sequence[str], None] = '5a0c93e7d4b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('document_chunks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('page_no', sa.Integer(), nullable=True),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['file_id'], ['files.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_document_chunks_file_id'), 'document_chunks', ['file_id'], unique=False)
+    op.create_index(op.f('ix_document_chunks_user_id'), 'document_chunks', ['user_id'], unique=False)
+    # os trechos dos arquivos já extraídos são gerados no próximo startup
+    # (resume_pending_extractions), a partir do cache de texto
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_document_chunks_user_id'), table_name='document_chunks')
+    op.drop_index(op.f('ix_document_chunks_file_id'), table_name='document_chunks')
+    op.drop_table('document_chunks')
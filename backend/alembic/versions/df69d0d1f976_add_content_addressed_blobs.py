@@ -0,0 +1,42 @@
+"""Add content addressed blobs
+
+Revision ID: df69d0d1f976
+Revises: 91ae7fab0283
+Create Date: 2026-10-18 13:05:12.660417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'df69d0d1f976'
+down_revision: Union[str, Sequence[str], None] = '91ae7fab0283'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('blobs',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('file_path', sa.String(length=300), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('content_hash')
+    )
+    # arquivos já existentes continuam com content_hash NULL e file_path antigo
+    op.add_column('files', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_files_content_hash'), 'files', ['content_hash'], unique=False)
+    op.create_foreign_key('files_content_hash_fkey', 'files', 'blobs', ['content_hash'], ['content_hash'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('files_content_hash_fkey', 'files', type_='foreignkey')
+    op.drop_index(op.f('ix_files_content_hash'), table_name='files')
+    op.drop_column('files', 'content_hash')
+    op.drop_table('blobs')
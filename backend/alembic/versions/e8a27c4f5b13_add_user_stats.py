@@ -0,0 +1,57 @@
+"""Add user stats
+
+Revision ID: e8a27c4f5b13
+Revises: b41f6c2d9e07
+Create Date: 2026-10-18 16:33:05.720841
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a27c4f5b13'
+down_revision: Union[str, Sequence[str], None] = 'b41f6c2d9e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('file_count', sa.Integer(), nullable=False),
+    sa.Column('total_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('single_summary_count', sa.Integer(), nullable=False),
+    sa.Column('consolidated_summary_count', sa.Integer(), nullable=False),
+    sa.Column('last_upload_at', sa.DateTime(), nullable=True),
+    sa.Column('last_summary_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # backfill dos contadores de todos os usuários existentes
+    op.execute("""
+        INSERT INTO user_stats (
+            user_id, file_count, total_bytes, single_summary_count,
+            consolidated_summary_count, last_upload_at, last_summary_at, updated_at
+        )
+        SELECT
+            u.id,
+            (SELECT COUNT(*) FROM files f WHERE f.user_id = u.id),
+            (SELECT COALESCE(SUM(f.file_size), 0) FROM files f WHERE f.user_id = u.id),
+            (SELECT COUNT(*) FROM summaries s WHERE s.user_id = u.id AND s.is_consolidated = 0),
+            (SELECT COUNT(*) FROM summaries s WHERE s.user_id = u.id AND s.is_consolidated <> 0),
+            (SELECT MAX(f.upload_date) FROM files f WHERE f.user_id = u.id),
+            (SELECT MAX(s.created_at) FROM summaries s WHERE s.user_id = u.id),
+            CURRENT_TIMESTAMP
+        FROM users u
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_stats')
@@ -8,6 +8,110 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str
     BACKEND_CORS_ORIGINS: str = "http://localhost:5173"
 
+    # Pool de conexões. DB_POOL_SIZE/DB_MAX_OVERFLOW valem para a engine
+    # assíncrona e DB_SYNC_* para a síncrona (rotas de arquivos e uploads,
+    # extração, cache de resumos): o máximo por processo é a soma dos dois
+    # pools, que é o número a considerar no max_connections do Postgres
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_SYNC_POOL_SIZE: int = 5
+    DB_SYNC_MAX_OVERFLOW: int = 5
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+
+    # Hash de senha (Argon2) em executor próprio, fora do threadpool das rotas.
+    # Mudar os parâmetros não invalida senhas: o hash é refeito no login.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 64 * 1024  # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+
+    # Cache do usuário autenticado (evita um SELECT em users por requisição)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_ENTRIES: int = 10_000
+    # Inclui username/email no token: get_current_user dispensa o banco
+    AUTH_TOKEN_CLAIMS: bool = False
+
+    # Cache de texto extraído dos PDFs (arquivos sidecar ao lado do storage)
+    TEXT_CACHE_DIR: str = "storage/text_cache"
+    TEXT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 512 MB
+
+    # Extração em background disparada no upload
+    EXTRACTION_WORKERS: int = 2
+    EXTRACTION_QUEUE_SIZE: int = 100
+
+    # Extração paralela por páginas (0 = número de CPUs)
+    PDF_EXTRACTION_PROCESSES: int = 0
+    PDF_PARALLEL_MIN_PAGES: int = 64
+
+    # Modelo usado nos resumos
+    GEMINI_MODEL: str = "gemini-2.5-flash"
+    LLM_TEMPERATURE: float = 0.3
+
+    # Sumarização map-reduce para textos maiores que o contexto do modelo
+    LLM_MAP_REDUCE_THRESHOLD_TOKENS: int = 100_000
+    LLM_CHUNK_TOKENS: int = 24_000
+    LLM_MAX_CONCURRENCY: int = 4
+
+    # Gateway do LLM: operações simultâneas (global e por usuário), fila de
+    # espera limitada (429 + Retry-After quando cheia), novas tentativas com
+    # backoff e circuit breaker para erros 429/5xx do provedor
+    LLM_GATEWAY_MAX_ACTIVE: int = 8
+    LLM_GATEWAY_MAX_ACTIVE_PER_USER: int = 2
+    LLM_GATEWAY_QUEUE_SIZE: int = 50
+    LLM_GATEWAY_QUEUE_TIMEOUT_SECONDS: int = 60
+    LLM_GATEWAY_MAX_PROVIDER_CALLS: int = 8
+    LLM_RETRY_ATTEMPTS: int = 4
+    LLM_RETRY_BASE_SECONDS: float = 1.0
+    LLM_RETRY_MAX_SECONDS: float = 30.0
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_COOLDOWN_SECONDS: int = 30
+
+    # Compactação do texto antes do LLM (cabeçalhos/rodapés, hifenização,
+    # espaços e parágrafos duplicados entre arquivos)
+    PROMPT_COMPACTION_ENABLED: bool = True
+    PROMPT_COMPACTION_REPEAT_RATIO: float = 0.5  # fração das páginas com a mesma linha na borda
+    PROMPT_COMPACTION_EDGE_LINES: int = 3        # linhas do topo e do fim de cada página analisadas
+    PROMPT_COMPACTION_MIN_PARAGRAPH_CHARS: int = 80
+
+    # Cache de resumos (LRU em memória + tabela com TTL)
+    SUMMARY_CACHE_MAX_ENTRIES: int = 1024
+    SUMMARY_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+
+    # Jobs assíncronos de resumo
+    SUMMARY_JOB_WORKERS: int = 4
+    SUMMARY_JOB_QUEUE_SIZE: int = 200
+    # Lease dos jobs em execução: o worker renova `updated_at` a cada
+    # heartbeat; só jobs sem renovação há mais que o lease são retomados
+    # (evita rodar de novo o job de outro processo vivo)
+    SUMMARY_JOB_HEARTBEAT_SECONDS: int = 30
+    SUMMARY_JOB_LEASE_SECONDS: int = 120
+
+    # Upload retomável em partes (estilo tus)
+    RESUMABLE_UPLOAD_MAX_SIZE: int = 200 * 1024 * 1024  # 200 MB
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 3600
+    UPLOAD_GC_INTERVAL_SECONDS: int = 3600
+
+    # Recálculo periódico dos contadores do painel (/stats)
+    STATS_REPAIR_INTERVAL_SECONDS: int = 6 * 3600
+
+    # Busca textual: usuários com índice BM25 em memória (fallback do SQLite)
+    SEARCH_INDEX_CACHE_USERS: int = 32
+
+    # Perguntas sobre os documentos (/notebook/ask): trechos com sobreposição,
+    # vetores locais por usuário e top-k por similaridade de cosseno
+    RETRIEVAL_EMBEDDER: str = "hashing"
+    RETRIEVAL_EMBEDDING_DIM: int = 1024
+    RETRIEVAL_CHUNK_WORDS: int = 200
+    RETRIEVAL_CHUNK_OVERLAP_WORDS: int = 40
+    RETRIEVAL_TOP_K: int = 6
+    RETRIEVAL_INDEX_CACHE_USERS: int = 32
+
+    # Token exigido em GET /metrics (header X-Metrics-Token); vazio desativa a rota
+    METRICS_TOKEN: str = ""
+
     class Config:
         env_file = ".env"
 
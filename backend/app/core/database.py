@@ -1,13 +1,44 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
 
 DATABASE_URL = settings.DATABASE_URL
 
+# Driver assíncrono de cada banco (asyncpg no Postgres, aiosqlite nos testes)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str):
+    """Mesma URL do banco, trocando o driver síncrono pelo assíncrono."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    return parsed.set(drivername=driver) if driver else parsed
+
+
+def pool_options(url: str, pool_size: int, max_overflow: int) -> dict:
+    # SQLite não usa pool de conexões de rede
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+
+
+# Engine síncrona: Alembic, threads de extração e cache de resumos
 engine = create_engine(
     DATABASE_URL,
     echo=False,          
-    future=True        
+    future=True,
+    **pool_options(DATABASE_URL, settings.DB_SYNC_POOL_SIZE, settings.DB_SYNC_MAX_OVERFLOW)
 )
 
 SessionLocal = sessionmaker(
@@ -17,6 +48,21 @@ SessionLocal = sessionmaker(
     future=True
 )
 
+# Engine assíncrona: rotas e serviços que rodam no event loop, sem ocupar
+# uma thread do threadpool enquanto esperam o banco
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    echo=False,
+    **pool_options(DATABASE_URL, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -24,4 +70,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
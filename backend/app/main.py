@@ -1,9 +1,52 @@
+import asyncio
+import hmac
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, files, summary, user
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.core.database import async_engine
+from app.routers import auth, files, notebook, search, stats, summary, uploads, user
+from app.services.extraction import extraction_pool, resume_pending_extractions
+from app.services.llm_client import init_llm_client
+from app.services.llm_errors import LLMOverloaded
+from app.services.llm_gateway import llm_gateway
+from app.services.prompt_compaction import compaction_stats
+from app.services.stats import run_stats_repair
+from app.services.summary_cache import summary_cache
+from app.services.summary_jobs import summary_job_runner
+from app.services.upload_sessions import run_upload_gc
+from app.utils.pdf_reader import shutdown_process_pool
+from app.utils.security import password_hasher
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # cliente Gemini e chains criados uma vez e reaproveitados por processo
+    init_llm_client()
+    # retomar extrações interrompidas por um reinício
+    resume_pending_extractions()
+    summary_cache.purge_expired()
+    # workers dos jobs de resumo (retomam jobs não concluídos)
+    await summary_job_runner.start()
+    # coleta periódica das sessões de upload abandonadas
+    upload_gc = asyncio.create_task(run_upload_gc(settings.UPLOAD_GC_INTERVAL_SECONDS))
+    # recálculo periódico dos contadores do painel
+    stats_repair = asyncio.create_task(run_stats_repair(settings.STATS_REPAIR_INTERVAL_SECONDS))
+    yield
+    for task in (upload_gc, stats_repair):
+        task.cancel()
+    await asyncio.gather(upload_gc, stats_repair, return_exceptions=True)
+    await summary_job_runner.stop()
+    extraction_pool.shutdown()
+    shutdown_process_pool()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 origins_raw = os.getenv("BACKEND_CORS_ORIGINS", "http://localhost:5173,http://localhost:3000")
@@ -15,13 +58,50 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # headers de resposta que o frontend precisa ler (cache, paginação, upload)
+    expose_headers=[
+        "ETag", "X-Next-Cursor", "Upload-Offset", "Upload-Length", "Location",
+        "X-Prompt-Tokens-Saved", "Retry-After",
+    ],
 )
 
+
+@app.exception_handler(LLMOverloaded)
+async def llm_overloaded_handler(request: Request, exc: LLMOverloaded):
+    # fila do gateway cheia (429) ou circuit breaker aberto (503)
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 app.include_router(auth.router)
+app.include_router(uploads.router)
 app.include_router(files.router)
 app.include_router(summary.router)
 app.include_router(user.router)
+app.include_router(stats.router)
+app.include_router(search.router)
+app.include_router(notebook.router)
 
 @app.get("/")
 def read_root():
-    return {"Hello": "World"}
\ No newline at end of file
+    return {"Hello": "World"}
+
+
+def require_metrics_token(x_metrics_token: Optional[str] = Header(None)):
+    # contadores internos: só para quem tem o token (ex.: o coletor de métricas)
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_metrics_token or not hmac.compare_digest(x_metrics_token, settings.METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de métricas inválido")
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)], include_in_schema=False)
+def read_metrics():
+    """Contadores de acerto/falha dos caches e da compactação dos prompts (por processo)."""
+    return {
+        "summary_cache": dict(summary_cache.stats),
+        "prompt_compaction": dict(compaction_stats.stats),
+        "llm_gateway": llm_gateway.snapshot(),
+    }
\ No newline at end of file
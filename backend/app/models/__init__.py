@@ -1 +1 @@
-from .models import User, File, Summary
\ No newline at end of file
+from .models import User, File, Blob, Summary, SummaryFile, SummaryCache, SummaryJob, UploadSession, UserStats, DocumentPage, DocumentChunk
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -31,21 +31,154 @@ class File(Base):
     file_path = Column(String(300))
     file_size = Column(Integer)
     upload_date = Column(DateTime, default=datetime.utcnow)
-    
+    # blob com o conteúdo (arquivos antigos, anteriores ao armazenamento
+    # endereçado por conteúdo, ficam sem hash e usam só o file_path)
+    content_hash = Column(String(64), ForeignKey("blobs.content_hash"), nullable=True, index=True)
+
+    # Extração de texto feita em background após o upload
+    extraction_status = Column(String(20), default="pending")
+    page_count = Column(Integer, nullable=True)
+    extracted_at = Column(DateTime, nullable=True)
+    # trechos das perguntas gerados (mesmo que o PDF não renda nenhum trecho)
+    chunked_at = Column(DateTime, nullable=True)
+
     user_id = Column(Integer, ForeignKey("users.id"))
 
     # Relação reversa
     owner = relationship("User", back_populates="files")
 
+    # listagem paginada por usuário, mais recentes primeiro
+    __table_args__ = (
+        Index("ix_files_user_id_upload_date", user_id, upload_date.desc()),
+    )
+
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    # Conteúdo armazenado uma única vez, compartilhado por todos os File com o mesmo hash
+    content_hash = Column(String(64), primary_key=True)
+    file_path = Column(String(300))
+    size = Column(Integer)
+    ref_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 
 class Summary(Base):
     __tablename__ = "summaries"
 
     id = Column(Integer, primary_key=True, index=True)
     summary_text = Column(Text)
-    file_ids = Column(String)
     is_consolidated = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User", back_populates="summaries")
+
+    # Arquivos resumidos, na ordem do pedido (carregados junto com o resumo)
+    file_links = relationship(
+        "SummaryFile",
+        order_by="SummaryFile.position",
+        cascade="all, delete-orphan",
+        lazy="selectin",
+    )
+
+    __table_args__ = (
+        Index("ix_summaries_user_id_created_at", user_id, created_at.desc()),
+    )
+
+    @property
+    def file_ids(self) -> str:
+        """IDs dos arquivos separados por vírgula (formato exposto pela API)."""
+        return ",".join(str(link.file_id) for link in self.file_links)
+
+
+class SummaryFile(Base):
+    __tablename__ = "summary_files"
+
+    summary_id = Column(Integer, ForeignKey("summaries.id", ondelete="CASCADE"), primary_key=True)
+    # índice próprio: "quais resumos usam o arquivo X" e limpeza ao apagar o arquivo
+    file_id = Column(Integer, ForeignKey("files.id", ondelete="CASCADE"), primary_key=True, index=True)
+    position = Column(Integer, default=0)
+
+
+class SummaryCache(Base):
+    __tablename__ = "summary_cache"
+
+    # sha256 do texto normalizado + versão do prompt + modelo + temperatura
+    cache_key = Column(String(64), primary_key=True)
+    summary_text = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
+
+
+class SummaryJob(Base):
+    __tablename__ = "summary_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_ids = Column(String)
+    is_consolidated = Column(Integer, default=0)
+    mode = Column(String(20), default="raw")
+    # queued -> extracting -> summarizing -> done | failed
+    status = Column(String(20), default="queued", index=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user_id = Column(Integer, ForeignKey("users.id"))
+    summary_id = Column(Integer, ForeignKey("summaries.id"), nullable=True)
+    summary = relationship("Summary")
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    # Upload retomável: os bytes recebidos ficam num arquivo .part até o finalize
+    id = Column(String(32), primary_key=True)
+    file_name = Column(String(200))
+    total_size = Column(Integer)
+    offset = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
+
+    user_id = Column(Integer, ForeignKey("users.id"))
+
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+
+    # Contadores do painel, atualizados na mesma transação de cada upload,
+    # exclusão e resumo (e recalculados periodicamente pelo job de reparo)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    file_count = Column(Integer, default=0, nullable=False)
+    total_bytes = Column(BigInteger, default=0, nullable=False)
+    single_summary_count = Column(Integer, default=0, nullable=False)
+    consolidated_summary_count = Column(Integer, default=0, nullable=False)
+    last_upload_at = Column(DateTime, nullable=True)
+    last_summary_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DocumentPage(Base):
+    __tablename__ = "document_pages"
+
+    # Texto extraído de cada página, base da busca textual. No Postgres a
+    # migração acrescenta a coluna `search_vector` (tsvector) com índice GIN.
+    id = Column(Integer, primary_key=True)
+    file_id = Column(Integer, ForeignKey("files.id", ondelete="CASCADE"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    page_no = Column(Integer)
+    text = Column(Text)
+
+
+class DocumentChunk(Base):
+    __tablename__ = "document_chunks"
+
+    # Trechos com sobreposição do texto extraído, unidade das perguntas sobre
+    # os documentos. Os vetores ficam fora do banco, num arquivo por usuário
+    # (storage/vectors), identificados pelo id do trecho.
+    id = Column(Integer, primary_key=True)
+    file_id = Column(Integer, ForeignKey("files.id", ondelete="CASCADE"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    page_no = Column(Integer)
+    text = Column(Text)
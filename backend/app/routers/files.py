@@ -1,32 +1,89 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from pathlib import Path
-from typing import List
-from datetime import datetime
+from typing import Any, List, Optional
 
 from app.core.database import get_db
 from app.services.auth_service import get_current_user  
 from app.models.models import File as FileModel
 from app.schemas.file import FileOut
-from app.utils.files import save_upload_file
+from app.utils.files import save_upload_file, save_upload_stream, MAX_FILE_SIZE
+from app.services.extraction import extraction_pool
+from app.services.file_service import BLOB_ROOT, register_upload, delete_file_record
+from app.utils.http_cache import etag_matches, not_modified, payload_etag, strong_etag
+from app.utils.pagination import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    keyset_filter,
+    next_cursor,
+)
 
 router = APIRouter(prefix="/files", tags=["files"])
 
-STORAGE_ROOT = Path.cwd() / "storage"
+# Metadados mudam (ex.: status da extração): o cliente sempre revalida
+METADATA_CACHE_CONTROL = "private, no-cache"
+# O conteúdo de um arquivo nunca muda depois do upload
+BLOB_CACHE_CONTROL = "private, max-age=31536000, immutable"
+LEGACY_CACHE_CONTROL = "private, no-cache"
+
+_file_list_adapter = TypeAdapter(List[FileOut])
+_file_adapter = TypeAdapter(FileOut)
+
+
+def _json_with_etag(
+    request: Request, adapter: TypeAdapter, data: Any, headers: Optional[dict] = None
+) -> Response:
+    """
+    Serializa a resposta uma vez e responde 304 (sem corpo) se o cliente já
+    tem a mesma versão em cache.
+    """
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    etag = payload_etag(body)
+    if etag_matches(request, etag):
+        return not_modified(etag, METADATA_CACHE_CONTROL)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": METADATA_CACHE_CONTROL, **(headers or {})},
+    )
 
 
 @router.get("", response_model=List[FileOut])
-def list_files(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def list_files(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
     """
-    Lista todos os arquivos pertencentes ao usuário logado.
+    Lista os arquivos do usuário logado, mais recentes primeiro. Com `limit`,
+    em páginas de até `limit` itens: se houver mais, o header `X-Next-Cursor`
+    traz o `cursor` da próxima página. Sem `limit`, a lista inteira.
     """
-    files = db.query(FileModel).filter(FileModel.user_id == current_user.id).order_by(FileModel.upload_date.desc()).all()
-    return files
+    query = db.query(FileModel).filter(FileModel.user_id == current_user.id)
+    if cursor:
+        query = query.filter(keyset_filter(FileModel.upload_date, FileModel.id, cursor))
+    query = query.order_by(FileModel.upload_date.desc(), FileModel.id.desc())
+    if limit is not None:
+        query = query.limit(limit + 1)
+    files = query.all()
+
+    cursor_out = next_cursor(files, limit, "upload_date")
+    headers = {NEXT_CURSOR_HEADER: cursor_out} if cursor_out else None
+    return _json_with_etag(request, _file_list_adapter, files, headers)
 
 
 @router.get("/{file_id}", response_model=FileOut)
-def get_file_metadata(file_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def get_file_metadata(
+    file_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
     """
     Retorna metadados do arquivo (sem enviar o conteúdo).
     Útil para mostrar lista e detalhes sem baixar.
@@ -36,7 +93,7 @@ def get_file_metadata(file_id: int, db: Session = Depends(get_db), current_user
         raise HTTPException(status_code=404, detail="Arquivo não encontrado")
     if file_rec.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Não autorizado a acessar este arquivo")
-    return file_rec
+    return _json_with_etag(request, _file_adapter, file_rec)
 
 
 @router.get(
@@ -46,15 +103,24 @@ def get_file_metadata(file_id: int, db: Session = Depends(get_db), current_user
             "content": {"application/pdf": {"schema": {"type": "string", "format": "binary"}}},
             "description": "PDF file (application/pdf)"
         },
+        206: {"description": "Partial content (Range)"},
+        304: {"description": "Not modified"},
         401: {"description": "Unauthorized"},
         403: {"description": "Forbidden"},
         404: {"description": "Not found"}
     },
 )
-def download_file(file_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def download_file(
+    file_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
     """
     Retorna o PDF como FileResponse (streaming).
     Verifica pertencimento e existência do arquivo.
+    Suporta `If-None-Match` (304) e `Range`/`If-Range` (206), permitindo
+    que o visualizador carregue o PDF por partes.
     """
     file_rec = db.query(FileModel).filter(FileModel.id == file_id).first()
     if not file_rec:
@@ -63,20 +129,30 @@ def download_file(file_id: int, db: Session = Depends(get_db), current_user = De
     if file_rec.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Não autorizado a acessar este arquivo")
 
+    # ETag forte pelo hash do conteúdo; arquivos antigos (sem hash) ficam
+    # com a ETag padrão do FileResponse (mtime + tamanho)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{file_rec.file_name}"',
+        "Cache-Control": BLOB_CACHE_CONTROL if file_rec.content_hash else LEGACY_CACHE_CONTROL,
+    }
+    if file_rec.content_hash:
+        etag = strong_etag(file_rec.content_hash)
+        if etag_matches(request, etag):
+            return not_modified(etag, headers["Cache-Control"])
+        headers["ETag"] = etag
+
     # Montar path absoluto
     stored_path = Path.cwd() / file_rec.file_path 
 
     if not stored_path.exists() or not stored_path.is_file():
         raise HTTPException(status_code=404, detail="Arquivo armazenado não encontrado no servidor")
 
-    # Retornar via FileResponse (usa streaming sob o capô)
+    # Retornar via FileResponse (usa streaming sob o capô; trata Range e If-Range)
     return FileResponse(
         path=str(stored_path),
         media_type="application/pdf",
         filename=file_rec.file_name,
-        headers={
-            "Content-Disposition": f'attachment; filename="{file_rec.file_name}"'
-        }
+        headers=headers,
     )
 
 
@@ -86,25 +162,91 @@ def upload_file(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),
 ):
-    # 1) salvar arquivo no disco (valida extensão e tamanho dentro da função)
+    # 1) salvar arquivo no disco calculando o hash (valida extensão e tamanho dentro da função)
     try:
-        user_folder = STORAGE_ROOT / str(current_user.id)
-        saved_path, size = save_upload_file(upload, user_folder)
+        tmp_path, size, content_hash = save_upload_file(upload, BLOB_ROOT)
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Erro ao salvar arquivo")
 
-    # 2) registrar metadados no banco
-    file_record = FileModel(
-        file_name = upload.filename or saved_path.name,
-        file_path = str(saved_path.relative_to(Path.cwd())),  # caminho relativo
-        file_size = size,
-        upload_date = datetime.utcnow(),
-        user_id = current_user.id
+    # 2) registrar metadados no banco; conteúdo repetido reaproveita o blob existente
+    file_record = register_upload(
+        db,
+        user_id=current_user.id,
+        file_name=upload.filename or "file.pdf",
+        tmp_path=tmp_path,
+        size=size,
+        content_hash=content_hash,
+    )
+
+    # 3) disparar a extração de texto em background (fora do caminho crítico)
+    extraction_pool.submit(file_record.id, file_record.file_path, file_record.content_hash)
+
+    return file_record
+
+
+@router.post(
+    "/upload/stream",
+    response_model=FileOut,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/pdf": {"schema": {"type": "string", "format": "binary"}}},
+        }
+    },
+)
+async def upload_file_stream(
+    request: Request,
+    filename: str,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Upload assíncrono: o corpo da requisição é o próprio PDF (sem multipart).
+    Os bytes vão direto para o armazenamento numa única passada, que também
+    valida tamanho e assinatura e calcula o hash, sem bloquear o event loop.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="Arquivo excede o tamanho máximo de 50 MB")
+
+    # 1) gravar o corpo no disco calculando o hash
+    try:
+        tmp_path, size, content_hash = await save_upload_stream(
+            request.stream(), filename, BLOB_ROOT
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    # 2) registrar metadados no banco (mesmo fluxo do upload multipart)
+    file_record = await run_in_threadpool(
+        register_upload,
+        db,
+        user_id=current_user.id,
+        file_name=filename,
+        tmp_path=tmp_path,
+        size=size,
+        content_hash=content_hash,
     )
-    db.add(file_record)
-    db.commit()
-    db.refresh(file_record)
+
+    # 3) disparar a extração de texto em background
+    extraction_pool.submit(file_record.id, file_record.file_path, file_record.content_hash)
 
     return file_record
+
+
+@router.delete("/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_file(file_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """
+    Remove o arquivo do usuário. O conteúdo armazenado só é apagado quando
+    nenhum outro arquivo (de qualquer usuário) tem o mesmo conteúdo.
+    """
+    file_rec = db.query(FileModel).filter(FileModel.id == file_id).first()
+    if not file_rec:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+    if file_rec.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Não autorizado a acessar este arquivo")
+
+    delete_file_record(db, file_rec)
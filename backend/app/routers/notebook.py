@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.services.auth_service import get_current_user
+from app.schemas.notebook import AskRequest, AskResponse
+from app.services.notebook import ask
+
+router = APIRouter(prefix="/notebook", tags=["notebook"])
+
+
+@router.post("/ask", response_model=AskResponse)
+async def ask_documents(
+    payload: AskRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Pergunta sobre os documentos do usuário. Só os trechos mais próximos
+    da pergunta vão para o LLM; eles voltam em `sources` junto da resposta.
+    """
+    return await ask(
+        db,
+        current_user.id,
+        payload.question,
+        payload.top_k or settings.RETRIEVAL_TOP_K,
+        payload.file_ids,
+    )
@@ -0,0 +1,25 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.services.auth_service import get_current_user
+from app.schemas.search import SearchHit
+from app.services.search import search_pages
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=List[SearchHit])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Busca no texto dos PDFs do usuário. Retorna as páginas mais relevantes,
+    com o arquivo e um trecho destacando os termos.
+    """
+    return await search_pages(db, current_user.id, q, limit)
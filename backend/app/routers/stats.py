@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.services.auth_service import get_current_user
+from app.schemas.stats import UserStatsOut
+from app.services.stats import get_user_stats
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("", response_model=UserStatsOut)
+async def read_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Números do painel (arquivos, bytes, resumos e última atividade), lidos
+    de contadores mantidos a cada operação em vez de contar as listas.
+    """
+    return await get_user_stats(db, current_user.id)
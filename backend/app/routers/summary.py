@@ -1,54 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from pathlib import Path
+import json
 
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db, AsyncSessionLocal
 from app.core.config import settings
 from app.services.auth_service import get_current_user
 
 
-from app.models.models import File as FileModel
-from app.schemas.summary import SummaryOut, SummaryCreateMulti
-from app.services.summary import create_summary, get_summaries_by_user, get_summary_by_id
-from app.utils.pdf_reader import extract_pdf_text
-from app.services.llm_client import generate_summary
+from app.schemas.summary import SummaryOut, SummaryCreateMulti, SummaryJobOut
+from app.services.summary import (
+    create_summary,
+    get_summaries_by_user,
+    get_summary_by_id,
+    get_file_for_summary,
+    get_files_for_summary,
+    load_file_prompt,
+    load_files_prompt,
+)
+from app.services.summary_jobs import (
+    create_job, get_job_by_id, mark_job_failed, summary_job_runner, JobQueueFull,
+)
+from app.services.llm_client import asummarize_text, astream_summary, astream_consolidation, LLMError
+from app.services.llm_gateway import llm_gateway
+from app.services.consolidation import build_consolidation_input, hierarchical_summary, CONSOLIDATE_NAMESPACE
+from app.services.prompt_compaction import CompactionReport
+from app.services.summary_cache import cached_summary, cached_summary_stream
+from app.utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 
 router = APIRouter(prefix="/summary", tags=["summary"])
 
+# Tokens (estimados) que a compactação tirou do texto enviado ao LLM
+TOKENS_SAVED_HEADER = "X-Prompt-Tokens-Saved"
 
-@router.post("/single", response_model=SummaryOut)
-def summarize_single_file(
-    file_id: int,
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
-):
-    # 1. Buscar arquivo no banco
-    file_rec = db.query(FileModel).filter(FileModel.id == file_id).first()
 
-    if not file_rec:
-        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+async def _load_single_file_text(db: AsyncSession, file_id: int, user_id: int) -> tuple[str, CompactionReport]:
+    # 1-3. Buscar arquivo, verificar dono e existência do PDF
+    file_rec = await get_file_for_summary(db, file_id, user_id)
 
-    # 2. Verificar se pertence ao usuário logado
-    if file_rec.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Você não pode acessar este arquivo")
+    # 4. Obter texto (normalmente já extraído em background no upload),
+    #    sem cabeçalhos/rodapés repetidos e com espaços normalizados
+    return await run_in_threadpool(load_file_prompt, file_rec)
 
-    # 3. Montar o caminho do PDF
-    pdf_path = Path(file_rec.file_path)
-    if not pdf_path.exists():
-        raise HTTPException(status_code=404, detail="PDF não encontrado no servidor")
 
-    # 4. Extrair texto
-    text = extract_pdf_text(str(pdf_path))
-    if not text.strip():
-        raise HTTPException(status_code=400, detail="PDF não contém texto legível")
+async def _load_multi_files_text(db: AsyncSession, file_ids: list[int], user_id: int) -> tuple[str, CompactionReport]:
+    files = await get_files_for_summary(db, file_ids, user_id)
+    return await run_in_threadpool(load_files_prompt, files)
 
-    # 5. Gerar resumo usando LLM
-    summary_text = generate_summary(text)
+
+def _tokens_saved_headers(report: CompactionReport) -> dict:
+    return {TOKENS_SAVED_HEADER: str(report.tokens_saved)}
+
+
+# As rotas de resumo são assíncronas: a chamada ao LLM (a parte mais longa)
+# e o banco (sessão assíncrona) são aguardados no event loop sem prender uma
+# thread do threadpool. Só a extração de texto roda via run_in_threadpool.
+@router.post("/single", response_model=SummaryOut)
+async def summarize_single_file(
+    file_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    text, report = await _load_single_file_text(db, file_id, current_user.id)
+    response.headers.update(_tokens_saved_headers(report))
+
+    # 5. Gerar resumo usando LLM (map-reduce automático para textos grandes),
+    #    reaproveitando o cache quando o mesmo texto já foi resumido
+    summary_text = await cached_summary(text, llm_gateway.bind(asummarize_text, current_user.id))
 
     # 6. Salvar no banco
-    summary = create_summary(
+    summary = await create_summary(
         db=db,
-        file_ids=str(file_id),
+        file_ids=[file_id],
         content=summary_text,
         user_id=current_user.id,
         is_consolidated=0
@@ -59,67 +85,236 @@ def summarize_single_file(
 
 
 @router.post("/multi", response_model=SummaryOut)
-def summarize_multi_files(payload: SummaryCreateMulti,
-                          db: Session = Depends(get_db),
-                          current_user = Depends(get_current_user)):
-    
+async def summarize_multi_files(payload: SummaryCreateMulti,
+                                response: Response,
+                                db: AsyncSession = Depends(get_async_db),
+                                current_user = Depends(get_current_user)):
+
     file_ids = payload.file_ids
 
-    if not file_ids:
-        raise HTTPException(400, "Envie pelo menos 1 ID")
+    if payload.mode == "hierarchical":
+        # consolida os resumos individuais (reaproveitados ou gerados em paralelo)
+        files = await get_files_for_summary(db, file_ids, current_user.id)
+        llm_gateway.check_capacity(current_user.id)
+        summary_text, report = await hierarchical_summary(files, current_user.id)
+        response.headers.update(_tokens_saved_headers(report))
+    else:
+        full_text, report = await _load_multi_files_text(db, file_ids, current_user.id)
+        response.headers.update(_tokens_saved_headers(report))
+        summary_text = await cached_summary(full_text, llm_gateway.bind(asummarize_text, current_user.id))
+
+    new_summary = await create_summary(
+        db=db,
+        file_ids=file_ids,
+        content=summary_text,
+        user_id=current_user.id,
+        is_consolidated=1
+    )
+
+    return new_summary
 
-    files = db.query(FileModel).filter(FileModel.id.in_(file_ids)).all()
 
-    if len(files) != len(file_ids):
-        raise HTTPException(404, "Algum arquivo não foi encontrado")
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-    for f in files:
-        if f.user_id != current_user.id:
-            raise HTTPException(403, "Você não tem acesso a um dos arquivos")
 
-    full_text = ""
+async def _save_streamed_summary(file_ids: list[int], content: str, user_id: int, is_consolidated: int) -> dict:
+    # sessão própria: a do Depends pode já ter sido fechada quando o stream termina
+    async with AsyncSessionLocal() as db:
+        summary = await create_summary(
+            db=db,
+            file_ids=file_ids,
+            content=content,
+            user_id=user_id,
+            is_consolidated=is_consolidated,
+        )
+        return SummaryOut.model_validate(summary).model_dump(mode="json")
 
-    for f in files:
-        text = extract_pdf_text(f.file_path)
-        full_text += "\n\n" + text
 
-    if not full_text.strip():
-        raise HTTPException(400, "Os PDFs não possuem texto legível")
+def _summary_event_stream(
+    text: str,
+    file_ids: list[int],
+    user_id: int,
+    is_consolidated: int,
+    stream=astream_summary,
+    namespace: str = "summary",
+    headers: dict | None = None,
+):
+    """
+    Eventos SSE: vários `token` com os pedaços do resumo, depois `done` com o
+    SummaryOut já salvo (ou `error` se a chamada ao LLM falhar).
+    """
+    # 429/503 antes de começar: depois do primeiro byte o status não muda mais
+    llm_gateway.check_capacity(user_id)
+    stream = llm_gateway.bind_stream(stream, user_id)
+
+    async def events():
+        parts = []
+        try:
+            async for piece in cached_summary_stream(text, stream, namespace):
+                parts.append(piece)
+                yield _sse("token", piece)
+        except LLMError as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+
+        summary = await _save_streamed_summary(file_ids, "".join(parts), user_id, is_consolidated)
+        yield _sse("done", summary)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **(headers or {})},
+    )
 
-    summary_text = generate_summary(full_text)
 
-    new_summary = create_summary(
-        db=db,
-        file_ids=",".join(map(str, file_ids)),
-        content=summary_text,
-        user_id=current_user.id,
-        is_consolidated=1
+# Streaming (SSE): os tokens são enviados conforme o LLM os gera, então o
+# primeiro byte chega após a latência do primeiro token, não do resumo todo.
+@router.post("/single/stream", response_class=StreamingResponse)
+async def stream_single_summary(
+    file_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    text, report = await _load_single_file_text(db, file_id, current_user.id)
+    return _summary_event_stream(
+        text, [file_id], current_user.id, is_consolidated=0, headers=_tokens_saved_headers(report)
     )
 
-    db.add(new_summary)
-    db.commit()
-    db.refresh(new_summary)
 
-    return new_summary
+@router.post("/multi/stream", response_class=StreamingResponse)
+async def stream_multi_summary(
+    payload: SummaryCreateMulti,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    file_ids = payload.file_ids
 
+    if payload.mode == "hierarchical":
+        # os resumos individuais que faltarem são gerados antes; só a consolidação é transmitida
+        files = await get_files_for_summary(db, file_ids, current_user.id)
+        llm_gateway.check_capacity(current_user.id)
+        consolidation_input, report = await build_consolidation_input(files, current_user.id)
+        return _summary_event_stream(
+            consolidation_input, file_ids, current_user.id, is_consolidated=1,
+            stream=astream_consolidation, namespace=CONSOLIDATE_NAMESPACE,
+            headers=_tokens_saved_headers(report),
+        )
+
+    full_text, report = await _load_multi_files_text(db, file_ids, current_user.id)
+    return _summary_event_stream(
+        full_text, file_ids, current_user.id, is_consolidated=1, headers=_tokens_saved_headers(report)
+    )
 
-@router.get("/", response_model=list[SummaryOut])
-def list_summaries(
-    db: Session = Depends(get_db),
+
+JOB_QUEUE_FULL_DETAIL = "Fila de resumos cheia, tente novamente em instantes"
+
+
+def _job_queue_full() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=JOB_QUEUE_FULL_DETAIL,
+        headers={"Retry-After": "30"},
+    )
+
+
+def _check_job_queue():
+    if summary_job_runner.is_full():
+        raise _job_queue_full()
+
+
+async def _enqueue_job(job):
+    try:
+        summary_job_runner.enqueue(job.id)
+    except JobQueueFull:
+        # a fila encheu entre a checagem e o insert: nenhum worker pegaria o
+        # job, então ele é encerrado como falho em vez de ficar 'queued'
+        await mark_job_failed(job.id, JOB_QUEUE_FULL_DETAIL)
+        raise _job_queue_full()
+    return job
+
+
+async def _create_single_job(db: AsyncSession, file_id: int, user_id: int):
+    await get_file_for_summary(db, file_id, user_id)
+    return await create_job(db, file_ids=[file_id], user_id=user_id, is_consolidated=0)
+
+
+async def _create_multi_job(db: AsyncSession, file_ids: list[int], user_id: int, mode: str):
+    await get_files_for_summary(db, file_ids, user_id)
+    return await create_job(db, file_ids=file_ids, user_id=user_id, is_consolidated=1, mode=mode)
+
+
+# Jobs: o POST só valida e enfileira, respondendo na hora com o id do job.
+# Extração e LLM rodam nos workers; o cliente acompanha por GET /summary/jobs/{id}.
+# A fila dos workers vive no event loop, junto com as rotas.
+@router.post("/jobs/single", response_model=SummaryJobOut, status_code=status.HTTP_202_ACCEPTED)
+async def create_single_summary_job(
+    file_id: int,
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
+    _check_job_queue()
+    job = await _create_single_job(db, file_id, current_user.id)
+    return await _enqueue_job(job)
 
-    summaries = get_summaries_by_user(db, current_user.id)
+
+@router.post("/jobs/multi", response_model=SummaryJobOut, status_code=status.HTTP_202_ACCEPTED)
+async def create_multi_summary_job(
+    payload: SummaryCreateMulti,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    _check_job_queue()
+    job = await _create_multi_job(db, payload.file_ids, current_user.id, payload.mode)
+    return await _enqueue_job(job)
+
+
+@router.get("/jobs/{job_id}", response_model=SummaryJobOut)
+async def get_summary_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    job = await get_job_by_id(db, job_id)
+
+    if not job:
+        raise HTTPException(404, "Job não encontrado")
+
+    if job.user_id != current_user.id:
+        raise HTTPException(403, "Você não tem acesso a este job")
+
+    return job
+
+
+@router.get("/", response_model=list[SummaryOut])
+async def list_summaries(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    file_id: int | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Resumos do usuário, mais recentes primeiro (opcionalmente só os que
+    incluem `file_id`). Com `limit` a lista é paginada e o header
+    `X-Next-Cursor` traz o `cursor` da próxima página; sem ele, vem inteira.
+    """
+    summaries, cursor_out = await get_summaries_by_user(
+        db, current_user.id, limit, cursor, file_id=file_id
+    )
+    if cursor_out:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_out
     return summaries
 
 
 @router.get("/{summary_id}", response_model=SummaryOut)
-def get_summary(
+async def get_summary(
     summary_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
-    summary = get_summary_by_id(db, summary_id)
+    summary = await get_summary_by_id(db, summary_id)
 
     if not summary:
         raise HTTPException(404, "Resumo não encontrado")
@@ -127,4 +322,4 @@ def get_summary(
     if summary.user_id != current_user.id:
         raise HTTPException(403, "Você não tem acesso a este resumo")
 
-    return summary
\ No newline at end of file
+    return summary
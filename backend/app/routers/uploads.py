@@ -0,0 +1,121 @@
+from fastapi import APIRouter, Depends, Header, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.services.auth_service import get_current_user
+from app.schemas.file import FileOut
+from app.schemas.upload import UploadSessionCreate, UploadSessionOut
+from app.services.extraction import extraction_pool
+from app.services.upload_sessions import (
+    abort_upload,
+    append_chunk,
+    create_upload_session,
+    finalize_upload,
+    get_upload_session,
+)
+
+# Upload retomável no estilo tus: cria a sessão, envia partes com PATCH a
+# partir do offset atual (consultado com HEAD) e finaliza. Uma conexão que
+# cai custa só os bytes que faltam.
+router = APIRouter(prefix="/files/uploads", tags=["files"])
+
+
+def _offset_headers(session) -> dict:
+    return {
+        "Upload-Offset": str(session.offset),
+        "Upload-Length": str(session.total_size),
+        "Cache-Control": "no-store",
+    }
+
+
+@router.post("", response_model=UploadSessionOut, status_code=status.HTTP_201_CREATED)
+def create_upload(
+    data: UploadSessionCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """Abre uma sessão de upload para um PDF de `size` bytes."""
+    session = create_upload_session(db, current_user.id, data.file_name, data.size)
+    response.headers["Location"] = f"/files/uploads/{session.id}"
+    response.headers.update(_offset_headers(session))
+    return session
+
+
+@router.head("/{upload_id}")
+def get_upload_offset(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """Offset atual da sessão, de onde o cliente deve retomar o envio."""
+    session = get_upload_session(db, upload_id, current_user.id)
+    return Response(status_code=status.HTTP_200_OK, headers=_offset_headers(session))
+
+
+@router.get("/{upload_id}", response_model=UploadSessionOut)
+def get_upload(
+    upload_id: str,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    session = get_upload_session(db, upload_id, current_user.id)
+    response.headers.update(_offset_headers(session))
+    return session
+
+
+@router.patch(
+    "/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/offset+octet-stream": {"schema": {"type": "string", "format": "binary"}}
+            },
+        }
+    },
+)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Envia uma parte do arquivo começando em `Upload-Offset`, que precisa ser
+    igual ao offset atual da sessão (409 caso contrário).
+    """
+    session = await run_in_threadpool(get_upload_session, db, upload_id, current_user.id)
+    new_offset = await append_chunk(session, upload_offset, request.stream())
+    return Response(
+        status_code=status.HTTP_204_NO_CONTENT,
+        headers={"Upload-Offset": str(new_offset)},
+    )
+
+
+@router.post("/{upload_id}/finalize", response_model=FileOut, status_code=status.HTTP_201_CREATED)
+def finalize(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """Conclui o upload e cria o arquivo; a extração de texto segue em background."""
+    session = get_upload_session(db, upload_id, current_user.id)
+    file_record = finalize_upload(db, session)
+    extraction_pool.submit(file_record.id, file_record.file_path, file_record.content_hash)
+    return file_record
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """Cancela a sessão e descarta os bytes já recebidos."""
+    session = get_upload_session(db, upload_id, current_user.id)
+    abort_upload(db, session)
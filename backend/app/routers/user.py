@@ -1,28 +1,44 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from pathlib import Path
 import shutil
 import os
 
-from app.core.database import get_db
-from app.services.auth_service import get_current_user
+from app.core.database import get_async_db
+from app.services.auth_service import get_current_user, get_user_by_id
+from app.services.user_cache import CurrentUser
 from app.schemas.user_profile import UserProfileUpdate, UserProfileOut
 from app.services.user_service import update_user_profile
 from app.models.models import User
 
 router = APIRouter(prefix="/user", tags=["user"])
 
+def _save_image(image: UploadFile, file_path: Path):
+    with file_path.open("wb") as buffer:
+        shutil.copyfileobj(image.file, buffer)
+
+
+async def _load_user(db: AsyncSession, current_user: CurrentUser) -> User:
+    # o perfil completo (descrição, imagem) não fica no cache nem no token
+    user = await get_user_by_id(db, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    return user
+
+
 @router.get("/profile", response_model=UserProfileOut)
-def read_user_profile(current_user: User = Depends(get_current_user)):
-    return current_user
+async def read_user_profile(db: AsyncSession = Depends(get_async_db), current_user: CurrentUser = Depends(get_current_user)):
+    return await _load_user(db, current_user)
 
 @router.put("/profile", response_model=UserProfileOut)
-def update_profile(
+async def update_profile(
     data: UserProfileUpdate = Depends(),
     image: UploadFile | None = File(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
+    user = await _load_user(db, current_user)
     image_path = None
     if image:
         if image.content_type not in ["image/jpeg", "image/png"]:
@@ -33,16 +49,15 @@ def update_profile(
         
         file_path = user_folder / image.filename
         
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        await run_in_threadpool(_save_image, image, file_path)
         
         # Converte para string com barra normal
         image_path = str(file_path).replace("\\", "/")
 
     # Atualizar user no service
-    updated_user = update_user_profile(
+    updated_user = await update_user_profile(
         db=db,
-        user=current_user,
+        user=user,
         full_name=data.full_name,
         description=data.description,
         image_path=image_path,
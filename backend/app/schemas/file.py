@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 class FileOut(BaseModel):
     id: int
@@ -7,6 +8,9 @@ class FileOut(BaseModel):
     file_path: str
     file_size: int
     upload_date: datetime
+    extraction_status: Optional[str] = None
+    page_count: Optional[int] = None
+    extracted_at: Optional[datetime] = None
 
     class Config:
         orm_mode = True
\ No newline at end of file
@@ -0,0 +1,24 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class AskRequest(BaseModel):
+    question: str = Field(..., min_length=1, max_length=2000)
+    # restringe a busca a esses arquivos; sem o campo, usa todos do usuário
+    file_ids: Optional[List[int]] = None
+    top_k: Optional[int] = Field(None, ge=1, le=20)
+
+
+class AskSource(BaseModel):
+    file_id: int
+    file_name: str
+    page_no: int
+    score: float
+    text: str
+
+
+class AskResponse(BaseModel):
+    answer: str
+    # trechos enviados ao LLM, na ordem da numeração citada na resposta
+    sources: List[AskSource]
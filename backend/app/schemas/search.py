@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class SearchHit(BaseModel):
+    file_id: int
+    file_name: str
+    page_no: int
+    score: float
+    # trecho da página com os termos encontrados entre <b></b>
+    snippet: str
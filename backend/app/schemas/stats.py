@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class UserStatsOut(BaseModel):
+    file_count: int
+    total_bytes: int
+    single_summary_count: int
+    consolidated_summary_count: int
+    last_upload_at: Optional[datetime] = None
+    last_summary_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Literal, Optional
 
 
 class SummaryCreateSingle(BaseModel):
@@ -10,6 +11,9 @@ class SummaryCreateSingle(BaseModel):
 class SummaryCreateMulti(BaseModel):
     file_ids: list[int]
     content: str
+    # raw: resume o texto concatenado dos PDFs
+    # hierarchical: consolida os resumos individuais de cada arquivo
+    mode: Literal["raw", "hierarchical"] = "raw"
 
 
 class SummaryOut(BaseModel):
@@ -19,4 +23,17 @@ class SummaryOut(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class SummaryJobOut(BaseModel):
+    id: int
+    status: str
+    file_ids: str
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    summary: Optional[SummaryOut] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class UploadSessionCreate(BaseModel):
+    file_name: str
+    size: int
+
+
+class UploadSessionOut(BaseModel):
+    id: str
+    file_name: str
+    total_size: int
+    offset: int
+    expires_at: datetime
+
+    class Config:
+        from_attributes = True
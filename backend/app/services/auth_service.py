@@ -2,14 +2,16 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 import jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 
 from app.core.config import settings
-from app.core.database import get_db
-from app.utils.security import hash_password, verify_password
-from app.models.models import User
+from app.core.database import get_async_db
+from app.utils.security import PasswordHasherBusy, password_hasher
+from app.models.models import User, UserStats
+from app.services.user_cache import CurrentUser, user_cache
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
@@ -18,7 +20,14 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> CurrentUser:
+    """
+    Valida o token e retorna os dados do usuário. Tokens com claims
+    (`AUTH_TOKEN_CLAIMS`) não consultam o banco; os demais passam pelo
+    cache de usuários antes do SELECT.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível validar as credenciais",
@@ -34,10 +43,19 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except jwt.InvalidTokenError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
+    if "username" in payload:
+        return CurrentUser(id=user_id, username=payload["username"], email=payload.get("email"))
+
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    user = await get_user_by_id(db, user_id)
     if user is None:
         raise credentials_exception
-    return user
+    current_user = CurrentUser.from_user(user)
+    user_cache.put(current_user, payload.get("exp"))
+    return current_user
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -51,16 +69,42 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def get_user_by_username(db: Session, username: str) -> Optional[User]:
-    return db.query(User).filter(User.username == username).first()
+def token_claims(user: User) -> dict:
+    """Payload do token de acesso do usuário."""
+    claims = {"user_id": user.id}
+    if settings.AUTH_TOKEN_CLAIMS:
+        # username e email não mudam pelo perfil, então não ficam desatualizados
+        claims.update(username=user.username, email=user.email)
+    return claims
+
+
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+    return await db.get(User, user_id)
+
 
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    return (await db.scalars(select(User).where(User.username == username))).first()
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
-    return db.query(User).filter(User.email == email).first()
 
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    return (await db.scalars(select(User).where(User.email == email))).first()
 
-def create_user(db: Session, user_create) -> User:
-    hashed = hash_password(user_create.password)
+
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Muitas autenticações simultâneas, tente novamente em instantes",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def create_user(db: AsyncSession, user_create) -> User:
+    # hash de senha é CPU e memória pesados: executor próprio, fora do event
+    # loop e do threadpool das demais rotas
+    try:
+        hashed = await password_hasher.hash(user_create.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     user = User(
         full_name=user_create.full_name,
         username=user_create.username,
@@ -68,15 +112,26 @@ def create_user(db: Session, user_create) -> User:
         password_hash=hashed
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.flush()
+    # linha dos contadores do painel criada junto com o usuário
+    db.add(UserStats(user_id=user.id))
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    user = get_user_by_username(db, username)
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    if not valid:
         return None
+    if new_hash is not None:
+        # parâmetros do Argon2 mudaram desde o cadastro: regrava com os atuais
+        user.password_hash = new_hash
+        await db.commit()
     return user
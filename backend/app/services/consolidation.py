@@ -0,0 +1,89 @@
+import asyncio
+from typing import Dict, List, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.models import File
+from app.services.extraction import extract_files_parallel
+from app.services.llm_client import aconsolidate_summaries, asummarize_text
+from app.services.llm_gateway import llm_gateway
+from app.services.prompt_compaction import CompactionReport
+from app.services.summary import create_summary, get_latest_file_summaries, load_file_prompt
+from app.services.summary_cache import cached_summary
+
+# Namespace do cache para as consolidações (prompt diferente do resumo comum)
+CONSOLIDATE_NAMESPACE = "consolidate"
+
+
+async def _existing_summary_texts(user_id: int, file_ids: List[int]) -> Dict[int, str]:
+    async with AsyncSessionLocal() as db:
+        summaries = await get_latest_file_summaries(db, user_id, file_ids)
+        return {file_id: s.summary_text for file_id, s in summaries.items()}
+
+
+async def _save_file_summary(file_id: int, summary_text: str, user_id: int):
+    async with AsyncSessionLocal() as db:
+        await create_summary(
+            db=db,
+            file_ids=[file_id],
+            content=summary_text,
+            user_id=user_id,
+            is_consolidated=0,
+        )
+
+
+async def _summarize_file(
+    file_rec: File, user_id: int, semaphore: asyncio.Semaphore
+) -> Tuple[str, CompactionReport]:
+    async with semaphore:
+        text, report = await run_in_threadpool(load_file_prompt, file_rec)
+        # parte de uma operação já admitida: espera a vaga em vez de recusar no meio
+        summary_text = await cached_summary(text, llm_gateway.bind(asummarize_text, user_id, bounded=False))
+    # salvo como resumo individual para ser reaproveitado nas próximas consolidações
+    await _save_file_summary(file_rec.id, summary_text, user_id)
+    return summary_text, report
+
+
+async def build_consolidation_input(files: List[File], user_id: int) -> Tuple[str, CompactionReport]:
+    """
+    Monta a entrada da consolidação hierárquica: o resumo individual de cada
+    arquivo, rotulado pelo nome. Reaproveita os resumos que já existem e gera
+    os que faltam em paralelo (extração no pool, no máximo
+    `LLM_MAX_CONCURRENCY` chamadas ao LLM ao mesmo tempo). O relatório soma
+    a compactação dos textos enviados para gerar os resumos que faltavam.
+    """
+    summaries = await _existing_summary_texts(user_id, [f.id for f in files])
+
+    report = CompactionReport()
+    missing = [f for f in files if f.id not in summaries]
+    if missing:
+        await run_in_threadpool(extract_files_parallel, missing)
+        semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        generated = await asyncio.gather(
+            *(_summarize_file(f, user_id, semaphore) for f in missing)
+        )
+        for file_rec, (summary_text, file_report) in zip(missing, generated):
+            summaries[file_rec.id] = summary_text
+            report.add(file_report)
+
+    text = "\n\n".join(f"## {f.file_name}\n\n{summaries[f.id]}" for f in files)
+    return text, report
+
+
+async def hierarchical_summary(
+    files: List[File], user_id: int, bounded: bool = True
+) -> Tuple[str, CompactionReport]:
+    """
+    Resumo consolidado a partir dos resumos individuais: com todos os
+    arquivos já resumidos, custa uma única chamada curta ao LLM. Retorna
+    também a compactação somada dos arquivos resumidos agora.
+    """
+    consolidation_input, report = await build_consolidation_input(files, user_id)
+    summary_text = await cached_summary(
+        consolidation_input,
+        llm_gateway.bind(aconsolidate_summaries, user_id, bounded),
+        namespace=CONSOLIDATE_NAMESPACE,
+    )
+    return summary_text, report
@@ -0,0 +1,87 @@
+import hashlib
+import threading
+from typing import Callable, Dict, Optional, Protocol, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.search import tokenize
+
+
+class Embedder(Protocol):
+    """
+    Transforma textos em vetores float32 normalizados (norma L2 = 1), para
+    que o produto escalar seja a similaridade de cosseno.
+
+    `key` identifica o modelo e a dimensão: vetores de embedders diferentes
+    ficam em arquivos separados e nunca são comparados entre si.
+    """
+
+    key: str
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Matriz (len(texts), dim) float32."""
+        ...
+
+
+class HashingEmbedder:
+    """
+    Embedder local, sem modelo nem rede: "hashing trick" sobre os termos e
+    pares de termos vizinhos (mesma tokenização da busca textual), com sinal
+    pelo hash para as colisões se anularem em média e tf sublinear.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.key = f"hashing-{dim}"
+
+    @staticmethod
+    def _hash(feature: str) -> int:
+        # hash estável entre processos (o hash() do Python muda a cada execução)
+        return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, content in enumerate(texts):
+            tokens = tokenize(content)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            hashes = np.fromiter((self._hash(f) for f in features), dtype=np.uint64, count=len(features))
+            # bit menos significativo = sinal; o resto escolhe a posição
+            positions = (hashes >> np.uint64(1)) % np.uint64(self.dim)
+            signs = np.where(hashes & np.uint64(1), -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix[row], positions.astype(np.intp), signs)
+
+        np.copysign(np.log1p(np.abs(matrix)), matrix, out=matrix)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+# Fábricas de embedders por nome (RETRIEVAL_EMBEDDER). Um embedder baseado
+# em modelo pode ser registrado aqui sem mudar o índice nem as rotas.
+EMBEDDERS: Dict[str, Callable[[], Embedder]] = {
+    "hashing": lambda: HashingEmbedder(settings.RETRIEVAL_EMBEDDING_DIM),
+}
+
+_embedder: Optional[Embedder] = None
+_embedder_lock = threading.Lock()
+
+
+def register_embedder(name: str, factory: Callable[[], Embedder]):
+    EMBEDDERS[name] = factory
+
+
+def get_embedder() -> Embedder:
+    """Embedder configurado, criado uma única vez por processo."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                factory = EMBEDDERS.get(settings.RETRIEVAL_EMBEDDER)
+                if factory is None:
+                    raise ValueError(f"Embedder desconhecido: {settings.RETRIEVAL_EMBEDDER}")
+                _embedder = factory()
+    return _embedder
@@ -0,0 +1,209 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import DocumentPage, File
+from app.services.retrieval import index_file_chunks
+from app.services.search import index_file_pages
+from app.utils.pdf_reader import PDFExtractionError
+from app.utils.text_cache import get_pdf_pages, iter_pdf_pages
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_PENDING = "pending"
+EXTRACTION_PROCESSING = "processing"
+EXTRACTION_DONE = "done"
+EXTRACTION_FAILED = "failed"
+
+
+def _set_status(file_id: int, status: str):
+    db = SessionLocal()
+    try:
+        file_rec = db.query(File).filter(File.id == file_id).first()
+        if file_rec is None:
+            return
+        file_rec.extraction_status = status
+        db.commit()
+    finally:
+        db.close()
+
+
+def _finish_extraction(file_id: int, pages: List[str]):
+    """Marca a extração concluída e indexa as páginas para a busca, juntos."""
+    db = SessionLocal()
+    try:
+        file_rec = db.query(File).filter(File.id == file_id).first()
+        if file_rec is None:
+            return
+        index_file_pages(db, file_rec, pages)
+        file_rec.extraction_status = EXTRACTION_DONE
+        file_rec.page_count = len(pages)
+        file_rec.extracted_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _run_extraction(file_id: int, file_path: str, content_hash: Optional[str] = None):
+    """
+    Extrai o PDF (gravando o texto no cache) e registra o status no `File`.
+    Roda em uma thread do pool, com sessão de banco própria.
+    """
+    _set_status(file_id, EXTRACTION_PROCESSING)
+    try:
+        pages = get_pdf_pages(file_path, content_hash)
+    except PDFExtractionError as e:
+        logger.warning("Falha na extração do arquivo %s: %s", file_id, e)
+        _set_status(file_id, EXTRACTION_FAILED)
+        return
+    except Exception:
+        logger.exception("Erro inesperado na extração do arquivo %s", file_id)
+        _set_status(file_id, EXTRACTION_FAILED)
+        return
+    _finish_extraction(file_id, pages)
+
+    # trechos e vetores para as perguntas: uma falha aqui não invalida a
+    # extração (o arquivo volta a ser indexado no próximo startup)
+    try:
+        index_file_chunks(file_id, pages)
+    except Exception:
+        logger.exception("Falha ao indexar os trechos do arquivo %s", file_id)
+
+
+class ExtractionPool:
+    """
+    Pool limitado de workers que extrai o texto dos PDFs logo após o upload.
+
+    No máximo `max_workers` extrações rodam ao mesmo tempo e no máximo
+    `max_queue` ficam aguardando. Com a fila cheia o arquivo permanece
+    'pending' e a extração acontece sob demanda na rota de resumo.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: Dict[int, Future] = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="pdf-extraction"
+            )
+        return self._executor
+
+    def submit(self, file_id: int, file_path: str, content_hash: Optional[str] = None) -> bool:
+        """Agenda a extração. Retorna False se a fila estiver cheia."""
+        with self._lock:
+            if file_id in self._futures:
+                return True
+            if not self._slots.acquire(blocking=False):
+                return False
+            future = self._get_executor().submit(
+                _run_extraction, file_id, file_path, content_hash
+            )
+            self._futures[file_id] = future
+
+        future.add_done_callback(lambda _f: self._release(file_id))
+        return True
+
+    def _release(self, file_id: int):
+        with self._lock:
+            self._futures.pop(file_id, None)
+        self._slots.release()
+
+    def wait(self, file_id: int, timeout: Optional[float] = None):
+        """Se houver extração em andamento para o arquivo, espera terminar."""
+        with self._lock:
+            future = self._futures.get(file_id)
+        if future is not None:
+            future.result(timeout=timeout)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+extraction_pool = ExtractionPool(settings.EXTRACTION_WORKERS, settings.EXTRACTION_QUEUE_SIZE)
+
+
+def extract_files_parallel(files: Iterable[File]):
+    """
+    Garante o texto de vários arquivos extraindo em paralelo no pool os que
+    ainda não foram extraídos, em vez de um por vez. Se a fila estiver cheia,
+    o arquivo restante é extraído sob demanda em `iter_files_pages`.
+    """
+    missing = [f for f in files if f.extraction_status != EXTRACTION_DONE]
+    for file_rec in missing:
+        extraction_pool.submit(file_rec.id, file_rec.file_path, file_rec.content_hash)
+    for file_rec in missing:
+        extraction_pool.wait(file_rec.id)
+
+
+def iter_files_pages(files: Iterable[File]) -> Iterator[Tuple[int, int, str]]:
+    """
+    Gera `(file_id, numero_da_pagina, texto)` para os arquivos, em ordem.
+
+    Parte do texto pronto quando a extração em background já terminou (ou
+    aguarda a que está em andamento, para não extrair o mesmo PDF duas
+    vezes). Cada arquivo só é aberto quando o consumidor chega nele.
+    """
+    for file_rec in files:
+        extraction_pool.wait(file_rec.id)
+        for page_no, page_text in iter_pdf_pages(file_rec.file_path, file_rec.content_hash):
+            yield file_rec.id, page_no, page_text
+
+
+def join_files_text(files: Iterable[File]) -> str:
+    """
+    Monta o texto de um ou mais arquivos numa única passada: cada arquivo é
+    precedido por duas quebras de linha e cada página termina em uma.
+    """
+    parts = []
+    current_file = None
+    for file_id, _, page_text in iter_files_pages(files):
+        if file_id != current_file:
+            parts.append("\n\n")
+            current_file = file_id
+        parts.append(page_text)
+        parts.append("\n")
+    return "".join(parts)
+
+
+def resume_pending_extractions():
+    """
+    Reagenda arquivos que ficaram sem extração (ex.: reinício do servidor) e
+    os extraídos antes da busca ou das perguntas existirem, que ainda não têm
+    páginas ou trechos indexados (o texto vem do cache, então reindexar é
+    barato).
+    """
+    db = SessionLocal()
+    try:
+        not_indexed = (
+            ~select(DocumentPage.id).where(DocumentPage.file_id == File.id).exists()
+            | File.chunked_at.is_(None)
+        )
+        pending = (
+            db.query(File.id, File.file_path, File.content_hash)
+            .filter(
+                File.extraction_status.in_([EXTRACTION_PENDING, EXTRACTION_PROCESSING])
+                | ((File.extraction_status == EXTRACTION_DONE) & not_indexed)
+            )
+            .order_by(File.upload_date.desc())
+            .all()
+        )
+    finally:
+        db.close()
+
+    for file_id, file_path, content_hash in pending:
+        if not extraction_pool.submit(file_id, file_path, content_hash):
+            break
@@ -0,0 +1,157 @@
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.models import Blob, DocumentChunk, DocumentPage, File, SummaryFile
+from app.services.stats import record_file_deleted, record_upload
+from app.utils.files import store_blob
+
+# Armazenamento endereçado por conteúdo: um único arquivo por SHA-256
+BLOB_ROOT = Path.cwd() / "storage" / "blobs"
+
+
+def acquire_blob(db: Session, content_hash: str, tmp_path: Path, size: int) -> Blob:
+    """
+    Registra mais uma referência ao blob `content_hash`, criando-o a partir
+    de `tmp_path` se for um conteúdo novo. Se o blob já existe o temporário
+    é descartado. Não faz commit.
+    """
+    blob = (
+        db.query(Blob)
+        .filter(Blob.content_hash == content_hash)
+        .with_for_update()
+        .first()
+    )
+
+    if blob is None:
+        final_path = store_blob(tmp_path, BLOB_ROOT, content_hash)
+        blob = Blob(
+            content_hash=content_hash,
+            file_path=str(final_path.relative_to(Path.cwd())),
+            size=size,
+            ref_count=1,
+        )
+        db.add(blob)
+        db.flush()
+        return blob
+
+    stored_path = Path.cwd() / blob.file_path
+    if not stored_path.exists():
+        # blob perdido no disco: restaura com o conteúdo recém-enviado
+        store_blob(tmp_path, BLOB_ROOT, content_hash)
+    else:
+        tmp_path.unlink(missing_ok=True)
+
+    # incremento atômico no banco (evita perder referências em uploads simultâneos)
+    blob.ref_count = Blob.ref_count + 1
+    db.flush()
+    return blob
+
+
+def release_blob(db: Session, content_hash: str) -> Optional[Tuple[Path, Path]]:
+    """
+    Remove uma referência ao blob. Na última, apaga a linha e tira o arquivo
+    do caminho do blob (renomeando), com a linha ainda travada: um upload
+    simultâneo do mesmo conteúdo espera e recria o blob sem colidir com ele.
+    Retorna `(caminho do blob, arquivo renomeado)` para o chamador apagar
+    depois do commit (ou devolver ao lugar se a transação falhar).
+    Não faz commit.
+    """
+    blob = (
+        db.query(Blob)
+        .filter(Blob.content_hash == content_hash)
+        .with_for_update()
+        .first()
+    )
+    if blob is None:
+        return None
+
+    released = None
+    if blob.ref_count <= 1:
+        path = Path.cwd() / blob.file_path
+        doomed = path.with_name(f".{path.name}.{uuid.uuid4().hex}.deleted")
+        try:
+            os.replace(path, doomed)
+            released = (path, doomed)
+        except FileNotFoundError:
+            pass
+        db.delete(blob)
+    else:
+        blob.ref_count = Blob.ref_count - 1
+    db.flush()
+    return released
+
+
+def register_upload(
+    db: Session, user_id: int, file_name: str, tmp_path: Path, size: int, content_hash: str
+) -> File:
+    """
+    Cria o `File` apontando para o blob do conteúdo, na mesma transação que
+    incrementa a contagem de referências.
+    """
+    # uma nova tentativa cobre o caso de dois uploads do mesmo conteúdo novo
+    # ao mesmo tempo: o segundo INSERT do blob falha e vira incremento
+    for attempt in range(2):
+        try:
+            blob = acquire_blob(db, content_hash, tmp_path, size)
+            file_record = File(
+                file_name=file_name,
+                file_path=blob.file_path,
+                file_size=size,
+                content_hash=content_hash,
+                upload_date=datetime.utcnow(),
+                user_id=user_id,
+            )
+            db.add(file_record)
+            record_upload(db, user_id, size, file_record.upload_date)
+            db.commit()
+            db.refresh(file_record)
+            return file_record
+        except IntegrityError:
+            db.rollback()
+            if attempt == 1:
+                raise
+
+
+def delete_file_record(db: Session, file_rec: File):
+    """
+    Apaga o registro do arquivo. O conteúdo só é removido do disco quando
+    nenhum outro `File` aponta para o mesmo blob.
+    """
+    content_hash: Optional[str] = file_rec.content_hash
+    legacy_path = None if content_hash else Path.cwd() / file_rec.file_path
+
+    # vínculos com resumos (o FK tem ON DELETE CASCADE; apagar explicitamente
+    # cobre bancos sem FKs ativas, como o SQLite)
+    db.query(SummaryFile).filter(SummaryFile.file_id == file_rec.id).delete(synchronize_session=False)
+    db.query(DocumentPage).filter(DocumentPage.file_id == file_rec.id).delete(synchronize_session=False)
+    # os vetores dos trechos ficam no arquivo do usuário até a compactação
+    db.query(DocumentChunk).filter(DocumentChunk.file_id == file_rec.id).delete(synchronize_session=False)
+    db.delete(file_rec)
+    record_file_deleted(db, file_rec.user_id, file_rec.file_size)
+    db.flush()
+
+    released = None
+    try:
+        if content_hash:
+            released = release_blob(db, content_hash)
+        db.commit()
+    except Exception:
+        db.rollback()
+        if released is not None:
+            # transação desfeita: File e Blob continuam, o conteúdo volta ao lugar
+            os.replace(released[1], released[0])
+        raise
+
+    # conteúdo apagado só depois do commit
+    if released is not None:
+        released[1].unlink(missing_ok=True)
+
+    # arquivos antigos (sem blob) pertencem a um único registro
+    if legacy_path is not None:
+        legacy_path.unlink(missing_ok=True)
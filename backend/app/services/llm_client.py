@@ -1,50 +1,405 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, List
+
+from langchain_core.runnables import Runnable
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from app.core.config import settings
+from app.services.llm_errors import LLMError
+from app.services.llm_gateway import llm_gateway
 
-class LLMError(Exception):
-    """Erros vindos do serviço de LLM."""
-    pass
+# Aproximação usada para orçar tokens sem depender do tokenizer do modelo
+CHARS_PER_TOKEN = 4
 
-def get_llm():
-    """
-    Cria instância do modelo Gemini configurada para resumos.
-    Separado em função para facilitar testes e reuso.
-    """
+# Versão dos prompts. Entra na chave do cache de resumos: ao alterar qualquer
+# prompt abaixo, incremente para não reaproveitar resumos antigos.
+PROMPT_VERSION = "1"
+
+# Máximo de rodadas extras de map quando os resumos parciais não cabem no reduce
+MAX_COLLAPSE_ROUNDS = 3
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "Você é um especialista em síntese de conhecimento e análise crítica (estilo NotebookLM). "
+        "Sua tarefa NÃO é apenas resumir, mas **conectar as ideias** presentes no texto fornecido. "
+        "Identifique os temas centrais, cruze as informações e apresente uma narrativa coesa e concisa. "
+        "Se houver múltiplos tópicos ou documentos no texto, mostre a relação entre eles (causa/efeito, contraste ou complemento). "
+        "Responda em português, de forma direta e estruturada."
+    ),
+    ("human", "{texto_para_analise}")
+])
+
+# Etapa "map": resume um trecho de um documento maior
+MAP_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "Você receberá um trecho de um documento maior. "
+        "Resuma o trecho preservando os conceitos, argumentos, dados e termos importantes, "
+        "pois o resultado será combinado com os resumos dos demais trechos. "
+        "Responda em português, de forma direta."
+    ),
+    ("human", "{texto_para_analise}")
+])
+
+# Etapa "reduce": combina os resumos parciais na síntese final
+REDUCE_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "Você é um especialista em síntese de conhecimento e análise crítica (estilo NotebookLM). "
+        "Você receberá resumos parciais de trechos consecutivos de um ou mais documentos. "
+        "Sua tarefa NÃO é apenas juntá-los, mas **conectar as ideias**: identifique os temas centrais, "
+        "cruze as informações e apresente uma narrativa coesa e concisa. "
+        "Se houver múltiplos tópicos ou documentos, mostre a relação entre eles (causa/efeito, contraste ou complemento). "
+        "Responda em português, de forma direta e estruturada."
+    ),
+    ("human", "{texto_para_analise}")
+])
+
+# Consolidação hierárquica: conecta os resumos individuais de vários documentos
+CONSOLIDATE_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "Você é um especialista em síntese de conhecimento e análise crítica (estilo NotebookLM). "
+        "Você receberá os resumos individuais de vários documentos, cada um identificado pelo nome do arquivo. "
+        "Produza um resumo consolidado que **conecte as ideias** entre os documentos: identifique os temas comuns, "
+        "mostre a relação entre eles (causa/efeito, contraste ou complemento) e apresente uma narrativa coesa e concisa. "
+        "Responda em português, de forma direta e estruturada."
+    ),
+    ("human", "{texto_para_analise}")
+])
+
+# Perguntas sobre os documentos: responde só com os trechos recuperados
+ASK_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "Você é um assistente que responde perguntas sobre os documentos do usuário (estilo NotebookLM). "
+        "Você receberá trechos numerados dos documentos, cada um com o nome do arquivo e a página, seguidos da pergunta. "
+        "Responda usando apenas as informações dos trechos e indique as fontes pelo número entre colchetes, ex.: [1]. "
+        "Se os trechos não bastarem para responder, diga isso claramente em vez de inventar. "
+        "Responda em português, de forma direta."
+    ),
+    ("human", "{texto_para_analise}")
+])
+
+
+_llm = None
+_chains: Dict[str, Runnable] = {}
+_client_lock = threading.Lock()
+
+
+def _create_llm():
     try:
-    
+
         llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
+            model=settings.GEMINI_MODEL,
             api_key=settings.GEMINI_API_KEY,
-            temperature=0.3,
+            temperature=settings.LLM_TEMPERATURE,
+            # as novas tentativas ficam com o gateway (backoff + circuit breaker);
+            # com as do cliente também, cada falha viraria várias chamadas
+            max_retries=0,
         )
         return llm
     except Exception as e:
         raise LLMError(f"Falha ao inicializar modelo Gemini: {e}")
 
-def generate_summary(text: str) -> str:
+
+def get_llm():
+    """
+    Retorna a instância do modelo Gemini configurada para resumos.
+    É criada uma única vez por processo e reaproveitada (inclusive o pool
+    de conexões HTTP do cliente) por todas as chamadas.
+    """
+    global _llm
+    if _llm is None:
+        with _client_lock:
+            if _llm is None:
+                _llm = _create_llm()
+    return _llm
+
+
+def get_chains() -> Dict[str, Runnable]:
+    """Chains prompt | modelo pré-montadas: 'summary', 'map', 'reduce', 'consolidate' e 'ask'."""
+    if not _chains:
+        llm = get_llm()
+        with _client_lock:
+            if not _chains:
+                _chains.update({
+                    "summary": SUMMARY_PROMPT | llm,
+                    "map": MAP_PROMPT | llm,
+                    "reduce": REDUCE_PROMPT | llm,
+                    "consolidate": CONSOLIDATE_PROMPT | llm,
+                    "ask": ASK_PROMPT | llm,
+                })
+    return _chains
+
+
+def init_llm_client():
+    """Cria o cliente e as chains no startup da aplicação (lifespan)."""
+    get_chains()
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa barata do número de tokens de um texto."""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """
+    Divide o texto em trechos de até `max_tokens` (estimados), cortando de
+    preferência em quebras de parágrafo/linha para não partir frases.
+    """
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    chunks = []
+    start = 0
+    length = len(text)
+
+    while start < length:
+        end = min(start + max_chars, length)
+        if end < length:
+            # procura o último parágrafo (ou linha) na segunda metade do trecho
+            cut = text.rfind("\n\n", start + max_chars // 2, end)
+            if cut == -1:
+                cut = text.rfind("\n", start + max_chars // 2, end)
+            if cut != -1:
+                end = cut + 1
+        chunk = text[start:end]
+        if chunk.strip():
+            chunks.append(chunk)
+        start = end
+
+    return chunks
+
+
+def _check_text(text: str):
     if not text or len(text.strip()) == 0:
         raise LLMError("Texto vazio recebido para sumarização.")
 
-    llm = get_llm()
+
+def _needs_map_reduce(text: str) -> bool:
+    return estimate_tokens(text) > settings.LLM_MAP_REDUCE_THRESHOLD_TOKENS
+
+
+def _chunks(text: str) -> List[str]:
+    return split_into_chunks(text, settings.LLM_CHUNK_TOKENS)
+
+
+def _needs_collapse(partials: List[str], combined: str) -> bool:
+    return len(partials) > 1 and estimate_tokens(combined) > settings.LLM_CHUNK_TOKENS
+
+
+def _batch_config() -> dict:
+    # limita quantos trechos são resumidos ao mesmo tempo
+    return {"max_concurrency": settings.LLM_MAX_CONCURRENCY}
+
+
+def generate_summary(text: str) -> str:
+    _check_text(text)
+
+    try:
+        response = get_chains()["summary"].invoke({"texto_para_analise": text})
+
+        return response.content
+    except LLMError:
+        raise
+    except Exception as e:
+        raise LLMError(f"Erro durante chamada ao LLM: {e}")
+
+
+async def _ainvoke(chain_name: str, prompt_input: str) -> str:
+    """Chamada assíncrona de uma chain, passando pelo gateway (limites e novas tentativas)."""
+    chain = get_chains()[chain_name]
+    response = await llm_gateway.call(lambda: chain.ainvoke({"texto_para_analise": prompt_input}))
+    return response.content
+
+
+async def agenerate_summary(text: str) -> str:
+    """Versão assíncrona de `generate_summary` (não ocupa thread durante a chamada)."""
+    _check_text(text)
+
+    try:
+        return await _ainvoke("summary", text)
+    except LLMError:
+        raise
+    except Exception as e:
+        raise LLMError(f"Erro durante chamada ao LLM: {e}")
+
+
+def _map_chunks(chunks: List[str]) -> List[str]:
+    responses = get_chains()["map"].batch(
+        [{"texto_para_analise": chunk} for chunk in chunks], config=_batch_config()
+    )
+    return [response.content for response in responses]
+
+
+async def _amap_chunks(chunks: List[str]) -> List[str]:
+    # no máximo LLM_MAX_CONCURRENCY trechos por resumo; o gateway limita o total
+    semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+    async def summarize_chunk(chunk: str) -> str:
+        async with semaphore:
+            return await _ainvoke("map", chunk)
+
+    if not chunks:
+        return []
+    tasks = [asyncio.ensure_future(summarize_chunk(chunk)) for chunk in chunks]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        # na primeira falha (ou se o pedido for cancelado) os demais trechos
+        # param de chamar o provedor: o resumo já está perdido
+        for task in tasks:
+            task.cancel()
+        # espera os cancelamentos para as vagas do gateway serem liberadas
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    for task in done:
+        if task.exception() is not None:
+            raise task.exception()
+    return [task.result() for task in tasks]
+
+
+def _map_phase(text: str) -> str:
+    """Resume os trechos e devolve os resumos parciais já prontos para o reduce."""
+    partials = _map_chunks(_chunks(text))
+
+    combined = "\n\n".join(partials)
+    for _ in range(MAX_COLLAPSE_ROUNDS):
+        if not _needs_collapse(partials, combined):
+            break
+        partials = _map_chunks(_chunks(combined))
+        combined = "\n\n".join(partials)
+    return combined
+
+
+async def _amap_phase(text: str) -> str:
+    partials = await _amap_chunks(_chunks(text))
+
+    combined = "\n\n".join(partials)
+    for _ in range(MAX_COLLAPSE_ROUNDS):
+        if not _needs_collapse(partials, combined):
+            break
+        partials = await _amap_chunks(_chunks(combined))
+        combined = "\n\n".join(partials)
+    return combined
 
 
-    prompt_template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            "Você é um especialista em síntese de conhecimento e análise crítica (estilo NotebookLM). "
-            "Sua tarefa NÃO é apenas resumir, mas **conectar as ideias** presentes no texto fornecido. "
-            "Identifique os temas centrais, cruze as informações e apresente uma narrativa coesa e concisa. "
-            "Se houver múltiplos tópicos ou documentos no texto, mostre a relação entre eles (causa/efeito, contraste ou complemento). "
-            "Responda em português, de forma direta e estruturada."
-        ),
-        ("human", "{texto_para_analise}")
-    ])
+def generate_summary_map_reduce(text: str) -> str:
+    """
+    Sumarização map-reduce para textos maiores que o contexto do modelo.
+
+    O texto é dividido em trechos de até `LLM_CHUNK_TOKENS`, resumidos em
+    paralelo (map, no máximo `LLM_MAX_CONCURRENCY` por vez). Os resumos
+    parciais são combinados numa chamada final (reduce); se ainda não
+    couberem num trecho, passam por novas rodadas de map (até
+    `MAX_COLLAPSE_ROUNDS`).
+    """
+    _check_text(text)
 
     try:
-        chain = prompt_template | llm
-        response = chain.invoke({"texto_para_analise": text})
-        
+        combined = _map_phase(text)
+
+        response = get_chains()["reduce"].invoke({"texto_para_analise": combined})
+
         return response.content
+    except LLMError:
+        raise
+    except Exception as e:
+        raise LLMError(f"Erro durante chamada ao LLM: {e}")
+
+
+async def agenerate_summary_map_reduce(text: str) -> str:
+    """Versão assíncrona de `generate_summary_map_reduce`."""
+    _check_text(text)
+
+    try:
+        combined = await _amap_phase(text)
+
+        return await _ainvoke("reduce", combined)
+    except LLMError:
+        raise
+    except Exception as e:
+        raise LLMError(f"Erro durante chamada ao LLM: {e}")
+
+
+def summarize_text(text: str) -> str:
+    """
+    Gera o resumo escolhendo o modo pelo tamanho do texto: uma única chamada
+    até `LLM_MAP_REDUCE_THRESHOLD_TOKENS`, map-reduce acima disso.
+    """
+    if _needs_map_reduce(text):
+        return generate_summary_map_reduce(text)
+    return generate_summary(text)
+
+
+async def asummarize_text(text: str) -> str:
+    """Versão assíncrona de `summarize_text`."""
+    if _needs_map_reduce(text):
+        return await agenerate_summary_map_reduce(text)
+    return await agenerate_summary(text)
+
+
+async def aconsolidate_summaries(text: str) -> str:
+    """Consolida resumos individuais (já rotulados por documento) numa síntese."""
+    _check_text(text)
+
+    try:
+        return await _ainvoke("consolidate", text)
+    except LLMError:
+        raise
+    except Exception as e:
+        raise LLMError(f"Erro durante chamada ao LLM: {e}")
+
+
+async def aanswer_question(text: str) -> str:
+    """Responde a pergunta a partir dos trechos (já numerados e rotulados)."""
+    _check_text(text)
+
+    try:
+        return await _ainvoke("ask", text)
+    except LLMError:
+        raise
+    except Exception as e:
+        raise LLMError(f"Erro durante chamada ao LLM: {e}")
+
+
+async def _astream_chain(chain: Runnable, prompt_input: str) -> AsyncIterator[str]:
+    async for chunk in llm_gateway.stream(lambda: chain.astream({"texto_para_analise": prompt_input})):
+        if chunk.content:
+            yield chunk.content
+
+
+async def astream_summary(text: str) -> AsyncIterator[str]:
+    """
+    Gera o resumo em pedaços, repassando os tokens conforme o modelo os
+    produz. No modo map-reduce os trechos são resumidos antes e só a
+    etapa final (reduce) é transmitida.
+    """
+    _check_text(text)
+
+    try:
+        if _needs_map_reduce(text):
+            chain, prompt_input = get_chains()["reduce"], await _amap_phase(text)
+        else:
+            chain, prompt_input = get_chains()["summary"], text
+
+        async for piece in _astream_chain(chain, prompt_input):
+            yield piece
+    except LLMError:
+        raise
+    except Exception as e:
+        raise LLMError(f"Erro durante chamada ao LLM: {e}")
+
+
+async def astream_consolidation(text: str) -> AsyncIterator[str]:
+    """Versão em streaming de `aconsolidate_summaries`."""
+    _check_text(text)
+
+    try:
+        async for piece in _astream_chain(get_chains()["consolidate"], text):
+            yield piece
+    except LLMError:
+        raise
     except Exception as e:
-        raise LLMError(f"Erro durante chamada ao LLM: {e}")
\ No newline at end of file
+        raise LLMError(f"Erro durante chamada ao LLM: {e}")
@@ -0,0 +1,15 @@
+class LLMError(Exception):
+    """Erros vindos do serviço de LLM."""
+    pass
+
+
+class LLMOverloaded(LLMError):
+    """
+    O gateway recusou a chamada sem enviá-la ao provedor: fila cheia (429)
+    ou circuit breaker aberto (503). `retry_after` vai no header Retry-After.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
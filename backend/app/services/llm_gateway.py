@@ -0,0 +1,375 @@
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from app.core.config import settings
+from app.services.llm_errors import LLMOverloaded
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Códigos do provedor que valem nova tentativa (limite de taxa e falhas do servidor)
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+RETRYABLE_MARKERS = ("RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED")
+
+# Duração inicial estimada de uma operação, antes de haver medições
+INITIAL_DURATION_SECONDS = 10.0
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Erro transitório do provedor? Percorre a cadeia de exceções, já que o
+    LangChain embrulha o erro do SDK (que traz o código HTTP em `code`).
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+            return True
+        for attr in ("code", "status_code"):
+            value = getattr(error, attr, None)
+            if isinstance(value, int) and value in RETRYABLE_STATUS:
+                return True
+        if any(marker in str(error) for marker in RETRYABLE_MARKERS):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def backoff_delay(attempt: int) -> float:
+    """Backoff exponencial com jitter total: uniforme em [0, min(teto, base * 2^n)]."""
+    ceiling = min(settings.LLM_RETRY_MAX_SECONDS, settings.LLM_RETRY_BASE_SECONDS * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Depois de `threshold` falhas transitórias seguidas o circuito abre e as
+    chamadas falham na hora (503) por `cooldown` segundos, sem martelar um
+    provedor já sobrecarregado. Passado o intervalo, uma única chamada de
+    teste decide: sucesso fecha o circuito, falha o reabre.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self._remaining() <= 0 else "open"
+
+    def _remaining(self) -> float:
+        return self.opened_at + self.cooldown - time.monotonic()
+
+    def check(self):
+        """Lança LLMOverloaded (503) se o circuito não aceita chamadas agora."""
+        if self.opened_at is None:
+            return
+        remaining = self._remaining()
+        if remaining > 0 or self._probing:
+            raise LLMOverloaded(
+                "Serviço de LLM indisponível no momento, tente novamente em instantes",
+                status_code=503,
+                retry_after=max(1, math.ceil(remaining)),
+            )
+
+    def before_call(self) -> bool:
+        """Valida o circuito e retorna True se esta for a chamada de teste."""
+        self.check()
+        if self.opened_at is not None:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.threshold:
+            if self.opened_at is None or self._probing:
+                logger.warning("Circuit breaker do LLM aberto após %s falhas", self.failures)
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self, probe: bool):
+        # chamada de teste cancelada: libera para a próxima tentar
+        if probe:
+            self._probing = False
+
+
+class LLMGateway:
+    """
+    Ponto único de acesso ao provedor de LLM.
+
+    Admissão (por operação: um resumo, uma pergunta): no máximo
+    `max_active` operações ao mesmo tempo e `per_user` por usuário. As que
+    não cabem esperam numa fila limitada, atendida em rodízio entre os
+    usuários (quem tem muitos pedidos não trava os demais); com a fila cheia
+    a operação é recusada com 429 e Retry-After.
+
+    Chamadas (cada requisição ao provedor, várias por operação no
+    map-reduce): no máximo `LLM_GATEWAY_MAX_PROVIDER_CALLS` simultâneas,
+    com novas tentativas em erros transitórios e circuit breaker.
+
+    Vive no event loop: não é thread-safe e não deve ser usado em threads.
+    """
+
+    def __init__(self, max_active: int, per_user: int, queue_size: int, queue_timeout: float):
+        self.max_active = max_active
+        self.per_user = per_user
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.breaker = CircuitBreaker(
+            settings.LLM_BREAKER_FAILURE_THRESHOLD, settings.LLM_BREAKER_COOLDOWN_SECONDS
+        )
+        self._active_total = 0
+        self._active: Dict[int, int] = defaultdict(int)
+        # fila de cada usuário; a ordem do dict é o rodízio
+        self._waiting: "OrderedDict[int, Deque[asyncio.Future]]" = OrderedDict()
+        self._queued = 0
+        self._avg_duration = INITIAL_DURATION_SECONDS
+        self._provider_slots: Optional[asyncio.Semaphore] = None
+        self._provider_loop = None
+        self.stats: Dict[str, int] = defaultdict(int)
+
+    # --- admissão -----------------------------------------------------
+
+    def _can_run(self, user_id: int) -> bool:
+        return self._active_total < self.max_active and self._active.get(user_id, 0) < self.per_user
+
+    def _retry_after(self) -> int:
+        # tempo para a fila andar, pela duração média das operações
+        wait = self._avg_duration * (self._queued + 1) / max(1, self.max_active)
+        return max(1, min(math.ceil(wait), math.ceil(self.queue_timeout)))
+
+    def _overloaded(self) -> LLMOverloaded:
+        self.stats["rejected"] += 1
+        return LLMOverloaded(
+            "Muitas solicitações ao LLM no momento, tente novamente em instantes",
+            status_code=429,
+            retry_after=self._retry_after(),
+        )
+
+    def check_capacity(self, user_id: int):
+        """
+        Verificação sem esperar, para rotas que precisam responder 429/503
+        antes de começar a resposta (streaming).
+        """
+        self.breaker.check()
+        if not (self._can_run(user_id) and user_id not in self._waiting) and self._queued >= self.queue_size:
+            raise self._overloaded()
+
+    def _grant(self, user_id: int):
+        self._active_total += 1
+        self._active[user_id] += 1
+
+    def _dispatch(self):
+        """Entrega as vagas livres aos próximos da fila, em rodízio entre usuários."""
+        progressed = True
+        while progressed and self._active_total < self.max_active:
+            progressed = False
+            for user_id in list(self._waiting):
+                if self._active_total >= self.max_active:
+                    break
+                if self._active.get(user_id, 0) >= self.per_user:
+                    continue
+                queue = self._waiting[user_id]
+                future = queue.popleft()
+                if queue:
+                    self._waiting.move_to_end(user_id)
+                else:
+                    del self._waiting[user_id]
+                self._queued -= 1
+                progressed = True
+                if not future.done():
+                    self._grant(user_id)
+                    future.set_result(None)
+
+    def _release(self, user_id: int, duration: float):
+        self._active_total -= 1
+        self._active[user_id] -= 1
+        if not self._active[user_id]:
+            del self._active[user_id]
+        # média móvel exponencial, usada no Retry-After
+        self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+        self._dispatch()
+
+    def _forget(self, user_id: int, future: asyncio.Future):
+        queue = self._waiting.get(user_id)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            self._queued -= 1
+            if not queue:
+                del self._waiting[user_id]
+
+    async def _acquire(self, user_id: int, bounded: bool):
+        self.breaker.check()
+        # só passa na frente se ninguém do mesmo usuário espera; vaga global
+        # livre com fila implica que os da fila estão no limite por usuário
+        if self._can_run(user_id) and user_id not in self._waiting:
+            self._grant(user_id)
+            return
+        if bounded and self._queued >= self.queue_size:
+            raise self._overloaded()
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user_id, deque()).append(future)
+        self._queued += 1
+        self.stats["queued"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout if bounded else None)
+        except asyncio.TimeoutError:
+            self._forget(user_id, future)
+            if future.done():
+                return
+            future.cancel()
+            raise self._overloaded()
+        except BaseException:
+            self._forget(user_id, future)
+            if future.done() and not future.cancelled():
+                # a vaga chegou junto com o cancelamento: devolve
+                self._release(user_id, self._avg_duration)
+            future.cancel()
+            raise
+
+    @asynccontextmanager
+    async def admit(self, user_id: int, bounded: bool = True):
+        """
+        Reserva uma vaga de operação para o usuário. `bounded=False` espera
+        o tempo que for sem limite de fila (workers de jobs, que já são
+        limitados pela quantidade de workers).
+        """
+        await self._acquire(user_id, bounded)
+        self.stats["admitted"] += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(user_id, time.monotonic() - started)
+
+    def bind(
+        self, fn: Callable[[str], Awaitable[str]], user_id: int, bounded: bool = True
+    ) -> Callable[[str], Awaitable[str]]:
+        """`fn(text)` executada dentro de uma vaga do usuário (para o cache de resumos)."""
+        async def admitted(text: str) -> str:
+            async with self.admit(user_id, bounded):
+                return await fn(text)
+        return admitted
+
+    def bind_stream(
+        self, fn: Callable[[str], AsyncIterator[str]], user_id: int
+    ) -> Callable[[str], AsyncIterator[str]]:
+        """Versão de `bind` para streaming: a vaga dura até o fim do stream."""
+        async def admitted(text: str) -> AsyncIterator[str]:
+            async with self.admit(user_id):
+                async for piece in fn(text):
+                    yield piece
+        return admitted
+
+    # --- chamadas ao provedor ------------------------------------------
+
+    def _slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._provider_loop is not loop:
+            self._provider_slots = asyncio.Semaphore(settings.LLM_GATEWAY_MAX_PROVIDER_CALLS)
+            self._provider_loop = loop
+        return self._provider_slots
+
+    async def call(self, invoke: Callable[[], Awaitable[T]]) -> T:
+        """
+        Executa uma chamada ao provedor. Erros transitórios (429/5xx,
+        timeouts) são tentados de novo com backoff exponencial e jitter até
+        `LLM_RETRY_ATTEMPTS` vezes; cada um conta para o circuit breaker.
+        """
+        attempts = max(1, settings.LLM_RETRY_ATTEMPTS)
+        for attempt in range(attempts):
+            probe = self.breaker.before_call()
+            try:
+                async with self._slots():
+                    result = await invoke()
+            except Exception as e:
+                if not is_retryable(e):
+                    # o provedor respondeu: o circuito não tem por que abrir
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                self.stats["provider_errors"] += 1
+                if attempt == attempts - 1:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.info("Erro transitório do LLM (%s), nova tentativa em %.1fs", e, delay)
+            except BaseException:
+                self.breaker.release(probe)
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """
+        Versão de `call` para streaming. Só tenta de novo se o erro vier
+        antes do primeiro pedaço; depois disso o cliente já recebeu parte
+        da resposta e o erro é repassado.
+        """
+        attempts = max(1, settings.LLM_RETRY_ATTEMPTS)
+        for attempt in range(attempts):
+            probe = self.breaker.before_call()
+            started = False
+            try:
+                async with self._slots():
+                    async for piece in open_stream():
+                        if not started:
+                            started = True
+                            self.breaker.record_success()
+                        yield piece
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                self.stats["provider_errors"] += 1
+                if started or attempt == attempts - 1:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.info("Erro transitório do LLM (%s), nova tentativa em %.1fs", e, delay)
+            except BaseException:
+                self.breaker.release(probe)
+                raise
+            else:
+                self.breaker.record_success()
+                return
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def snapshot(self) -> dict:
+        """Estado atual e contadores, para /metrics."""
+        return {
+            **self.stats,
+            "active": self._active_total,
+            "waiting": self._queued,
+            "breaker": self.breaker.state,
+        }
+
+
+llm_gateway = LLMGateway(
+    settings.LLM_GATEWAY_MAX_ACTIVE,
+    settings.LLM_GATEWAY_MAX_ACTIVE_PER_USER,
+    settings.LLM_GATEWAY_QUEUE_SIZE,
+    settings.LLM_GATEWAY_QUEUE_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,77 @@
+from typing import List, Optional, Sequence
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import SessionLocal
+from app.models.models import File
+from app.services.extraction import extraction_pool
+from app.services.llm_client import aanswer_question
+from app.services.llm_gateway import llm_gateway
+from app.services.retrieval import index_file_chunks, retrieve_chunks
+from app.services.summary import get_files_for_summary
+from app.services.summary_cache import cached_summary
+from app.utils.pdf_reader import PDFExtractionError
+from app.utils.text_cache import get_pdf_pages
+
+# Namespace do cache: a mesma pergunta sobre os mesmos trechos reaproveita a resposta
+ASK_NAMESPACE = "ask"
+
+
+def build_ask_input(question: str, chunks: List[dict]) -> str:
+    """Trechos numerados (arquivo e página) seguidos da pergunta."""
+    parts = ["Trechos:"]
+    for number, chunk in enumerate(chunks, start=1):
+        parts.append(f"\n[{number}] {chunk['file_name']} (p. {chunk['page_no']})\n{chunk['text']}")
+    parts.append(f"\n\nPergunta: {question}")
+    return "\n".join(parts)
+
+
+def ensure_files_chunked(files: Sequence[File]):
+    """
+    Garante os trechos dos arquivos escolhidos: espera a extração em
+    andamento e indexa na hora os que ainda não foram indexados.
+    """
+    for file_rec in files:
+        extraction_pool.wait(file_rec.id)
+
+    db = SessionLocal()
+    try:
+        chunked = set(db.scalars(
+            select(File.id)
+            .where(File.id.in_([f.id for f in files]), File.chunked_at.is_not(None))
+        ))
+    finally:
+        db.close()
+
+    for file_rec in files:
+        if file_rec.id in chunked:
+            continue
+        try:
+            pages = get_pdf_pages(file_rec.file_path, file_rec.content_hash)
+        except PDFExtractionError as e:
+            raise HTTPException(status_code=400, detail=f"Falha ao ler o PDF {file_rec.file_name}: {e}")
+        index_file_chunks(file_rec.id, pages)
+
+
+async def ask(
+    db: AsyncSession, user_id: int, question: str, top_k: int, file_ids: Optional[List[int]] = None
+) -> dict:
+    """
+    Responde a pergunta enviando ao LLM só os `top_k` trechos mais próximos
+    dela (de todos os arquivos do usuário ou só de `file_ids`).
+    """
+    if file_ids:
+        files = await get_files_for_summary(db, file_ids, user_id)
+        await run_in_threadpool(ensure_files_chunked, files)
+
+    chunks = await run_in_threadpool(retrieve_chunks, user_id, question, top_k, file_ids)
+    if not chunks:
+        raise HTTPException(status_code=404, detail="Nenhum trecho relevante encontrado nos documentos")
+
+    answer = await cached_summary(
+        build_ask_input(question, chunks), llm_gateway.bind(aanswer_question, user_id), ASK_NAMESPACE
+    )
+    return {"answer": answer, "sources": chunks}
@@ -0,0 +1,208 @@
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Set, Tuple
+
+from app.core.config import settings
+from app.services.llm_client import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+# Documentos com menos páginas que isso não têm cabeçalho/rodapé detectável
+MIN_PAGES_FOR_REPEATS = 3
+
+# Só linhas curtas (rótulos como "Página 3 de 10") comparam ignorando números
+PAGE_LABEL_MAX_CHARS = 40
+
+_SPACES_RE = re.compile(r"[^\S\n\f]+")
+_DIGITS_RE = re.compile(r"\d+")
+# linhas só com o número da página: "3", "- 3 -", "Página 3 de 10", "3/10"
+_PAGE_NUMBER_RE = re.compile(r"^[-–—\s]*(p[áa]g(ina)?\.?\s*)?#(\s*(de|of|/)\s*#)?[-–—\s]*$")
+# palavra quebrada no fim da linha (ou da página): "informa-\nção"
+_HYPHEN_BREAK_RE = re.compile(r"(\w+)-[ \t]*[\n\f][\s\f]*(\w+)")
+_WORD_RE = re.compile(r"\w+")
+# compostos escritos numa linha só: "segunda-feira"
+_COMPOUND_RE = re.compile(r"\w+-\w+")
+# primeiros elementos de compostos com hífen: "segunda-\nfeira" e
+# "bem-\nvindo" mantêm o hífen quando o documento não decide o caso
+HYPHENATED_PREFIXES = frozenset({
+    "segunda", "terça", "quarta", "quinta", "sexta",
+    "bem", "mal", "sem", "além", "aquém", "recém",
+    "ex", "vice", "pós", "pré", "pró", "grão", "grã",
+})
+_UNIT_SPLIT_RE = re.compile(r"\n[ \t]*\n|\f")
+
+
+@dataclass
+class CompactionReport:
+    """Tamanho do texto antes e depois da compactação, em tokens estimados."""
+
+    tokens_before: int = 0
+    tokens_after: int = 0
+    repeated_lines: int = 0
+    duplicate_paragraphs: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_before - self.tokens_after)
+
+    def add(self, other: "CompactionReport"):
+        """Soma outro relatório a este (ex.: um por arquivo na consolidação)."""
+        self.tokens_before += other.tokens_before
+        self.tokens_after += other.tokens_after
+        self.repeated_lines += other.repeated_lines
+        self.duplicate_paragraphs += other.duplicate_paragraphs
+
+
+class CompactionStats:
+    """Totais por processo, expostos em /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "requests": 0, "tokens_before": 0, "tokens_after": 0,
+            "repeated_lines": 0, "duplicate_paragraphs": 0,
+        }
+
+    def record(self, report: CompactionReport):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["tokens_before"] += report.tokens_before
+            self.stats["tokens_after"] += report.tokens_after
+            self.stats["repeated_lines"] += report.repeated_lines
+            self.stats["duplicate_paragraphs"] += report.duplicate_paragraphs
+
+
+compaction_stats = CompactionStats()
+
+
+def _line_key(line: str) -> str:
+    key = " ".join(line.split()).lower()
+    # números variam de página para página ("Página 3"), o resto do rótulo não
+    if len(key) <= PAGE_LABEL_MAX_CHARS:
+        key = _DIGITS_RE.sub("#", key)
+    return key
+
+
+def _edge_lines(lines: List[str]) -> List[int]:
+    """Índices das linhas (não vazias) na faixa de cabeçalho e rodapé da página."""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    # em páginas curtas a faixa encolhe para não alcançar o corpo do texto
+    edge = min(settings.PROMPT_COMPACTION_EDGE_LINES, max(1, len(filled) // 3))
+    return sorted(set(filled[:edge] + filled[-edge:]))
+
+
+def find_repeated_lines(pages: Sequence[str]) -> Set[str]:
+    """
+    Linhas de cabeçalho/rodapé: as que aparecem na faixa de borda de pelo
+    menos `PROMPT_COMPACTION_REPEAT_RATIO` das páginas.
+    """
+    if len(pages) < MIN_PAGES_FOR_REPEATS:
+        return set()
+    counts: Counter = Counter()
+    for page in pages:
+        lines = page.splitlines()
+        counts.update({_line_key(lines[i]) for i in _edge_lines(lines)})
+    threshold = max(2, math.ceil(settings.PROMPT_COMPACTION_REPEAT_RATIO * len(pages)))
+    return {key for key, count in counts.items() if count >= threshold}
+
+
+def strip_page_edges(pages: Sequence[str], report: CompactionReport) -> List[str]:
+    """Remove cabeçalhos/rodapés repetidos e números de página de cada página."""
+    repeated = find_repeated_lines(pages)
+    stripped = []
+    for page in pages:
+        lines = page.splitlines()
+        drop = {
+            i for i in _edge_lines(lines)
+            if _line_key(lines[i]) in repeated or _PAGE_NUMBER_RE.match(_line_key(lines[i]))
+        }
+        report.repeated_lines += len(drop)
+        stripped.append("\n".join(line for i, line in enumerate(lines) if i not in drop))
+    return stripped
+
+
+def _rejoin_hyphens(text: str) -> str:
+    """
+    Junta as palavras quebradas na mudança de linha. Na dúvida entre
+    palavra hifenizada pela diagramação ("informa-\nção") e composto
+    ("segunda-\nfeira"), vale a forma que o próprio documento usa em outro
+    lugar; se ele não usar nenhuma, mantém o hífen depois dos prefixos de
+    `HYPHENATED_PREFIXES`.
+    """
+    words = None
+    compounds = None
+
+    def rejoin(match: "re.Match") -> str:
+        nonlocal words, compounds
+        before, after = match.group(1), match.group(2)
+        # só junta letra + minúscula: "Rio-\nGrande" e "2020-\n2021" ficam como estão
+        if not (before[-1].isalpha() and after[0].islower()):
+            return match.group(0)
+        if words is None:
+            words = {w.lower() for w in _WORD_RE.findall(text)}
+            compounds = {c.lower() for c in _COMPOUND_RE.findall(text)}
+        compound = f"{before}-{after}"
+        if compound.lower() in compounds:
+            return compound
+        if before.lower() in HYPHENATED_PREFIXES and (before + after).lower() not in words:
+            return compound
+        return before + after
+
+    return _HYPHEN_BREAK_RE.sub(rejoin, text)
+
+
+def _normalize_unit(unit: str) -> str:
+    lines = (_SPACES_RE.sub(" ", line).strip() for line in unit.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _paragraph_key(unit: str) -> str:
+    return " ".join(unit.split()).lower()
+
+
+def compact_documents(documents: Sequence[Sequence[str]]) -> Tuple[str, CompactionReport]:
+    """
+    Prepara o texto de um ou mais documentos (lista de páginas de cada um)
+    para o LLM: tira cabeçalhos/rodapés repetidos e números de página, junta
+    palavras hifenizadas na quebra de linha, normaliza os espaços e remove
+    parágrafos idênticos já vistos (em qualquer dos arquivos). Cada
+    documento começa com duas quebras de linha, como em `join_files_text`.
+    """
+    report = CompactionReport()
+    before_chars = sum(sum(len(page) + 1 for page in pages) + 2 for pages in documents)
+
+    seen: Set[str] = set()
+    min_chars = settings.PROMPT_COMPACTION_MIN_PARAGRAPH_CHARS
+    parts = []
+    for pages in documents:
+        text = "\f".join(strip_page_edges(pages, report)).replace("\x00", "")
+        text = _rejoin_hyphens(text)
+
+        kept = []
+        for unit in _UNIT_SPLIT_RE.split(text):
+            unit = _normalize_unit(unit)
+            if not unit:
+                continue
+            key = _paragraph_key(unit)
+            if len(key) >= min_chars:
+                if key in seen:
+                    report.duplicate_paragraphs += 1
+                    continue
+                seen.add(key)
+            kept.append(unit)
+        parts.append("\n\n")
+        parts.append("\n\n".join(kept))
+
+    compacted = "".join(parts)
+    report.tokens_before = before_chars // CHARS_PER_TOKEN
+    report.tokens_after = len(compacted) // CHARS_PER_TOKEN
+    compaction_stats.record(report)
+    logger.debug(
+        "Compactação do prompt: %s -> %s tokens (%s linhas repetidas, %s parágrafos duplicados)",
+        report.tokens_before, report.tokens_after, report.repeated_lines, report.duplicate_paragraphs,
+    )
+    return compacted, report
@@ -0,0 +1,327 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import DocumentChunk, File
+from app.services.embeddings import Embedder, get_embedder
+
+# Um arquivo de vetores por usuário e embedder:
+# storage/vectors/<user_id>/<embedder.key>.vec
+VECTORS_ROOT = Path.cwd() / "storage" / "vectors"
+
+# Linhas multiplicadas pela consulta por vez (limita a memória do produto)
+SEARCH_BLOCK_ROWS = 65536
+
+# O arquivo é reescrito sem os vetores de trechos apagados quando eles
+# passam a ser maioria (e são pelo menos tantos)
+COMPACT_MIN_DEAD_RECORDS = 1024
+
+# Trechos cujos vetores faltam no arquivo, embutidos por vez
+EMBED_BATCH_SIZE = 256
+
+_WORD_RE = re.compile(r"\S+")
+
+_user_locks: Dict[int, threading.Lock] = {}
+_user_locks_guard = threading.Lock()
+
+
+def _user_lock(user_id: int) -> threading.Lock:
+    """
+    Serializa escrita e compactação do arquivo de vetores de cada usuário.
+    Como o pool de extração, vale para um processo: os arquivos de vetores
+    assumem um único processo escrevendo por usuário.
+    """
+    with _user_locks_guard:
+        return _user_locks.setdefault(user_id, threading.Lock())
+
+
+def chunk_pages(pages: Sequence[str], size: int, overlap: int) -> List[Tuple[int, str]]:
+    """
+    Divide o texto das páginas em trechos de `size` palavras, cada um
+    repetindo as `overlap` últimas do anterior (uma ideia cortada na borda
+    aparece inteira em um dos dois). Os trechos atravessam as páginas;
+    retorna `(pagina_da_primeira_palavra, texto)`.
+    """
+    words: List[str] = []
+    word_pages: List[int] = []
+    for page_no, page_text in enumerate(pages, start=1):
+        page_words = _WORD_RE.findall(page_text.replace("\x00", ""))
+        words.extend(page_words)
+        word_pages.extend([page_no] * len(page_words))
+
+    step = max(1, size - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append((word_pages[start], " ".join(words[start:start + size])))
+        if start + size >= len(words):
+            break
+    return chunks
+
+
+def record_dtype(dim: int) -> np.dtype:
+    # cada registro leva o id do trecho e do arquivo junto com o vetor, então
+    # o arquivo se descreve sozinho e a compactação é um único os.replace
+    return np.dtype([("chunk_id", "<i8"), ("file_id", "<i8"), ("vector", "<f4", (dim,))])
+
+
+def vector_path(user_id: int, embedder: Embedder) -> Path:
+    return VECTORS_ROOT / str(user_id) / f"{embedder.key}.vec"
+
+
+def _open_records(path: Path, dtype: np.dtype) -> np.ndarray:
+    """Registros do arquivo como memmap somente leitura (vazio se não existir)."""
+    size = path.stat().st_size if path.exists() else 0
+    count = size // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+def _append_records(path: Path, dtype: np.dtype, chunk_ids, file_ids, vectors: np.ndarray):
+    records = np.empty(len(chunk_ids), dtype=dtype)
+    records["chunk_id"] = chunk_ids
+    records["file_id"] = file_ids
+    records["vector"] = vectors
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "ab") as f:
+        # descarta um registro incompleto deixado por uma escrita interrompida
+        size = f.tell()
+        if size % dtype.itemsize:
+            f.truncate(size - size % dtype.itemsize)
+        f.write(records.tobytes())
+
+
+def _compact(path: Path, dtype: np.dtype, keep: np.ndarray):
+    records = _open_records(path, dtype)
+    tmp_path = path.with_suffix(".tmp")
+    np.ascontiguousarray(records[keep]).tofile(tmp_path)
+    del records
+    os.replace(tmp_path, path)
+
+
+def _embed_chunks(embedder: Embedder, texts: List[str]) -> np.ndarray:
+    if not texts:
+        return np.zeros((0, embedder.dim), dtype=np.float32)
+    return np.vstack([
+        embedder.embed(texts[i:i + EMBED_BATCH_SIZE])
+        for i in range(0, len(texts), EMBED_BATCH_SIZE)
+    ])
+
+
+def index_file_chunks(file_id: int, pages: Sequence[str]):
+    """
+    Regrava os trechos do arquivo e acrescenta seus vetores ao arquivo do
+    usuário. Roda na thread de extração, logo depois das páginas; se o
+    processo cair entre o commit e a escrita dos vetores, eles são gerados
+    na próxima consulta (`VectorIndexCache.get`).
+    """
+    embedder = get_embedder()
+    chunks = chunk_pages(pages, settings.RETRIEVAL_CHUNK_WORDS, settings.RETRIEVAL_CHUNK_OVERLAP_WORDS)
+    vectors = _embed_chunks(embedder, [chunk_text for _, chunk_text in chunks])
+
+    db = SessionLocal()
+    try:
+        file_rec = db.query(File).filter(File.id == file_id).first()
+        if file_rec is None:
+            return
+        user_id = file_rec.user_id
+
+        with _user_lock(user_id):
+            # os vetores dos trechos antigos viram lixo, removido na compactação
+            db.query(DocumentChunk).filter(DocumentChunk.file_id == file_id).delete(
+                synchronize_session=False
+            )
+            rows = [
+                DocumentChunk(file_id=file_id, user_id=user_id, page_no=page_no, text=chunk_text)
+                for page_no, chunk_text in chunks
+            ]
+            db.add_all(rows)
+            # marca a indexação como feita mesmo sem trechos (PDF sem texto
+            # aproveitável), para não refazê-la a cada startup ou pergunta
+            file_rec.chunked_at = datetime.utcnow()
+            db.flush()
+            chunk_ids = [row.id for row in rows]
+            db.commit()
+
+            if chunk_ids:
+                _append_records(
+                    vector_path(user_id, embedder), record_dtype(embedder.dim),
+                    chunk_ids, file_id, vectors,
+                )
+    finally:
+        db.close()
+
+
+class VectorIndex:
+    """
+    Vetores dos trechos de um usuário (memmap float32) e a consulta top-k
+    por similaridade de cosseno, vetorizada com NumPy. Registros de trechos
+    que não existem mais no banco ficam de fora pela máscara `live`.
+    """
+
+    def __init__(self, records: np.ndarray, live_ids: np.ndarray):
+        self.records = records
+        # cópias em memória: são lidas a cada consulta, o vetor não
+        self.chunk_ids = np.array(records["chunk_id"])
+        self.file_ids = np.array(records["file_id"])
+        self.live = np.isin(self.chunk_ids, live_ids)
+        if self.live.any():
+            # um trecho com vetor gravado duas vezes conta uma vez só
+            _, first = np.unique(self.chunk_ids, return_index=True)
+            unique = np.zeros(len(self.chunk_ids), dtype=bool)
+            unique[first] = True
+            self.live &= unique
+
+    def __len__(self) -> int:
+        return int(self.live.sum())
+
+    def search(
+        self, query: np.ndarray, k: int, file_ids: Optional[Sequence[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """Retorna `(id do trecho, cosseno)` dos `k` mais próximos de `query`."""
+        mask = self.live
+        if file_ids:
+            mask = mask & np.isin(self.file_ids, list(file_ids))
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0:
+            return []
+
+        scores = np.empty(len(self.records), dtype=np.float32)
+        for start in range(0, len(self.records), SEARCH_BLOCK_ROWS):
+            block = self.records["vector"][start:start + SEARCH_BLOCK_ROWS]
+            scores[start:start + len(block)] = block @ query
+        candidate_scores = scores[candidates]
+
+        k = min(k, candidates.size)
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        top = top[np.argsort(-candidate_scores[top], kind="stable")]
+        return [
+            (int(self.chunk_ids[candidates[i]]), float(candidate_scores[i]))
+            for i in top
+            if candidate_scores[i] > 0
+        ]
+
+
+class VectorIndexCache:
+    """
+    Índices vetoriais por usuário (LRU). A assinatura junta os trechos no
+    banco (quantidade, maior id) e o arquivo de vetores (inode, tamanho);
+    se algum mudar, o índice é reaberto na próxima consulta, gerando antes
+    os vetores que faltarem e compactando o arquivo se preciso.
+    """
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._indexes: "OrderedDict[int, Tuple[tuple, VectorIndex]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(db: Session, user_id: int, path: Path) -> tuple:
+        count, max_id = db.execute(
+            select(func.count(DocumentChunk.id), func.coalesce(func.max(DocumentChunk.id), 0))
+            .where(DocumentChunk.user_id == user_id)
+        ).one()
+        stat = path.stat() if path.exists() else None
+        return count, max_id, stat and stat.st_ino, stat and stat.st_size
+
+    def get(self, db: Session, user_id: int, embedder: Embedder) -> VectorIndex:
+        path = vector_path(user_id, embedder)
+        dtype = record_dtype(embedder.dim)
+
+        with _user_lock(user_id):
+            signature = self._signature(db, user_id, path)
+            with self._lock:
+                cached = self._indexes.get(user_id)
+                if cached is not None and cached[0] == signature:
+                    self._indexes.move_to_end(user_id)
+                    return cached[1]
+
+            live_ids = np.fromiter(
+                db.scalars(select(DocumentChunk.id).where(DocumentChunk.user_id == user_id)),
+                dtype=np.int64,
+            )
+            stored_ids = np.array(_open_records(path, dtype)["chunk_id"])
+
+            missing = live_ids[~np.isin(live_ids, stored_ids)]
+            if missing.size:
+                self._embed_missing(db, path, dtype, embedder, missing)
+                stored_ids = np.array(_open_records(path, dtype)["chunk_id"])
+
+            dead = ~np.isin(stored_ids, live_ids)
+            if dead.sum() >= max(COMPACT_MIN_DEAD_RECORDS, len(stored_ids) // 2):
+                _compact(path, dtype, ~dead)
+
+            index = VectorIndex(_open_records(path, dtype), live_ids)
+            signature = self._signature(db, user_id, path)
+
+        with self._lock:
+            self._indexes[user_id] = (signature, index)
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        return index
+
+    @staticmethod
+    def _embed_missing(db: Session, path: Path, dtype: np.dtype, embedder: Embedder, missing: np.ndarray):
+        # trechos sem vetor: escrita interrompida ou embedder trocado
+        for start in range(0, missing.size, EMBED_BATCH_SIZE):
+            batch = [int(chunk_id) for chunk_id in missing[start:start + EMBED_BATCH_SIZE]]
+            rows = db.execute(
+                select(DocumentChunk.id, DocumentChunk.file_id, DocumentChunk.text)
+                .where(DocumentChunk.id.in_(batch))
+                .order_by(DocumentChunk.id)
+            ).all()
+            vectors = embedder.embed([row.text or "" for row in rows])
+            _append_records(path, dtype, [row.id for row in rows], [row.file_id for row in rows], vectors)
+
+
+vector_indexes = VectorIndexCache(settings.RETRIEVAL_INDEX_CACHE_USERS)
+
+
+def retrieve_chunks(
+    user_id: int, question: str, top_k: int, file_ids: Optional[Sequence[int]] = None
+) -> List[dict]:
+    """
+    Os `top_k` trechos do usuário mais próximos da pergunta (opcionalmente
+    só dos arquivos `file_ids`), do mais para o menos similar.
+    """
+    embedder = get_embedder()
+    query = embedder.embed([question])[0]
+    if not query.any():
+        return []
+
+    db = SessionLocal()
+    try:
+        ranked = vector_indexes.get(db, user_id, embedder).search(query, top_k, file_ids)
+        if not ranked:
+            return []
+        rows = db.execute(
+            select(DocumentChunk.id, DocumentChunk.file_id, DocumentChunk.page_no, DocumentChunk.text, File.file_name)
+            .join(File, File.id == DocumentChunk.file_id)
+            .where(DocumentChunk.id.in_([chunk_id for chunk_id, _ in ranked]))
+        )
+        chunks = {row.id: row for row in rows}
+    finally:
+        db.close()
+
+    return [
+        {
+            "file_id": chunks[chunk_id].file_id,
+            "file_name": chunks[chunk_id].file_name,
+            "page_no": chunks[chunk_id].page_no,
+            "score": round(score, 4),
+            "text": chunks[chunk_id].text,
+        }
+        for chunk_id, score in ranked
+        if chunk_id in chunks
+    ]
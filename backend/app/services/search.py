@@ -0,0 +1,299 @@
+import heapq
+import html
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, async_engine
+from app.models.models import DocumentPage, File
+
+# Configuração de texto do Postgres (a mesma da coluna gerada na migração)
+TS_CONFIG = "portuguese"
+
+SNIPPET_WORDS_BEFORE = 10
+SNIPPET_WORDS_AFTER = 25
+
+# Parâmetros usuais do BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Marcadores de destaque: o trecho é escapado como HTML e só então os
+# marcadores viram <b></b>, então o texto do PDF nunca injeta marcação
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+_CONTROL_CHARS = str.maketrans("", "", "\x00\x02\x03")
+
+STOPWORDS = frozenset(
+    "a o e de da do das dos em no na nos nas um uma uns umas para por com "
+    "que se ao aos as os ou the of and to in".split()
+)
+
+
+def normalize_token(token: str) -> str:
+    """Minúsculas e sem acentos: 'Ação' e 'acao' são o mesmo termo."""
+    decomposed = unicodedata.normalize("NFKD", token.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(content: str) -> List[str]:
+    tokens = (normalize_token(t) for t in _WORD_RE.findall(content))
+    return [t for t in tokens if len(t) > 1 and t not in STOPWORDS]
+
+
+def index_file_pages(db: Session, file_rec: File, pages: Sequence[str]):
+    """
+    Grava (ou regrava) o texto das páginas do arquivo para a busca.
+    Não faz commit: vai na mesma transação que marca a extração concluída.
+    """
+    db.query(DocumentPage).filter(DocumentPage.file_id == file_rec.id).delete(
+        synchronize_session=False
+    )
+    if not pages:
+        return
+    db.execute(
+        insert(DocumentPage),
+        [
+            {
+                "file_id": file_rec.id,
+                "user_id": file_rec.user_id,
+                "page_no": page_no,
+                # o Postgres não aceita NUL; os marcadores de destaque também saem
+                "text": page_text.translate(_CONTROL_CHARS),
+            }
+            for page_no, page_text in enumerate(pages, start=1)
+        ],
+    )
+
+
+def render_snippet(marked: str) -> str:
+    """Escapa o trecho e troca os marcadores de destaque por <b></b>."""
+    return (
+        html.escape(" ".join(marked.split()))
+        .replace(HIGHLIGHT_START, "<b>")
+        .replace(HIGHLIGHT_STOP, "</b>")
+    )
+
+
+def make_snippet(page_text: str, terms: set) -> str:
+    """Trecho ao redor do primeiro termo encontrado, com os termos em <b>."""
+    words = list(_WORD_RE.finditer(page_text))
+    first = next((i for i, w in enumerate(words) if normalize_token(w.group()) in terms), None)
+    if first is None:
+        return render_snippet(page_text[:200])
+
+    start = max(0, first - SNIPPET_WORDS_BEFORE)
+    end = min(len(words), first + SNIPPET_WORDS_AFTER)
+    parts = []
+    cursor = words[start].start()
+    for w in words[start:end]:
+        parts.append(page_text[cursor:w.start()])
+        word = w.group()
+        if normalize_token(word) in terms:
+            word = f"{HIGHLIGHT_START}{word}{HIGHLIGHT_STOP}"
+        parts.append(word)
+        cursor = w.end()
+    return render_snippet("".join(parts))
+
+
+class BM25Index:
+    """
+    Índice invertido em memória com ranking BM25, usado quando o banco não
+    tem busca textual própria (SQLite). Guarda só postings e tamanhos; o
+    texto para os trechos é lido do banco para as páginas do resultado.
+    Páginas entram e saem uma a uma (`add`/`remove`), sem remontar o resto.
+    """
+
+    def __init__(self):
+        # por id da DocumentPage: tamanho em tokens e termos distintos
+        self.doc_lengths: Dict[int, int] = {}
+        self.doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.total_length = 0
+        # assinatura (quantidade de páginas, maior id) do último sincronismo
+        self.signature: Tuple[int, int] = (0, 0)
+        self.lock = threading.Lock()
+
+    def add(self, doc_id: int, tokens: List[str]):
+        self.remove(doc_id)
+        counts = Counter(tokens)
+        self.doc_lengths[doc_id] = len(tokens)
+        self.doc_terms[doc_id] = tuple(counts)
+        self.total_length += len(tokens)
+        for term, tf in counts.items():
+            self.postings[term][doc_id] = tf
+
+    def remove(self, doc_id: int):
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in self.doc_terms.pop(doc_id):
+            postings = self.postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[term]
+
+    def search(self, terms: List[str], limit: int) -> List[Tuple[int, float]]:
+        """Retorna `(id da DocumentPage, score)` dos `limit` melhores."""
+        n_docs = len(self.doc_lengths)
+        avg_length = self.total_length / n_docs if n_docs else 0.0
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = 1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / (avg_length or 1)
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+class BM25IndexCache:
+    """
+    Índices BM25 por usuário (LRU). Quando a assinatura (quantidade de
+    páginas, maior id) das páginas do usuário muda, o índice é sincronizado
+    na próxima busca: lê só os ids, tira as páginas apagadas e tokeniza
+    apenas o texto das novas, em vez de reler o acervo inteiro.
+    """
+
+    # páginas novas lidas do banco por consulta no sincronismo
+    SYNC_BATCH_SIZE = 500
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._indexes: "OrderedDict[int, BM25Index]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_index(self, user_id: int) -> BM25Index:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                index = self._indexes[user_id] = BM25Index()
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+            return index
+
+    def _sync(self, db: Session, user_id: int, index: BM25Index):
+        page_ids = set(db.scalars(select(DocumentPage.id).where(DocumentPage.user_id == user_id)))
+        for removed in set(index.doc_lengths) - page_ids:
+            index.remove(removed)
+
+        added = sorted(page_ids - set(index.doc_lengths))
+        for i in range(0, len(added), self.SYNC_BATCH_SIZE):
+            rows = db.execute(
+                select(DocumentPage.id, DocumentPage.text)
+                .where(DocumentPage.id.in_(added[i:i + self.SYNC_BATCH_SIZE]))
+            )
+            for page_id, page_text in rows:
+                index.add(page_id, tokenize(page_text or ""))
+
+    def search(self, db: Session, user_id: int, terms: List[str], limit: int) -> List[Tuple[int, float]]:
+        signature = tuple(db.execute(
+            select(func.count(DocumentPage.id), func.coalesce(func.max(DocumentPage.id), 0))
+            .where(DocumentPage.user_id == user_id)
+        ).one())
+
+        index = self._get_index(user_id)
+        with index.lock:
+            if index.signature != signature:
+                self._sync(db, user_id, index)
+                index.signature = signature
+            return index.search(terms, limit)
+
+
+bm25_indexes = BM25IndexCache(settings.SEARCH_INDEX_CACHE_USERS)
+
+
+def _bm25_search(user_id: int, query: str, limit: int) -> List[dict]:
+    terms = tokenize(query)
+    if not terms:
+        return []
+    db = SessionLocal()
+    try:
+        ranked = bm25_indexes.search(db, user_id, terms, limit)
+        if not ranked:
+            return []
+        rows = db.execute(
+            select(DocumentPage.id, DocumentPage.file_id, DocumentPage.page_no, DocumentPage.text, File.file_name)
+            .join(File, File.id == DocumentPage.file_id)
+            .where(DocumentPage.id.in_([page_id for page_id, _ in ranked]))
+        )
+        pages = {row.id: row for row in rows}
+    finally:
+        db.close()
+
+    term_set = set(terms)
+    hits = []
+    for page_id, score in ranked:
+        page = pages.get(page_id)
+        if page is None:
+            continue
+        hits.append({
+            "file_id": page.file_id,
+            "file_name": page.file_name,
+            "page_no": page.page_no,
+            "score": round(score, 4),
+            "snippet": make_snippet(page.text or "", term_set),
+        })
+    return hits
+
+
+_POSTGRES_SEARCH = text(f"""
+    WITH q AS (SELECT websearch_to_tsquery('{TS_CONFIG}', :query) AS query),
+    top AS (
+        SELECT p.file_id, p.page_no, p.text, ts_rank_cd(p.search_vector, q.query) AS score
+        FROM document_pages p, q
+        WHERE p.user_id = :user_id AND p.search_vector @@ q.query
+        ORDER BY score DESC
+        LIMIT :limit
+    )
+    SELECT top.file_id, f.file_name, top.page_no, top.score,
+           ts_headline('{TS_CONFIG}', top.text, q.query, :headline_options) AS snippet
+    FROM top JOIN files f ON f.id = top.file_id, q
+    ORDER BY top.score DESC
+""")
+
+
+async def _postgres_search(db: AsyncSession, user_id: int, query: str, limit: int) -> List[dict]:
+    params = {
+        "query": query,
+        "user_id": user_id,
+        "limit": limit,
+        "headline_options": (
+            f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=35, MinWords=15"
+        ),
+    }
+    result = await db.execute(_POSTGRES_SEARCH, params)
+    return [
+        {
+            "file_id": row.file_id,
+            "file_name": row.file_name,
+            "page_no": row.page_no,
+            "score": round(float(row.score), 4),
+            "snippet": render_snippet(row.snippet or ""),
+        }
+        for row in result
+    ]
+
+
+async def search_pages(db: AsyncSession, user_id: int, query: str, limit: int) -> List[dict]:
+    """
+    Páginas do usuário que casam com `query`, da mais relevante para a menos.
+    Postgres: tsvector + GIN. Demais bancos: BM25 em memória (no threadpool).
+    """
+    if async_engine.dialect.name == "postgresql":
+        return await _postgres_search(db, user_id, query, limit)
+    return await run_in_threadpool(_bm25_search, user_id, query, limit)
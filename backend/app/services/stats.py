@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.models import File, Summary, User, UserStats
+
+logger = logging.getLogger(__name__)
+
+
+# INSERT ... ON CONFLICT de cada banco suportado (Postgres e SQLite)
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _upsert(dialect_name: str, user_id: int, **values):
+    """
+    Um único comando: cria a linha se o usuário ainda não tem (usuários
+    criados antes da tabela e não alcançados pelo backfill) ou aplica um
+    UPDATE atômico (`coluna = coluna + delta`). Uploads e resumos
+    simultâneos do mesmo usuário não perdem incrementos nem disputam o
+    INSERT. Valores não numéricos (datas) são gravados como estão.
+    """
+    changes = {
+        name: getattr(UserStats, name) + value if isinstance(value, int) else value
+        for name, value in values.items()
+    }
+    changes["updated_at"] = datetime.utcnow()
+    fields = {k: max(v, 0) if isinstance(v, int) else v for k, v in values.items()}
+    return (
+        UPSERT_INSERTS[dialect_name](UserStats)
+        .values(user_id=user_id, **fields)
+        .on_conflict_do_update(index_elements=[UserStats.user_id], set_=changes)
+    )
+
+
+def _apply(db: Session, user_id: int, **values):
+    db.execute(_upsert(db.bind.dialect.name, user_id, **values))
+
+
+async def _aapply(db: AsyncSession, user_id: int, **values):
+    await db.execute(_upsert(db.bind.dialect.name, user_id, **values))
+
+
+def record_upload(db: Session, user_id: int, size: int, uploaded_at: datetime):
+    """Conta um upload. Não faz commit: vai na transação do upload."""
+    _apply(db, user_id, file_count=1, total_bytes=size, last_upload_at=uploaded_at)
+
+
+def record_file_deleted(db: Session, user_id: int, size: int):
+    """Desconta um arquivo apagado. Não faz commit."""
+    _apply(db, user_id, file_count=-1, total_bytes=-(size or 0))
+
+
+async def record_summary(db: AsyncSession, user_id: int, is_consolidated: int, created_at: datetime):
+    """Conta um resumo novo. Não faz commit: vai na transação do resumo."""
+    counter = "consolidated_summary_count" if is_consolidated else "single_summary_count"
+    await _aapply(db, user_id, **{counter: 1, "last_summary_at": created_at})
+
+
+async def get_user_stats(db: AsyncSession, user_id: int) -> UserStats:
+    """Leitura O(1) pela chave primária (zeros se o usuário ainda não tem linha)."""
+    stats = await db.get(UserStats, user_id)
+    if stats is None:
+        stats = UserStats(
+            user_id=user_id,
+            file_count=0,
+            total_bytes=0,
+            single_summary_count=0,
+            consolidated_summary_count=0,
+        )
+    return stats
+
+
+def recompute_user_stats(db: Session, user_id: int):
+    """
+    Recalcula os contadores de um usuário a partir das tabelas. A linha é
+    travada antes das agregações, então um upload concorrente espera e
+    incrementa depois (ou já está visível nas contagens).
+    """
+    stats = (
+        db.query(UserStats)
+        .filter(UserStats.user_id == user_id)
+        .with_for_update()
+        .first()
+    )
+    if stats is None:
+        stats = UserStats(user_id=user_id)
+        db.add(stats)
+
+    file_count, total_bytes, last_upload_at = db.execute(
+        select(func.count(File.id), func.coalesce(func.sum(File.file_size), 0), func.max(File.upload_date))
+        .where(File.user_id == user_id)
+    ).one()
+    single, consolidated, last_summary_at = db.execute(
+        select(
+            func.count(Summary.id).filter(Summary.is_consolidated == 0),
+            func.count(Summary.id).filter(Summary.is_consolidated != 0),
+            func.max(Summary.created_at),
+        )
+        .where(Summary.user_id == user_id)
+    ).one()
+
+    stats.file_count = file_count
+    stats.total_bytes = total_bytes
+    stats.last_upload_at = last_upload_at
+    stats.single_summary_count = single
+    stats.consolidated_summary_count = consolidated
+    stats.last_summary_at = last_summary_at
+    stats.updated_at = datetime.utcnow()
+    db.commit()
+
+
+def repair_all_user_stats(user_ids: Optional[List[int]] = None) -> int:
+    """Job de reparo: recalcula os contadores de todos os usuários (ou de `user_ids`)."""
+    db = SessionLocal()
+    try:
+        if user_ids is None:
+            user_ids = list(db.execute(select(User.id).order_by(User.id)).scalars())
+        for user_id in user_ids:
+            recompute_user_stats(db, user_id)
+        return len(user_ids)
+    finally:
+        db.close()
+
+
+async def run_stats_repair(interval_seconds: int):
+    """Laço do job de reparo, executado enquanto o app roda."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            repaired = await run_in_threadpool(repair_all_user_stats)
+            logger.info("Contadores de %s usuários recalculados", repaired)
+        except Exception:
+            logger.exception("Falha ao recalcular contadores de usuários")
@@ -1,28 +1,165 @@
-from sqlalchemy.orm import Session
-from app.models.models import Summary
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-def create_summary(db: Session, file_ids: str, content: str, user_id: int, is_consolidated: int):
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.models import File, Summary, SummaryFile
+from app.services.stats import record_summary
+from app.services.extraction import extract_files_parallel, iter_files_pages, join_files_text
+from app.services.llm_client import estimate_tokens
+from app.services.prompt_compaction import CompactionReport, compact_documents
+from app.utils.pagination import keyset_filter, next_cursor
+from app.utils.pdf_reader import join_pages
+
+async def create_summary(db: AsyncSession, file_ids: List[int], content: str, user_id: int, is_consolidated: int):
     summary = Summary(
-        file_ids=file_ids,
+        file_links=[
+            SummaryFile(file_id=file_id, position=position)
+            for position, file_id in enumerate(file_ids)
+        ],
         summary_text=content,
         user_id=user_id,
-        is_consolidated=is_consolidated
+        is_consolidated=is_consolidated,
+        created_at=datetime.utcnow(),
     )
     db.add(summary)
-    db.commit()
-    db.refresh(summary)
+    await record_summary(db, user_id, is_consolidated, summary.created_at)
+    await db.commit()
+    await db.refresh(summary)
     return summary
 
 
-def get_summaries_by_user(db: Session, user_id: int):
+async def get_summaries_by_user(
+    db: AsyncSession,
+    user_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    file_id: Optional[int] = None,
+) -> Tuple[List[Summary], Optional[str]]:
     """
-    Retorna todos os resumos pertencentes ao usuário.
+    Retorna uma página dos resumos do usuário (mais recentes primeiro) e o
+    cursor da próxima página, ou None se esta for a última. Sem `limit`,
+    todos os resumos. Com `file_id`, só os resumos que incluem esse arquivo.
     """
-    return db.query(Summary).filter(Summary.user_id == user_id).all()
+    query = select(Summary).where(Summary.user_id == user_id)
+    if file_id is not None:
+        query = query.join(SummaryFile).where(SummaryFile.file_id == file_id)
+    if cursor:
+        query = query.where(keyset_filter(Summary.created_at, Summary.id, cursor))
+    query = query.order_by(Summary.created_at.desc(), Summary.id.desc())
+    if limit is not None:
+        query = query.limit(limit + 1)
+    result = await db.scalars(query)
+    summaries = list(result.all())
+    return summaries, next_cursor(summaries, limit, "created_at")
 
 
-def get_summary_by_id(db: Session, summary_id: int):
+async def get_latest_file_summaries(db: AsyncSession, user_id: int, file_ids: List[int]) -> Dict[int, Summary]:
+    """
+    Retorna o resumo individual mais recente de cada arquivo, por file_id.
+    Arquivos sem resumo individual ficam de fora do dicionário.
+    """
+    result = await db.execute(
+        select(SummaryFile.file_id, Summary)
+        .join(Summary, Summary.id == SummaryFile.summary_id)
+        .where(
+            SummaryFile.file_id.in_(file_ids),
+            Summary.user_id == user_id,
+            Summary.is_consolidated == 0,
+        )
+        .order_by(Summary.created_at)
+    )
+    # ordenado por data: o mais recente sobrescreve os anteriores
+    return {file_id: summary for file_id, summary in result.all()}
+
+
+async def get_summary_by_id(db: AsyncSession, summary_id: int):
     """
     Retorna resumo pelo ID (ou None).
     """
-    return db.query(Summary).filter(Summary.id == summary_id).first()
\ No newline at end of file
+    return await db.get(Summary, summary_id)
+
+
+async def get_file_for_summary(db: AsyncSession, file_id: int, user_id: int) -> File:
+    """
+    Busca o arquivo a resumir, validando existência e pertencimento.
+    Lança HTTPException 404/403.
+    """
+    file_rec = await db.get(File, file_id)
+
+    if not file_rec:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+
+    if file_rec.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Você não pode acessar este arquivo")
+
+    if not Path(file_rec.file_path).exists():
+        raise HTTPException(status_code=404, detail="PDF não encontrado no servidor")
+
+    return file_rec
+
+
+async def get_files_for_summary(db: AsyncSession, file_ids: List[int], user_id: int) -> List[File]:
+    """
+    Busca os arquivos de um resumo consolidado, validando existência e
+    pertencimento. Lança HTTPException 400/404/403.
+    """
+    if not file_ids:
+        raise HTTPException(400, "Envie pelo menos 1 ID")
+
+    files = (await db.scalars(select(File).where(File.id.in_(file_ids)))).all()
+
+    if len(files) != len(file_ids):
+        raise HTTPException(404, "Algum arquivo não foi encontrado")
+
+    for f in files:
+        if f.user_id != user_id:
+            raise HTTPException(403, "Você não tem acesso a um dos arquivos")
+
+    return files
+
+
+def _files_pages(files: List[File]) -> List[List[str]]:
+    documents: Dict[int, List[str]] = {f.id: [] for f in files}
+    for file_id, _, page_text in iter_files_pages(files):
+        documents[file_id].append(page_text)
+    return list(documents.values())
+
+
+def _uncompacted(text: str) -> Tuple[str, CompactionReport]:
+    tokens = estimate_tokens(text)
+    return text, CompactionReport(tokens_before=tokens, tokens_after=tokens)
+
+
+def load_file_prompt(file_rec: File) -> Tuple[str, CompactionReport]:
+    """
+    Texto de um único arquivo (normalmente já extraído no upload), já
+    compactado para o LLM, e o relatório com os tokens economizados.
+    """
+    if settings.PROMPT_COMPACTION_ENABLED:
+        text, report = compact_documents(_files_pages([file_rec]))
+    else:
+        text, report = _uncompacted(
+            join_pages(page_text for _, _, page_text in iter_files_pages([file_rec]))
+        )
+    if not text or text.isspace():
+        raise HTTPException(status_code=400, detail="PDF não contém texto legível")
+    return text, report
+
+
+def load_files_prompt(files: List[File]) -> Tuple[str, CompactionReport]:
+    """
+    Texto de todos os arquivos (extraídos em paralelo), compactado em
+    conjunto: parágrafos repetidos entre os arquivos entram uma vez só.
+    """
+    extract_files_parallel(files)
+    if settings.PROMPT_COMPACTION_ENABLED:
+        full_text, report = compact_documents(_files_pages(files))
+    else:
+        full_text, report = _uncompacted(join_files_text(files))
+    if not full_text or full_text.isspace():
+        raise HTTPException(400, "Os PDFs não possuem texto legível")
+    return full_text, report
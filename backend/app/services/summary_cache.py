@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import SummaryCache as SummaryCacheModel
+from app.services.llm_client import PROMPT_VERSION
+from app.services.llm_errors import LLMError
+
+logger = logging.getLogger(__name__)
+
+EMPTY_SUMMARY_DETAIL = "O modelo não retornou nenhum texto para o resumo."
+
+
+def make_cache_key(text: str, namespace: str = "summary") -> str:
+    """
+    Chave do resumo: sha256 do texto normalizado (espaços colapsados) mais
+    versão do prompt, modelo e temperatura. Qualquer mudança em um deles
+    gera uma chave nova. `namespace` separa usos com prompts diferentes
+    (ex.: resumo de documento x consolidação de resumos).
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        f"{namespace}\0{PROMPT_VERSION}\0{settings.GEMINI_MODEL}\0{settings.LLM_TEMPERATURE}\0".encode()
+    )
+    digest.update(" ".join(text.split()).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """
+    Cache de resumos em dois níveis: LRU em memória (por processo) na frente
+    de uma tabela `summary_cache` com TTL, compartilhada entre workers.
+
+    Os contadores em `stats` medem acertos de cada nível e as falhas.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+    def record(self, counter: str):
+        with self._lock:
+            self.stats[counter] += 1
+
+    def get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+            return value
+
+    def put_memory(self, key: str, summary_text: str):
+        with self._lock:
+            self._memory[key] = summary_text
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get_db(self, key: str) -> Optional[str]:
+        db = SessionLocal()
+        try:
+            row = db.query(SummaryCacheModel).filter(SummaryCacheModel.cache_key == key).first()
+            if row is None:
+                return None
+            if row.expires_at is not None and row.expires_at <= datetime.utcnow():
+                db.delete(row)
+                db.commit()
+                return None
+            return row.summary_text
+        finally:
+            db.close()
+
+    def put_db(self, key: str, summary_text: str):
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            row = db.query(SummaryCacheModel).filter(SummaryCacheModel.cache_key == key).first()
+            if row is None:
+                row = SummaryCacheModel(cache_key=key)
+                db.add(row)
+            row.summary_text = summary_text
+            row.created_at = now
+            row.expires_at = now + self.ttl
+            db.commit()
+        except Exception:
+            # outro worker pode ter gravado a mesma chave ao mesmo tempo
+            db.rollback()
+            logger.warning("Falha ao gravar resumo no cache", exc_info=True)
+        finally:
+            db.close()
+
+    def purge_expired(self) -> int:
+        """Remove da tabela as entradas vencidas. Retorna quantas removeu."""
+        db = SessionLocal()
+        try:
+            removed = (
+                db.query(SummaryCacheModel)
+                .filter(SummaryCacheModel.expires_at <= datetime.utcnow())
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+
+summary_cache = SummaryCache(settings.SUMMARY_CACHE_MAX_ENTRIES, settings.SUMMARY_CACHE_TTL_SECONDS)
+
+# Resumos em andamento por chave: pedidos idênticos simultâneos (ex.: duplo
+# clique) aguardam a mesma chamada ao LLM em vez de repeti-la.
+_in_flight: Dict[str, "asyncio.Task[str]"] = {}
+
+
+async def _load_or_summarize(key: str, text: str, summarize: Callable[[str], Awaitable[str]]) -> str:
+    try:
+        cached = await run_in_threadpool(summary_cache.get_db, key)
+        if cached is not None:
+            summary_cache.record("db_hits")
+        else:
+            summary_cache.record("misses")
+            cached = await summarize(text)
+            # resposta vazia não vai para o cache: a próxima tentativa chama o LLM de novo
+            if not cached.strip():
+                raise LLMError(EMPTY_SUMMARY_DETAIL)
+            await run_in_threadpool(summary_cache.put_db, key, cached)
+
+        summary_cache.put_memory(key, cached)
+        return cached
+    finally:
+        _in_flight.pop(key, None)
+
+
+def _retrieve_exception(task: "asyncio.Task[str]"):
+    # evita "Task exception was never retrieved" quando ninguém mais aguardava
+    if not task.cancelled():
+        task.exception()
+
+
+async def cached_summary(
+    text: str, summarize: Callable[[str], Awaitable[str]], namespace: str = "summary"
+) -> str:
+    """
+    Retorna o resumo de `text` do cache ou, em caso de falha, gera com
+    `summarize` e grava nos dois níveis.
+
+    A geração roda numa task própria, compartilhada pelos pedidos idênticos:
+    se quem a iniciou desconectar, os demais continuam aguardando o mesmo
+    resultado (e ele é gravado no cache mesmo que ninguém mais espere).
+    """
+    key = make_cache_key(text, namespace)
+
+    cached = summary_cache.get_memory(key)
+    if cached is not None:
+        summary_cache.record("memory_hits")
+        return cached
+
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(_load_or_summarize(key, text, summarize))
+        task.add_done_callback(_retrieve_exception)
+        _in_flight[key] = task
+    return await asyncio.shield(task)
+
+
+async def cached_summary_stream(
+    text: str, stream: Callable[[str], AsyncIterator[str]], namespace: str = "summary"
+) -> AsyncIterator[str]:
+    """
+    Versão em streaming de `cached_summary`: num acerto o resumo inteiro sai
+    de uma vez; numa falha os pedaços de `stream` são repassados conforme
+    chegam e o texto completo é gravado no cache ao final. Um stream que
+    termina sem texto lança LLMError e não é gravado.
+    """
+    key = make_cache_key(text, namespace)
+
+    cached = summary_cache.get_memory(key)
+    if cached is None:
+        cached = await run_in_threadpool(summary_cache.get_db, key)
+        if cached is not None:
+            summary_cache.record("db_hits")
+            summary_cache.put_memory(key, cached)
+    else:
+        summary_cache.record("memory_hits")
+
+    if cached is not None:
+        yield cached
+        return
+
+    summary_cache.record("misses")
+    parts = []
+    async for piece in stream(text):
+        parts.append(piece)
+        yield piece
+
+    summary_text = "".join(parts)
+    if not summary_text.strip():
+        raise LLMError(EMPTY_SUMMARY_DETAIL)
+    summary_cache.put_memory(key, summary_text)
+    await run_in_threadpool(summary_cache.put_db, key, summary_text)
@@ -0,0 +1,291 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.models import File, SummaryJob
+from app.services.consolidation import hierarchical_summary
+from app.services.llm_client import asummarize_text
+from app.services.llm_gateway import llm_gateway
+from app.services.summary import (
+    create_summary,
+    get_file_for_summary,
+    get_files_for_summary,
+    load_file_prompt,
+    load_files_prompt,
+)
+from app.services.summary_cache import cached_summary
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_EXTRACTING = "extracting"
+JOB_SUMMARIZING = "summarizing"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+RUNNING_STATUSES = (JOB_EXTRACTING, JOB_SUMMARIZING)
+
+
+class JobQueueFull(Exception):
+    """A fila de jobs de resumo está cheia."""
+    pass
+
+
+async def create_job(
+    db: AsyncSession, file_ids: List[int], user_id: int, is_consolidated: int, mode: str = "raw"
+) -> SummaryJob:
+    job = SummaryJob(
+        file_ids=",".join(map(str, file_ids)),
+        user_id=user_id,
+        is_consolidated=is_consolidated,
+        mode=mode,
+        status=JOB_QUEUED,
+    )
+    db.add(job)
+    await db.commit()
+    # recarrega com o relacionamento `summary` (SummaryJobOut o serializa)
+    return await get_job_by_id(db, job.id)
+
+
+async def get_job_by_id(db: AsyncSession, job_id: int) -> Optional[SummaryJob]:
+    result = await db.scalars(
+        select(SummaryJob)
+        .where(SummaryJob.id == job_id)
+        .options(selectinload(SummaryJob.summary))
+        .execution_options(populate_existing=True)
+    )
+    return result.first()
+
+
+async def _claim_job(job_id: int) -> bool:
+    """Passa o job de 'queued' para 'extracting'; False se outro worker já pegou."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(SummaryJob)
+            .where(SummaryJob.id == job_id, SummaryJob.status == JOB_QUEUED)
+            .values(status=JOB_EXTRACTING, updated_at=datetime.utcnow())
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+
+async def _update_job(job_id: int, **fields):
+    async with AsyncSessionLocal() as db:
+        fields["updated_at"] = datetime.utcnow()
+        await db.execute(update(SummaryJob).where(SummaryJob.id == job_id).values(**fields))
+        await db.commit()
+
+
+async def mark_job_failed(job_id: int, error: str):
+    await _update_job(job_id, status=JOB_FAILED, error=error)
+
+
+def _job_file_ids(job: SummaryJob) -> List[int]:
+    return [int(i) for i in job.file_ids.split(",") if i]
+
+
+async def _load_job(job_id: int) -> Optional[Tuple[SummaryJob, List[File]]]:
+    """Carrega o job e revalida os arquivos (podem ter mudado desde o POST)."""
+    async with AsyncSessionLocal() as db:
+        job = await get_job_by_id(db, job_id)
+        if job is None:
+            return None
+        file_ids = _job_file_ids(job)
+        if job.is_consolidated:
+            files = await get_files_for_summary(db, file_ids, job.user_id)
+        else:
+            files = [await get_file_for_summary(db, file_ids[0], job.user_id)]
+        return job, files
+
+
+async def _save_job_summary(loaded_job: SummaryJob, summary_text: str):
+    async with AsyncSessionLocal() as db:
+        summary = await create_summary(
+            db=db,
+            file_ids=_job_file_ids(loaded_job),
+            content=summary_text,
+            user_id=loaded_job.user_id,
+            is_consolidated=loaded_job.is_consolidated,
+        )
+        await db.execute(
+            update(SummaryJob)
+            .where(SummaryJob.id == loaded_job.id)
+            .values(status=JOB_DONE, summary_id=summary.id, updated_at=datetime.utcnow())
+        )
+        await db.commit()
+
+
+async def _heartbeat(job_id: int, stop: asyncio.Event):
+    """Renova o lease do job enquanto ele roda (ver `_reclaim_jobs`)."""
+    while True:
+        try:
+            await asyncio.wait_for(stop.wait(), settings.SUMMARY_JOB_HEARTBEAT_SECONDS)
+            return
+        except asyncio.TimeoutError:
+            pass
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(SummaryJob)
+                    .where(SummaryJob.id == job_id, SummaryJob.status.in_(RUNNING_STATUSES))
+                    .values(updated_at=datetime.utcnow())
+                )
+                await db.commit()
+        except Exception:
+            logger.exception("Falha ao renovar o lease do job de resumo %s", job_id)
+
+
+async def run_job(job_id: int):
+    """Executa um job: extração, chamada ao LLM (com cache) e gravação do resumo."""
+    if not await _claim_job(job_id):
+        return
+
+    # parado por evento, não por cancel: uma renovação em curso termina antes
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(job_id, stop))
+    try:
+        await _run_claimed_job(job_id)
+    finally:
+        stop.set()
+        await asyncio.gather(heartbeat, return_exceptions=True)
+
+
+async def _run_claimed_job(job_id: int):
+    try:
+        loaded = await _load_job(job_id)
+        if loaded is None:
+            return
+        job, files = loaded
+
+        if job.is_consolidated and job.mode == "hierarchical":
+            await _update_job(job_id, status=JOB_SUMMARIZING)
+            summary_text, report = await hierarchical_summary(files, job.user_id, bounded=False)
+            logger.info("Job de resumo %s: compactação economizou %s tokens", job_id, report.tokens_saved)
+        else:
+            load = load_files_prompt if job.is_consolidated else lambda fs: load_file_prompt(fs[0])
+            text, report = await run_in_threadpool(load, files)
+            logger.info("Job de resumo %s: compactação economizou %s tokens", job_id, report.tokens_saved)
+
+            await _update_job(job_id, status=JOB_SUMMARIZING)
+            # os workers já limitam quantos jobs rodam: esperam a vaga sem limite de fila
+            summary_text = await cached_summary(
+                text, llm_gateway.bind(asummarize_text, job.user_id, bounded=False)
+            )
+
+        await _save_job_summary(job, summary_text)
+    except HTTPException as e:
+        await _update_job(job_id, status=JOB_FAILED, error=str(e.detail))
+    except Exception as e:
+        logger.exception("Job de resumo %s falhou", job_id)
+        await _update_job(job_id, status=JOB_FAILED, error=str(e))
+
+
+class SummaryJobRunner:
+    """
+    Pool limitado de workers (tarefas asyncio) que executa os jobs de resumo.
+
+    O estado fica na tabela `summary_jobs`; a fila em memória guarda só os
+    ids. No startup, jobs na fila e jobs abandonados (lease vencido) são
+    devolvidos para a fila, então um reinício do servidor não perde pedidos
+    nem repete os que outro processo ainda está executando.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._recover()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, job_id: int):
+        """Coloca o job na fila. Lança JobQueueFull se não houver espaço."""
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise JobQueueFull()
+
+    def is_full(self) -> bool:
+        return self._queue is None or self._queue.full()
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await run_job(job_id)
+            except Exception:
+                logger.exception("Erro inesperado no worker de resumo")
+            finally:
+                self._queue.task_done()
+
+    async def _recover(self):
+        # no startup retoma todos os 'queued'; depois, periodicamente, só os
+        # jobs abandonados (lease vencido), ex.: de um worker que morreu
+        queued_before = None
+        while True:
+            try:
+                job_ids = await _reclaim_jobs(queued_before)
+            except Exception:
+                logger.exception("Falha ao retomar jobs de resumo")
+                job_ids = []
+            for job_id in job_ids:
+                # put bloqueante: aguarda espaço em vez de descartar jobs antigos
+                await self._queue.put(job_id)
+            await asyncio.sleep(settings.SUMMARY_JOB_LEASE_SECONDS)
+            queued_before = datetime.utcnow() - timedelta(seconds=settings.SUMMARY_JOB_LEASE_SECONDS)
+
+
+async def _reclaim_jobs(queued_before: Optional[datetime] = None) -> List[int]:
+    """
+    Devolve para 'queued' os jobs em execução cujo lease venceu e retorna os
+    ids a enfileirar: esses mais os 'queued' (todos, ou só os parados desde
+    antes de `queued_before`). Jobs que outro processo está rodando renovam
+    o lease e ficam de fora; um mesmo 'queued' enfileirado por dois
+    processos roda uma vez só (`_claim_job`).
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.SUMMARY_JOB_LEASE_SECONDS)
+    async with AsyncSessionLocal() as db:
+        stale = list((await db.scalars(
+            select(SummaryJob.id)
+            .where(SummaryJob.status.in_(RUNNING_STATUSES), SummaryJob.updated_at < cutoff)
+        )).all())
+        if stale:
+            # condição repetida no UPDATE: um heartbeat entre o SELECT e aqui vence
+            await db.execute(
+                update(SummaryJob)
+                .where(
+                    SummaryJob.id.in_(stale),
+                    SummaryJob.status.in_(RUNNING_STATUSES),
+                    SummaryJob.updated_at < cutoff,
+                )
+                .values(status=JOB_QUEUED, updated_at=datetime.utcnow())
+            )
+            await db.commit()
+
+        query = select(SummaryJob.id).where(SummaryJob.status == JOB_QUEUED)
+        if queued_before is not None:
+            query = query.where(
+                (SummaryJob.updated_at < queued_before) | SummaryJob.id.in_(stale)
+            )
+        return list((await db.scalars(query.order_by(SummaryJob.id))).all())
+
+
+summary_job_runner = SummaryJobRunner(settings.SUMMARY_JOB_WORKERS, settings.SUMMARY_JOB_QUEUE_SIZE)
@@ -0,0 +1,252 @@
+import asyncio
+import fcntl
+import logging
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Iterator, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import File, UploadSession
+from app.services.file_service import BLOB_ROOT, register_upload
+from app.utils.files import PDF_MAGIC, allowed_file, file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Bytes recebidos de cada sessão, no mesmo disco dos blobs (o finalize só move)
+UPLOADS_ROOT = BLOB_ROOT / "uploads"
+
+WRITE_BLOCK_SIZE = 1024 * 1024  # 1MB
+
+
+def part_path(upload_id: str) -> Path:
+    return UPLOADS_ROOT / f"{upload_id}.part"
+
+
+def _expiry() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+
+
+def create_upload_session(db: Session, user_id: int, file_name: str, size: int) -> UploadSession:
+    """
+    Abre uma sessão de upload retomável para um arquivo de `size` bytes.
+    Lança HTTPException 400/413 se o nome ou o tamanho forem inválidos.
+    """
+    if not allowed_file(file_name or "file"):
+        raise HTTPException(status_code=400, detail="Formato de arquivo não permitido. Apenas .pdf")
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="Tamanho do arquivo inválido")
+    if size > settings.RESUMABLE_UPLOAD_MAX_SIZE:
+        raise HTTPException(status_code=413, detail="Arquivo excede o tamanho máximo permitido")
+
+    session = UploadSession(
+        id=uuid.uuid4().hex,
+        file_name=file_name,
+        total_size=size,
+        offset=0,
+        expires_at=_expiry(),
+        user_id=user_id,
+    )
+    UPLOADS_ROOT.mkdir(parents=True, exist_ok=True)
+    part_path(session.id).touch()
+
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    return session
+
+
+def get_upload_session(db: Session, upload_id: str, user_id: int) -> UploadSession:
+    """Busca a sessão e valida dono e validade (404/403)."""
+    session = db.query(UploadSession).filter(UploadSession.id == upload_id).first()
+    if not session or session.expires_at <= datetime.utcnow():
+        raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+    if session.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Não autorizado a acessar esta sessão de upload")
+    return session
+
+
+def _current_offset(upload_id: str) -> Optional[int]:
+    db = SessionLocal()
+    try:
+        return (
+            db.query(UploadSession.offset)
+            .filter(UploadSession.id == upload_id)
+            .scalar()
+        )
+    finally:
+        db.close()
+
+
+def _advance_offset(upload_id: str, start: int, new_offset: int) -> bool:
+    """Grava o novo offset só se ninguém o alterou desde o início do PATCH."""
+    db = SessionLocal()
+    try:
+        updated = (
+            db.query(UploadSession)
+            .filter(UploadSession.id == upload_id, UploadSession.offset == start)
+            .update(
+                {"offset": new_offset, "expires_at": _expiry()},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return updated == 1
+    finally:
+        db.close()
+
+
+@contextmanager
+def _exclusive_part(upload_id: str) -> Iterator[BinaryIO]:
+    """
+    Abre o arquivo parcial com lock exclusivo (flock, vale entre processos).
+    Um segundo PATCH simultâneo na mesma sessão recebe 409 na hora, antes
+    de gravar qualquer byte.
+    """
+    try:
+        f = open(part_path(upload_id), "r+b")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+    try:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise HTTPException(status_code=409, detail="Outro envio para esta sessão de upload está em andamento")
+        yield f
+    finally:
+        # fechar o arquivo libera o lock
+        f.close()
+
+
+def _write_at(f: BinaryIO, position: int, data: bytes):
+    f.seek(position)
+    f.write(data)
+    f.flush()
+
+
+async def append_chunk(session: UploadSession, start: int, chunks: AsyncIterator[bytes]) -> int:
+    """
+    Grava o corpo de um PATCH a partir de `start` (que deve ser o offset
+    atual da sessão) e retorna o novo offset. Se a conexão cair no meio, os
+    bytes já gravados continuam valendo: a retomada envia só o que falta.
+    """
+    with _exclusive_part(session.id) as f:
+        # offset relido com o lock: outro PATCH pode tê-lo avançado
+        if start != await run_in_threadpool(_current_offset, session.id):
+            raise HTTPException(status_code=409, detail="Upload-Offset não confere com o offset atual")
+
+        position = start
+        pending = bytearray()
+        failure = None
+        try:
+            async for chunk in chunks:
+                if position + len(pending) + len(chunk) > session.total_size:
+                    raise HTTPException(status_code=413, detail="Dados excedem o tamanho declarado do arquivo")
+                pending.extend(chunk)
+                if len(pending) >= WRITE_BLOCK_SIZE:
+                    data, pending = bytes(pending), bytearray()
+                    await run_in_threadpool(_write_at, f, position, data)
+                    position += len(data)
+        except Exception as e:
+            # 413 ou conexão interrompida: o que chegou até aqui continua valendo
+            failure = e
+        if pending:
+            await run_in_threadpool(_write_at, f, position, bytes(pending))
+            position += len(pending)
+
+        advanced = position == start or await run_in_threadpool(
+            _advance_offset, session.id, start, position
+        )
+
+    if failure is not None:
+        raise failure
+    if not advanced:
+        raise HTTPException(status_code=409, detail="Upload-Offset não confere com o offset atual")
+    return position
+
+
+def _claim_session(db: Session, session: UploadSession) -> bool:
+    """Remove a sessão do banco; False se outro finalize chegou antes."""
+    deleted = (
+        db.query(UploadSession)
+        .filter(UploadSession.id == session.id)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted == 1
+
+
+def finalize_upload(db: Session, session: UploadSession) -> File:
+    """
+    Conclui o upload: confere tamanho e assinatura, calcula o hash e cria o
+    `File` pelo mesmo fluxo do upload comum (blob deduplicado por conteúdo).
+    """
+    if session.offset != session.total_size:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incompleto: {session.offset} de {session.total_size} bytes recebidos",
+        )
+
+    path = part_path(session.id)
+    with open(path, "rb") as f:
+        if f.read(len(PDF_MAGIC)) != PDF_MAGIC:
+            raise HTTPException(status_code=400, detail="O conteúdo enviado não é um PDF válido")
+
+    user_id, file_name, size = session.user_id, session.file_name, session.total_size
+    if not _claim_session(db, session):
+        raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+
+    try:
+        content_hash = file_sha256(path)
+        return register_upload(
+            db,
+            user_id=user_id,
+            file_name=file_name,
+            tmp_path=path,
+            size=size,
+            content_hash=content_hash,
+        )
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+
+
+def abort_upload(db: Session, session: UploadSession):
+    if _claim_session(db, session):
+        part_path(session.id).unlink(missing_ok=True)
+
+
+def purge_expired_upload_sessions() -> int:
+    """Apaga sessões abandonadas e seus bytes parciais. Retorna quantas removeu."""
+    db = SessionLocal()
+    try:
+        expired = (
+            db.query(UploadSession)
+            .filter(UploadSession.expires_at <= datetime.utcnow())
+            .all()
+        )
+        for session in expired:
+            part_path(session.id).unlink(missing_ok=True)
+            db.delete(session)
+        db.commit()
+        return len(expired)
+    finally:
+        db.close()
+
+
+async def run_upload_gc(interval_seconds: int):
+    """Laço de coleta das sessões expiradas, executado enquanto o app roda."""
+    while True:
+        try:
+            removed = await run_in_threadpool(purge_expired_upload_sessions)
+            if removed:
+                logger.info("%s sessões de upload expiradas removidas", removed)
+        except Exception:
+            logger.exception("Falha ao remover sessões de upload expiradas")
+        await asyncio.sleep(interval_seconds)
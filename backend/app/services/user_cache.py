@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.models.models import User
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """
+    Dados do usuário autenticado que as rotas usam. É uma cópia (não um
+    objeto ORM), então pode ser compartilhada entre requisições; rotas que
+    alteram o usuário carregam o registro do banco.
+    """
+    id: int
+    username: Optional[str] = None
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(id=user.id, username=user.username, email=user.email, full_name=user.full_name)
+
+
+class UserCache:
+    """
+    LRU em memória (por processo) de `CurrentUser` por id, com TTL curto.
+    Cada entrada vale no máximo até a expiração do token que a criou.
+    Outros processos só enxergam uma alteração quando a entrada vence.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[CurrentUser, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[CurrentUser]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def put(self, user: CurrentUser, token_exp: Optional[float] = None):
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._entries[user.id] = (user, expires_at)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+user_cache = UserCache(settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
@@ -1,7 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.models import User
+from app.services.user_cache import user_cache
 
-def update_user_profile(db: Session, user: User, full_name: str | None, description: str | None, image_path: str | None):
+async def update_user_profile(db: AsyncSession, user: User, full_name: str | None, description: str | None, image_path: str | None):
     if full_name is not None:
         user.full_name = full_name
 
@@ -12,6 +13,7 @@ def update_user_profile(db: Session, user: User, full_name: str | None, descript
         user.profile_image = image_path
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    user_cache.invalidate(user.id)
     return user
\ No newline at end of file
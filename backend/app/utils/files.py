@@ -1,42 +1,77 @@
 import os
+import hashlib
 from pathlib import Path
 import uuid
-from typing import Tuple, IO
+from typing import AsyncIterator, Tuple, IO
+
+from starlette.concurrency import run_in_threadpool
 
 ALLOWED_EXTENSIONS = {".pdf"}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB
-
-def _secure_filename(filename: str) -> str:
-    # remove caminhos e substitui caracteres problemáticos
-    name = Path(filename).name
-    # keep alnum, dash, underscore and dot; otherwise replace with underscore
-    safe = "".join(c if c.isalnum() or c in "-_.()" else "_" for c in name)
-    return safe
+PDF_MAGIC = b"%PDF"
 
 def allowed_file(filename: str) -> bool:
     return Path(filename).suffix.lower() in ALLOWED_EXTENSIONS
 
-def save_upload_file(upload_file, dest_folder: Path, max_size: int = MAX_FILE_SIZE) -> Tuple[Path, int]:
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo lendo em chunks.
+    Usado como chave de conteúdo (ex.: cache de texto extraído).
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def blob_path(blob_root: Path, content_hash: str) -> Path:
     """
-    Salva UploadFile (Starlette/FastAPI) em dest_folder de forma segura em chunks.
-    Retorna (path_salvo, tamanho_em_bytes).
+    Caminho do blob no armazenamento endereçado por conteúdo, particionado
+    em dois níveis para não acumular milhares de arquivos num só diretório:
+    <blob_root>/ab/cd/abcd....pdf
+    """
+    return blob_root / content_hash[:2] / content_hash[2:4] / f"{content_hash}.pdf"
+
+def store_blob(tmp_path: Path, blob_root: Path, content_hash: str) -> Path:
+    """
+    Move o arquivo temporário para o caminho do blob. Se o blob já existir
+    (mesmo conteúdo enviado antes), descarta o temporário.
+    Retorna o caminho final.
+    """
+    dest_path = blob_path(blob_root, content_hash)
+    if dest_path.exists():
+        tmp_path.unlink(missing_ok=True)
+        return dest_path
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+def save_upload_file(upload_file, blob_root: Path, max_size: int = MAX_FILE_SIZE) -> Tuple[Path, int, str]:
+    """
+    Salva UploadFile (Starlette/FastAPI) num arquivo temporário dentro de
+    blob_root, em chunks, calculando o SHA-256 durante a própria cópia.
+    Retorna (path_temporario, tamanho_em_bytes, sha256); use `store_blob`
+    para movê-lo ao caminho definitivo.
     Lança ValueError se extensão inválida ou tamanho excede max_size.
     """
-    dest_folder.mkdir(parents=True, exist_ok=True)
     original_name = upload_file.filename or "file"
     if not allowed_file(original_name):
         raise ValueError("Formato de arquivo não permitido. Apenas .pdf")
 
-    safe_name = _secure_filename(original_name)
-    # prefixar com uuid para evitar colisões
-    unique_name = f"{uuid.uuid4().hex}_{safe_name}"
-    dest_path = dest_folder / unique_name
+    tmp_folder = blob_root / "tmp"
+    tmp_folder.mkdir(parents=True, exist_ok=True)
+    # nome único para uploads simultâneos não colidirem
+    tmp_path = tmp_folder / f"{uuid.uuid4().hex}.part"
 
     total_written = 0
     chunk_size = 1024 * 1024  # 1MB
+    digest = hashlib.sha256()
 
     # upload_file.file is a SpooledTemporaryFile / file-like
-    with open(dest_path, "wb") as buffer:
+    with open(tmp_path, "wb") as buffer:
         # some UploadFile implementations provide .file
         file_object: IO = upload_file.file
         file_object.seek(0)
@@ -49,10 +84,11 @@ def save_upload_file(upload_file, dest_folder: Path, max_size: int = MAX_FILE_SI
                 # remove partial file e abortar
                 buffer.close()
                 try:
-                    dest_path.unlink(missing_ok=True)
+                    tmp_path.unlink(missing_ok=True)
                 except Exception:
                     pass
                 raise ValueError("Arquivo excede o tamanho máximo de 50 MB")
+            digest.update(chunk)
             buffer.write(chunk)
 
     # garantir que ponteiro volte ao início caso queira reusar UploadFile
@@ -61,4 +97,67 @@ def save_upload_file(upload_file, dest_folder: Path, max_size: int = MAX_FILE_SI
     except Exception:
         pass
 
-    return dest_path, total_written
+    return tmp_path, total_written, digest.hexdigest()
+
+
+def _write_and_hash(buffer: IO, digest, data: bytes):
+    # hashlib e write liberam o GIL para blocos grandes: rodam numa thread
+    digest.update(data)
+    buffer.write(data)
+
+async def save_upload_stream(
+    chunks: AsyncIterator[bytes],
+    filename: str,
+    blob_root: Path,
+    max_size: int = MAX_FILE_SIZE,
+) -> Tuple[Path, int, str]:
+    """
+    Versão assíncrona de `save_upload_file` para o corpo bruto da requisição:
+    grava os bytes direto no arquivo temporário do blob numa única passada,
+    validando tamanho e assinatura %PDF e calculando o SHA-256 no caminho.
+    Escrita e hash rodam no threadpool, sem bloquear o event loop.
+    Retorna (path_temporario, tamanho_em_bytes, sha256).
+    Lança ValueError se extensão/conteúdo inválido ou tamanho excede max_size.
+    """
+    if not allowed_file(filename or "file"):
+        raise ValueError("Formato de arquivo não permitido. Apenas .pdf")
+
+    tmp_folder = blob_root / "tmp"
+    tmp_folder.mkdir(parents=True, exist_ok=True)
+    tmp_path = tmp_folder / f"{uuid.uuid4().hex}.part"
+
+    total_written = 0
+    chunk_size = 1024 * 1024  # 1MB: agrupa os pedaços pequenos do ASGI
+    digest = hashlib.sha256()
+    pending = bytearray()
+    magic_checked = False
+
+    buffer = await run_in_threadpool(open, tmp_path, "wb")
+    try:
+        async for chunk in chunks:
+            total_written += len(chunk)
+            if total_written > max_size:
+                raise ValueError("Arquivo excede o tamanho máximo de 50 MB")
+            pending.extend(chunk)
+
+            if not magic_checked and len(pending) >= len(PDF_MAGIC):
+                if not pending.startswith(PDF_MAGIC):
+                    raise ValueError("O conteúdo enviado não é um PDF válido")
+                magic_checked = True
+
+            if len(pending) >= chunk_size:
+                data, pending = bytes(pending), bytearray()
+                await run_in_threadpool(_write_and_hash, buffer, digest, data)
+
+        if not magic_checked:
+            raise ValueError("O conteúdo enviado não é um PDF válido")
+        if pending:
+            await run_in_threadpool(_write_and_hash, buffer, digest, bytes(pending))
+    except BaseException:
+        # remove partial file e abortar (inclui desconexão do cliente)
+        await run_in_threadpool(buffer.close)
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    await run_in_threadpool(buffer.close)
+    return tmp_path, total_written, digest.hexdigest()
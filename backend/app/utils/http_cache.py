@@ -0,0 +1,36 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+
+def strong_etag(value: str) -> str:
+    return f'"{value}"'
+
+
+def payload_etag(body: bytes) -> str:
+    """ETag fraca a partir do corpo já serializado da resposta."""
+    return f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def _opaque(tag: str) -> str:
+    # If-None-Match usa comparação fraca: W/"x" e "x" são equivalentes
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True se o `If-None-Match` da requisição já contém a `etag`."""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
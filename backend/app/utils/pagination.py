@@ -0,0 +1,55 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# Sem `limit` as listas vêm inteiras (clientes antigos não paginam);
+# com `limit`, no máximo MAX_PAGE_SIZE itens por página
+MAX_PAGE_SIZE = 200
+
+# Listas continuam sendo um array JSON; o cursor da próxima página vai no header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Cursor opaco com a posição (data, id) do último item da página."""
+    raw = json.dumps([sort_value.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Lança HTTPException 400 se o cursor for inválido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+
+
+def keyset_filter(sort_column, id_column, cursor: str):
+    """
+    Condição para os itens depois do cursor na ordem (data DESC, id DESC).
+    Usa o índice (user_id, data DESC) em vez de OFFSET, então o custo de uma
+    página não cresce com a posição dela na lista.
+    """
+    sort_value, row_id = decode_cursor(cursor)
+    return or_(
+        sort_column < sort_value,
+        and_(sort_column == sort_value, id_column < row_id),
+    )
+
+
+def next_cursor(rows: list, limit: Optional[int], sort_attr: str) -> Optional[str]:
+    """
+    Recebe até `limit + 1` linhas: se veio a linha extra há próxima página,
+    e ela é removida de `rows`. Sem `limit` a lista é a última página.
+    """
+    if limit is None or len(rows) <= limit:
+        return None
+    del rows[limit:]
+    last = rows[-1]
+    return encode_cursor(getattr(last, sort_attr), last.id)
@@ -1,17 +1,114 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from PyPDF2 import PdfReader
 from pathlib import Path
+from typing import Iterable, List, Optional
+
+from app.core.config import settings
+
+# Versão do extrator. Entra na chave do cache de texto: ao mudar a forma de
+# extrair (biblioteca, pós-processamento), incremente para invalidar o cache.
+EXTRACTOR_VERSION = "pypdf2-1"
+
 
 class PDFExtractionError(Exception):
     """Erro personalizado para PDFs inválidos."""
     pass
 
 
-def extract_pdf_text(path: str) -> str:
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _extraction_workers() -> int:
+    return settings.PDF_EXTRACTION_PROCESSES or os.cpu_count() or 1
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # 'spawn' evita herdar locks das threads do servidor via fork
+            _process_pool = ProcessPoolExecutor(
+                max_workers=_extraction_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def shutdown_process_pool():
+    """Encerra o pool de processos de extração (chamado no shutdown da app)."""
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _open_reader(pdf_path: Path) -> PdfReader:
+    reader = PdfReader(str(pdf_path))
+
+    # Verifica se está criptografado (muitas libs não destravam)
+    if reader.is_encrypted:
+        try:
+            reader.decrypt("")  # tenta sem senha
+        except Exception:
+            raise PDFExtractionError("PDF está criptografado e não pode ser lido.")
+
+    return reader
+
+
+def _extract_range(reader: PdfReader, start: int, end: int) -> List[str]:
+    pages = []
+    for i in range(start, end):
+        try:
+            pages.append(reader.pages[i].extract_text() or "")
+        except Exception as e:
+            raise PDFExtractionError(f"Erro ao ler página {i}: {e}")
+    return pages
+
+
+def _extract_page_range(path: str, start: int, end: int) -> List[str]:
+    """Extrai as páginas [start, end) abrindo o PDF no processo worker."""
+    try:
+        return _extract_range(_open_reader(Path(path)), start, end)
+    except PDFExtractionError:
+        raise
+    except Exception as e:
+        raise PDFExtractionError(f"Erro ao abrir PDF: {e}")
+
+
+def _extract_parallel(path: str, total_pages: int) -> List[str]:
+    workers = _extraction_workers()
+    # alguns intervalos por worker para equilibrar páginas mais pesadas
+    step = max(1, -(-total_pages // (workers * 4)))
+    starts = list(range(0, total_pages, step))
+    ends = [min(start + step, total_pages) for start in starts]
+
+    pages = []
+    # map preserva a ordem dos intervalos
+    for chunk in _get_process_pool().map(
+        _extract_page_range, [path] * len(starts), starts, ends
+    ):
+        pages.extend(chunk)
+    return pages
+
+
+def extract_pdf_pages(path: str, parallel: Optional[bool] = None) -> List[str]:
     """
-    Extrai o texto de um PDF.
-    
+    Extrai o texto de cada página de um PDF.
+
+    Documentos com pelo menos `PDF_PARALLEL_MIN_PAGES` páginas são divididos
+    em intervalos extraídos em paralelo num pool de processos; os menores
+    continuam seriais, onde o custo de despachar para outro processo não
+    compensa.
+
     :param path: Caminho absoluto do PDF no servidor.
-    :return: Texto concatenado de todas as páginas.
+    :param parallel: Força (True) ou desativa (False) o modo paralelo.
+    :return: Lista com o texto de cada página, na ordem do documento.
     :raises PDFExtractionError: Se o PDF estiver corrompido ou ilegível.
     """
 
@@ -21,31 +118,56 @@ def extract_pdf_text(path: str) -> str:
         raise PDFExtractionError(f"Arquivo não encontrado: {path}")
 
     try:
-        reader = PdfReader(str(pdf_path))
-
-        # Verifica se está criptografado (muitas libs não destravam)
-        if reader.is_encrypted:
-            try:
-                reader.decrypt("")  # tenta sem senha
-            except Exception:
-                raise PDFExtractionError("PDF está criptografado e não pode ser lido.")
+        reader = _open_reader(pdf_path)
+        total_pages = len(reader.pages)
 
-        extracted_text = ""
+        if parallel is None:
+            parallel = (
+                _extraction_workers() > 1
+                and total_pages >= settings.PDF_PARALLEL_MIN_PAGES
+            )
 
-        for i, page in enumerate(reader.pages):
+        pages = None
+        if parallel:
             try:
-                page_text = page.extract_text() or ""
-                extracted_text += page_text + "\n"
-            except Exception as e:
-                raise PDFExtractionError(f"Erro ao ler página {i}: {e}")
+                pages = _extract_parallel(str(pdf_path), total_pages)
+            except BrokenProcessPool:
+                # pool quebrado (worker morto): descarta e extrai serialmente
+                shutdown_process_pool()
 
-        if extracted_text.strip() == "":
+        if pages is None:
+            pages = _extract_range(reader, 0, total_pages)
+
+        if all(page_text.strip() == "" for page_text in pages):
             raise PDFExtractionError("Nenhum texto pôde ser extraído do PDF.")
 
-        return extracted_text
+        return pages
 
     except PDFExtractionError:
         raise
 
     except Exception as e:
-        raise PDFExtractionError(f"Erro ao abrir PDF: {e}")
\ No newline at end of file
+        raise PDFExtractionError(f"Erro ao abrir PDF: {e}")
+
+
+def join_pages(pages: Iterable[str]) -> str:
+    """
+    Concatena as páginas no formato devolvido por `extract_pdf_text`,
+    montando o texto numa única passada (sem `+=` repetido).
+    """
+    parts = []
+    for page_text in pages:
+        parts.append(page_text)
+        parts.append("\n")
+    return "".join(parts)
+
+
+def extract_pdf_text(path: str) -> str:
+    """
+    Extrai o texto de um PDF.
+
+    :param path: Caminho absoluto do PDF no servidor.
+    :return: Texto concatenado de todas as páginas.
+    :raises PDFExtractionError: Se o PDF estiver corrompido ou ilegível.
+    """
+    return join_pages(extract_pdf_pages(path))
@@ -1,9 +1,89 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from app.core.config import settings
 
-pwd_context = PasswordHash.recommended() 
+# Parâmetros do Argon2 vindos da configuração. Hashes gravados com outros
+# parâmetros continuam válidos e são refeitos no próximo login.
+pwd_context = PasswordHash((
+    Argon2Hasher(
+        time_cost=settings.ARGON2_TIME_COST,
+        memory_cost=settings.ARGON2_MEMORY_COST,
+        parallelism=settings.ARGON2_PARALLELISM,
+    ),
+))
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Confere a senha e, se o hash foi gerado com parâmetros diferentes dos
+    atuais, devolve também o novo hash (senão None).
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasherBusy(Exception):
+    """A fila do executor de hash de senha está cheia."""
+    pass
+
+
+class PasswordHasherPool:
+    """
+    Executor próprio para o Argon2, separado do threadpool das rotas: o hash
+    é lento e usa muita memória de propósito, então uma rajada de logins não
+    pode ocupar as threads que servem o resto da API.
+
+    No máximo `max_workers` hashes rodam ao mesmo tempo (o argon2-cffi
+    libera o GIL, então threads bastam) e no máximo `max_queue` esperam; com
+    a fila cheia a chamada falha na hora com `PasswordHasherBusy`.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hash"
+                )
+            return self._executor
+
+    async def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _f: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self.run(verify_and_update, plain_password, hashed_password)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasherPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.files import file_sha256
+from app.utils.pdf_reader import (
+    EXTRACTOR_VERSION,
+    PDFExtractionError,
+    extract_pdf_pages,
+    join_pages,
+)
+
+
+class CorruptedCacheEntry(Exception):
+    """Entrada do cache ilegível; já foi descartada do disco."""
+    pass
+
+
+class TextCache:
+    """
+    Cache persistente do texto extraído dos PDFs, endereçado por conteúdo.
+
+    Cada entrada é um arquivo sidecar `<root>/<hash[:2]>/<hash>-<versão>.jsonl`
+    com uma página por linha (string JSON). A chave combina o SHA-256 do PDF
+    com a versão do extrator, então o mesmo arquivo enviado duas vezes
+    reaproveita a extração e uma mudança de extrator invalida tudo.
+
+    O tamanho total é limitado por `max_bytes`: ao estourar, as entradas
+    menos usadas recentemente (mtime, atualizado a cada leitura) são removidas.
+    """
+
+    # Após uma evicção, o cache fica com no máximo esta fração do limite
+    LOW_WATERMARK = 0.8
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    def _entry_path(self, content_hash: str) -> Path:
+        return self.root / content_hash[:2] / f"{content_hash}-{EXTRACTOR_VERSION}.jsonl"
+
+    def _entries(self):
+        if not self.root.exists():
+            return []
+        return [p for p in self.root.glob("*/*.jsonl") if p.is_file()]
+
+    def iter_pages(self, content_hash: str) -> Optional[Iterator[str]]:
+        """
+        Retorna um iterador que lê as páginas em cache uma a uma do disco
+        (ou None se não houver entrada), sem carregar o documento inteiro.
+        """
+        path = self._entry_path(content_hash)
+        try:
+            f = open(path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+        try:
+            os.utime(path)  # marca como usada recentemente (LRU)
+        except OSError:
+            pass
+        return self._read_pages(f, path)
+
+    @staticmethod
+    def _read_pages(f, path: Path) -> Iterator[str]:
+        with f:
+            try:
+                for line in f:
+                    yield json.loads(line)
+            except ValueError:
+                # entrada corrompida: descarta para a próxima leitura extrair de novo
+                path.unlink(missing_ok=True)
+                raise CorruptedCacheEntry(str(path))
+
+    def get(self, content_hash: str) -> Optional[List[str]]:
+        """Retorna as páginas em cache (ou None se não houver entrada)."""
+        pages = self.iter_pages(content_hash)
+        if pages is None:
+            return None
+        try:
+            return list(pages)
+        except (OSError, CorruptedCacheEntry):
+            return None
+
+    def put(self, content_hash: str, pages: List[str]) -> None:
+        """Grava as páginas de forma atômica e aplica o limite de tamanho."""
+        path = self._entry_path(content_hash)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for page_text in pages:
+                f.write(json.dumps(page_text, ensure_ascii=False))
+                f.write("\n")
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(p.stat().st_size for p in self._entries())
+            else:
+                self._total_bytes += path.stat().st_size
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Re-escaneia o disco: outros workers podem ter gravado entradas também
+        entries = []
+        for p in self._entries():
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * self.LOW_WATERMARK)
+        for _, size, p in entries:
+            if total <= target:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+
+        self._total_bytes = total
+
+
+text_cache = TextCache(Path(settings.TEXT_CACHE_DIR), settings.TEXT_CACHE_MAX_BYTES)
+
+
+def _resolve_hash(path: str, content_hash: Optional[str]) -> str:
+    if content_hash is not None:
+        return content_hash
+    try:
+        return file_sha256(Path(path))
+    except FileNotFoundError:
+        raise PDFExtractionError(f"Arquivo não encontrado: {path}")
+
+
+def get_pdf_pages(path: str, content_hash: Optional[str] = None) -> List[str]:
+    """
+    Retorna o texto de cada página do PDF, usando o cache quando possível.
+
+    :param path: Caminho do PDF no servidor.
+    :param content_hash: SHA-256 do arquivo, se já conhecido (evita reler o PDF).
+    :raises PDFExtractionError: Se o PDF não existir ou não puder ser lido.
+    """
+    content_hash = _resolve_hash(path, content_hash)
+
+    pages = text_cache.get(content_hash)
+    if pages is None:
+        pages = extract_pdf_pages(path)
+        text_cache.put(content_hash, pages)
+    return pages
+
+
+def iter_pdf_pages(path: str, content_hash: Optional[str] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Gera `(numero_da_pagina, texto)` do PDF. Com o texto em cache as páginas
+    são lidas do disco sob demanda; caso contrário o PDF é extraído e gravado
+    no cache antes de começar a gerar. Se a entrada em cache estiver
+    corrompida, o PDF é extraído de novo e a geração continua da página em
+    que parou.
+    """
+    content_hash = _resolve_hash(path, content_hash)
+
+    pages = text_cache.iter_pages(content_hash)
+    if pages is None:
+        extracted = extract_pdf_pages(path)
+        text_cache.put(content_hash, extracted)
+        pages = iter(extracted)
+
+    page_no = 0
+    try:
+        for page_text in pages:
+            page_no += 1
+            yield page_no, page_text
+    except CorruptedCacheEntry:
+        extracted = extract_pdf_pages(path)
+        text_cache.put(content_hash, extracted)
+        for page_text in extracted[page_no:]:
+            page_no += 1
+            yield page_no, page_text
+
+
+def get_pdf_text(path: str, content_hash: Optional[str] = None) -> str:
+    """Versão com cache de `extract_pdf_text`."""
+    return join_pages(page_text for _, page_text in iter_pdf_pages(path, content_hash))
@@ -0,0 +1,5 @@
+"""
+Benchmarks do backend. Scripts executados à parte (não são testes), a
+partir da pasta backend/, ex.: `python -m benchmarks.login_throughput`.
+Cada script imprime um relatório JSON para comparar execuções.
+"""
@@ -0,0 +1,50 @@
+"""
+Roda a suíte inteira (micro, carga e login), cada benchmark no seu próprio
+processo (as settings são lidas na importação), e junta os relatórios num
+único JSON.
+
+    python -m benchmarks --db sqlite --out resultados.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.harness import DATABASES, write_report
+
+# argumentos de cada benchmark na suíte: tamanhos pequenos, para rodar em minutos
+SUITE = {
+    "micro": ["--pages", "10", "100", "--repeat", "5"],
+    "load": ["--users", "4", "--files", "4", "--requests", "50", "--concurrency", "8"],
+    "login_throughput": ["--users", "10", "--logins", "100", "--concurrency", "16"],
+}
+USES_DATABASE = {"load", "login_throughput"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", choices=DATABASES, default="sqlite")
+    parser.add_argument("--only", nargs="+", choices=list(SUITE), default=list(SUITE))
+    parser.add_argument("--out", type=os.path.abspath, default=None, help="grava o relatório JSON neste arquivo")
+    args = parser.parse_args()
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as tmp:
+        for name in args.only:
+            out = os.path.join(tmp, f"{name}.json")
+            command = [sys.executable, "-m", f"benchmarks.{name}", *SUITE[name], "--out", out]
+            if name in USES_DATABASE:
+                command += ["--db", args.db]
+            print(f"» {name}", file=sys.stderr)
+            subprocess.run(command, cwd=backend_dir, check=True, stdout=subprocess.DEVNULL)
+            with open(out, encoding="utf-8") as f:
+                results[name] = json.load(f)
+
+    write_report({"benchmark": "suite", "db": args.db, "results": results}, args.out)
+
+
+if __name__ == "__main__":
+    main()
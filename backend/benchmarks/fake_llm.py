@@ -0,0 +1,116 @@
+"""
+Substituto determinístico do `ChatGoogleGenerativeAI` para os benchmarks.
+
+A resposta depende só do prompt (mesmo prompt, mesmo texto), então os
+caches se comportam como com o modelo real, e a latência é configurável:
+`latency_seconds` até o primeiro token e `token_latency_seconds` entre os
+pedaços do streaming. Nenhuma chamada sai para a rede.
+"""
+import asyncio
+import hashlib
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from benchmarks.synthetic_pdf import VOCABULARY
+
+
+class FakeGeminiChat(BaseChatModel):
+    latency_seconds: float = 0.0
+    token_latency_seconds: float = 0.0
+    response_words: int = 120
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gemini"
+
+    def _words(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        seed = int.from_bytes(hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest(), "big")
+        rng = random.Random(seed)
+        return [rng.choice(VOCABULARY) for _ in range(self.response_words)]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency_seconds)
+        text = " ".join(self._words(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency_seconds)
+        text = " ".join(self._words(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency_seconds)
+        for word in self._words(messages):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            time.sleep(self.token_latency_seconds)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency_seconds)
+        for word in self._words(messages):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            await asyncio.sleep(self.token_latency_seconds)
+
+
+def install_fake_llm(latency_seconds: float = 0.0, token_latency_seconds: float = 0.0,
+                     response_words: int = 120) -> FakeGeminiChat:
+    """
+    Troca o modelo do `llm_client` pelo falso e remonta as chains. Chamar
+    depois de `setup_environment` e antes do lifespan do app.
+    """
+    from app.services import llm_client
+
+    fake = FakeGeminiChat(
+        latency_seconds=latency_seconds,
+        token_latency_seconds=token_latency_seconds,
+        response_words=response_words,
+    )
+    with llm_client._client_lock:
+        llm_client._llm = fake
+        llm_client._chains.clear()
+    return fake
+
+
+def add_fake_llm_arguments(parser):
+    parser.add_argument("--llm-latency", type=float, default=0.2,
+                        help="segundos até a resposta do LLM falso")
+    parser.add_argument("--llm-token-latency", type=float, default=0.0,
+                        help="segundos entre os pedaços no streaming")
+    parser.add_argument("--llm-response-words", type=int, default=120)
+
+
+def fake_llm_params(args) -> dict:
+    return {
+        "latency_seconds": args.llm_latency,
+        "token_latency_seconds": args.llm_token_latency,
+        "response_words": args.llm_response_words,
+    }
@@ -0,0 +1,207 @@
+"""
+Driver de carga HTTP contra o app ASGI, com LLM falso e PDFs sintéticos.
+
+Prepara usuários e arquivos (upload + extração concluída) e então mede cada
+endpoint isoladamente: `--requests` requisições com `--concurrency` em
+voo, distribuídas entre os usuários. Para cada endpoint o relatório traz
+vazão, p50/p95/p99 e contagem por status; no fim, o /metrics do app
+(acertos do cache de resumos, compactação, gateway do LLM).
+
+    python -m benchmarks.load --users 4 --files 6 --requests 100 --concurrency 16
+    BENCH_POSTGRES_URL=postgresql://... python -m benchmarks.load --db postgres
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.fake_llm import add_fake_llm_arguments, fake_llm_params, install_fake_llm
+from benchmarks.harness import (
+    add_common_arguments,
+    asgi_client,
+    create_schema,
+    latency_summary,
+    setup_environment,
+    write_report,
+)
+from benchmarks.synthetic_pdf import VOCABULARY, synthetic_pdf
+
+PASSWORD = "senha-de-benchmark"
+EXTRACTION_TIMEOUT_SECONDS = 120
+
+ENDPOINTS = (
+    "POST /files/upload",
+    "GET /files",
+    "GET /search",
+    "POST /summary/single",
+    "POST /summary/multi",
+    "POST /notebook/ask",
+)
+
+
+class Context:
+    """Usuários autenticados e arquivos prontos, compartilhados pelos cenários."""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.users: List[dict] = []   # {"headers": ..., "file_ids": [...]}
+        self._upload_seed = itertools.count(10_000)
+
+    def pdf(self) -> bytes:
+        return synthetic_pdf(self.args.pages, self.args.words_per_page, next(self._upload_seed))
+
+
+async def _login_headers(client, index: int) -> dict:
+    name = f"load{index}"
+    response = await client.post("/auth/register", json={
+        "full_name": f"Carga {index}", "username": name,
+        "email": f"{name}@example.com", "password": PASSWORD,
+    })
+    response.raise_for_status()
+    response = await client.post("/auth/login", data={"username": name, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def _upload(client, ctx: Context, headers: dict):
+    return await client.post(
+        "/files/upload",
+        files={"upload": ("sintetico.pdf", ctx.pdf(), "application/pdf")},
+        headers=headers,
+    )
+
+
+async def _wait_extracted(client, headers: dict, file_ids: List[int]):
+    deadline = time.monotonic() + EXTRACTION_TIMEOUT_SECONDS
+    pending = set(file_ids)
+    while pending:
+        for file_id in list(pending):
+            status = (await client.get(f"/files/{file_id}", headers=headers)).json()["extraction_status"]
+            if status == "done":
+                pending.discard(file_id)
+            elif status == "failed":
+                raise RuntimeError(f"Extração do arquivo {file_id} falhou")
+        if pending:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Extração não terminou em {EXTRACTION_TIMEOUT_SECONDS}s: {sorted(pending)}")
+            await asyncio.sleep(0.05)
+
+
+async def prepare(client, ctx: Context) -> float:
+    """Cadastra os usuários e envia `--files` PDFs para cada um. Retorna a duração."""
+    started = time.perf_counter()
+    for index in range(ctx.args.users):
+        headers = await _login_headers(client, index)
+        file_ids = []
+        for _ in range(ctx.args.files):
+            response = await _upload(client, ctx, headers)
+            response.raise_for_status()
+            file_ids.append(response.json()["id"])
+        ctx.users.append({"headers": headers, "file_ids": file_ids})
+    for user in ctx.users:
+        await _wait_extracted(client, user["headers"], user["file_ids"])
+    return time.perf_counter() - started
+
+
+def _request_for(endpoint: str, client, ctx: Context, user: dict) -> Callable[[], Awaitable]:
+    headers, file_ids = user["headers"], user["file_ids"]
+    if endpoint == "POST /files/upload":
+        return lambda: _upload(client, ctx, headers)
+    if endpoint == "GET /files":
+        return lambda: client.get("/files", headers=headers)
+    if endpoint == "GET /search":
+        query = " ".join(ctx.rng.sample(VOCABULARY, 2))
+        return lambda: client.get("/search", params={"q": query}, headers=headers)
+    if endpoint == "POST /summary/single":
+        params = {"file_id": ctx.rng.choice(file_ids)}
+        return lambda: client.post("/summary/single", params=params, headers=headers)
+    if endpoint == "POST /summary/multi":
+        chosen = ctx.rng.sample(file_ids, min(len(file_ids), ctx.args.multi_files))
+        body = {"file_ids": chosen, "content": "benchmark", "mode": ctx.args.multi_mode}
+        return lambda: client.post("/summary/multi", json=body, headers=headers)
+    if endpoint == "POST /notebook/ask":
+        question = "O que diz o documento sobre " + " e ".join(ctx.rng.sample(VOCABULARY, 2)) + "?"
+        return lambda: client.post("/notebook/ask", json={"question": question}, headers=headers)
+    raise ValueError(endpoint)
+
+
+async def run_endpoint(client, ctx: Context, endpoint: str) -> Dict:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    semaphore = asyncio.Semaphore(ctx.args.concurrency)
+    # requisições montadas antes de medir, em rodízio entre os usuários
+    requests = [
+        _request_for(endpoint, client, ctx, ctx.users[i % len(ctx.users)])
+        for i in range(ctx.args.requests)
+    ]
+
+    async def one(send):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await send()
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(send) for send in requests))
+    elapsed = time.perf_counter() - started
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(requests) / elapsed, 2) if elapsed else 0.0,
+        "status_counts": {str(code): count for code, count in sorted(statuses.items())},
+        "latency": latency_summary(latencies),
+    }
+
+
+async def run(args) -> dict:
+    create_schema(args.db)
+    install_fake_llm(**fake_llm_params(args))
+    ctx = Context(args)
+    async with asgi_client() as client:
+        setup_s = await prepare(client, ctx)
+        results = {}
+        for endpoint in args.endpoints:
+            results[endpoint] = await run_endpoint(client, ctx, endpoint)
+        metrics = (await client.get("/metrics", headers={"X-Metrics-Token": os.environ["METRICS_TOKEN"]})).json()
+
+    return {
+        "benchmark": "load",
+        "params": {
+            key: getattr(args, key) for key in (
+                "db", "users", "files", "pages", "words_per_page", "requests", "concurrency",
+                "multi_files", "multi_mode", "seed",
+            )
+        } | {"fake_llm": fake_llm_params(args)},
+        "setup_s": round(setup_s, 3),
+        "endpoints": results,
+        "app_metrics": metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_common_arguments(parser)
+    add_fake_llm_arguments(parser)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--files", type=int, default=4, help="PDFs enviados por usuário na preparação")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--words-per-page", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=50, help="requisições por endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--multi-files", type=int, default=2, help="arquivos por /summary/multi")
+    parser.add_argument("--multi-mode", choices=["raw", "hierarchical"], default="raw")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS), metavar="ENDPOINT",
+                        help="ex.: 'GET /files' 'POST /summary/multi'")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    setup_environment(args.db)
+    write_report(asyncio.run(run(args)), args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Vazão de login com o Argon2 no executor próprio.
+
+Cadastra usuários, dispara logins concorrentes e, ao mesmo tempo, mede a
+latência de GET /files de um usuário já autenticado: com o hash fora do
+threadpool das rotas, a listagem não deve piorar durante a rajada.
+
+    python -m benchmarks.login_throughput --users 20 --logins 200 --concurrency 32
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.harness import (
+    add_common_arguments,
+    asgi_client,
+    create_schema,
+    latency_summary,
+    setup_environment,
+    write_report,
+)
+
+PASSWORD = "senha-de-benchmark"
+
+
+async def _register(client, index: int):
+    name = f"bench{index}"
+    response = await client.post("/auth/register", json={
+        "full_name": f"Benchmark {index}", "username": name,
+        "email": f"{name}@example.com", "password": PASSWORD,
+    })
+    response.raise_for_status()
+    return name
+
+
+async def _login(client, username: str):
+    return await client.post("/auth/login", data={"username": username, "password": PASSWORD})
+
+
+async def run(args) -> dict:
+    from app.core.config import settings
+
+    create_schema(args.db)
+    async with asgi_client() as client:
+        usernames = [await _register(client, i) for i in range(args.users)]
+        token = (await _login(client, usernames[0])).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        login_latencies, statuses = [], {}
+        listing_latencies = []
+        semaphore = asyncio.Semaphore(args.concurrency)
+        done = asyncio.Event()
+
+        async def one_login(i: int):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await _login(client, usernames[i % len(usernames)])
+                login_latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def poll_listing():
+            while not done.is_set():
+                started = time.perf_counter()
+                (await client.get("/files", headers=headers)).raise_for_status()
+                listing_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(args.listing_interval)
+
+        # linha de base da listagem, sem logins em andamento
+        baseline = []
+        for _ in range(20):
+            started = time.perf_counter()
+            (await client.get("/files", headers=headers)).raise_for_status()
+            baseline.append(time.perf_counter() - started)
+
+        poller = asyncio.create_task(poll_listing())
+        started = time.perf_counter()
+        await asyncio.gather(*(one_login(i) for i in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await poller
+
+    return {
+        "benchmark": "login_throughput",
+        "params": {
+            "db": args.db, "users": args.users, "logins": args.logins, "concurrency": args.concurrency,
+            "argon2": {
+                "time_cost": settings.ARGON2_TIME_COST,
+                "memory_cost_kib": settings.ARGON2_MEMORY_COST,
+                "parallelism": settings.ARGON2_PARALLELISM,
+            },
+            "hash_workers": settings.PASSWORD_HASH_WORKERS,
+            "hash_queue": settings.PASSWORD_HASH_QUEUE_SIZE,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(args.logins / elapsed, 2) if elapsed else 0.0,
+        "status_counts": {str(code): count for code, count in sorted(statuses.items())},
+        "login_latency": latency_summary(login_latencies),
+        "files_listing_baseline": latency_summary(baseline),
+        "files_listing_during_logins": latency_summary(listing_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_common_arguments(parser)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--listing-interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    setup_environment(args.db)
+    write_report(asyncio.run(run(args)), args.out)
+
+
+if __name__ == "__main__":
+    main()
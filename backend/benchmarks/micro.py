@@ -0,0 +1,101 @@
+"""
+Microbenchmarks de extração de texto e de hashing, sem banco nem HTTP.
+
+- extração: `extract_pdf_pages` serial e paralelo e `extract_pdf_text`,
+  em PDFs sintéticos de cada tamanho pedido;
+- hashing: SHA-256 do conteúdo dos uploads (`file_sha256`) e Argon2
+  (`hash_password` / `verify_password`) com os parâmetros configurados.
+
+    python -m benchmarks.micro --pages 10 100 --words-per-page 300 --repeat 5
+"""
+import argparse
+import os
+from pathlib import Path
+
+from benchmarks.harness import latency_summary, setup_environment, time_calls, write_report
+
+
+def bench_extraction(sizes, words_per_page: int, repeat: int) -> dict:
+    from app.utils.pdf_reader import extract_pdf_pages, extract_pdf_text
+
+    from benchmarks.synthetic_pdf import write_synthetic_pdf
+
+    results = {}
+    for pages in sizes:
+        path = str(write_synthetic_pdf(Path(f"extract-{pages}.pdf"), pages, words_per_page, seed=pages))
+        entry = {"pdf_bytes": Path(path).stat().st_size}
+        for name, fn in (
+            ("pages_serial", lambda: extract_pdf_pages(path, parallel=False)),
+            ("pages_parallel", lambda: extract_pdf_pages(path, parallel=True)),
+            ("text", lambda: extract_pdf_text(path)),
+        ):
+            samples = time_calls(fn, repeat)
+            entry[name] = {
+                **latency_summary(samples),
+                "pages_per_s": round(pages * len(samples) / sum(samples), 1),
+            }
+        results[f"{pages}_pages"] = entry
+    return results
+
+
+def bench_hashing(sizes, words_per_page: int, repeat: int) -> dict:
+    from app.core.config import settings
+    from app.utils.files import file_sha256
+    from app.utils.security import hash_password, verify_password
+
+    from benchmarks.synthetic_pdf import write_synthetic_pdf
+
+    content = {}
+    for pages in sizes:
+        path = write_synthetic_pdf(Path(f"hash-{pages}.pdf"), pages, words_per_page, seed=pages)
+        size = path.stat().st_size
+        samples = time_calls(lambda: file_sha256(path), repeat)
+        content[f"{pages}_pages"] = {
+            "bytes": size,
+            **latency_summary(samples),
+            "mb_per_s": round(size * len(samples) / sum(samples) / 1e6, 1),
+        }
+
+    stored = hash_password("senha-de-benchmark")
+    return {
+        "sha256": content,
+        "argon2": {
+            "params": {
+                "time_cost": settings.ARGON2_TIME_COST,
+                "memory_cost_kib": settings.ARGON2_MEMORY_COST,
+                "parallelism": settings.ARGON2_PARALLELISM,
+            },
+            "hash": latency_summary(time_calls(lambda: hash_password("senha-de-benchmark"), repeat)),
+            "verify": latency_summary(time_calls(lambda: verify_password("senha-de-benchmark", stored), repeat)),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--words-per-page", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", choices=["extraction", "hashing"], default=None)
+    parser.add_argument("--out", type=os.path.abspath, default=None, help="grava o relatório JSON neste arquivo")
+    args = parser.parse_args()
+
+    setup_environment()
+    from app.utils.pdf_reader import shutdown_process_pool
+
+    report = {
+        "benchmark": "micro",
+        "params": {"pages": args.pages, "words_per_page": args.words_per_page, "repeat": args.repeat},
+    }
+    try:
+        if args.only in (None, "extraction"):
+            report["extraction"] = bench_extraction(args.pages, args.words_per_page, args.repeat)
+        if args.only in (None, "hashing"):
+            report["hashing"] = bench_hashing(args.pages, args.words_per_page, args.repeat)
+    finally:
+        shutdown_process_pool()
+    write_report(report, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Gerador de PDFs sintéticos para os benchmarks.
+
+Monta o PDF à mão (fonte Helvetica padrão, um content stream por página),
+sem dependências extras. O texto é pseudoaleatório mas determinístico pela
+`seed`, com cabeçalho e rodapé repetidos em toda página, como nos PDFs
+reais que a compactação do prompt trata.
+
+    python -m benchmarks.synthetic_pdf saida.pdf --pages 50 --words-per-page 400
+"""
+import argparse
+import random
+from pathlib import Path
+from typing import List
+
+# vocabulário em ASCII: a Helvetica padrão sem /Encoding não cobre acentos
+VOCABULARY = (
+    "analise contrato relatorio pagina documento processo sistema usuario dados "
+    "resultado projeto clausula prazo valor empresa servico entrega pagamento "
+    "responsavel metodo pesquisa capitulo secao tabela figura conclusao objetivo "
+    "cliente fornecedor registro periodo anual mensal revisao versao parte acordo "
+    "norma requisito etapa custo receita despesa indicador meta plano risco"
+).split()
+
+WORDS_PER_LINE = 12
+FONT_SIZE = 10
+LEADING = 12
+
+
+def synthetic_pages(pages: int, words_per_page: int, seed: int = 0) -> List[str]:
+    """Texto de cada página (linhas separadas por '\\n'), determinístico pela `seed`."""
+    rng = random.Random(seed)
+    result = []
+    for page_no in range(1, pages + 1):
+        words = [rng.choice(VOCABULARY) for _ in range(words_per_page)]
+        body = [
+            " ".join(words[i:i + WORDS_PER_LINE]).capitalize() + "."
+            for i in range(0, len(words), WORDS_PER_LINE)
+        ]
+        lines = [f"Relatorio sintetico {seed}"] + body + [f"Pagina {page_no} de {pages}"]
+        result.append("\n".join(lines))
+    return result
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(pages: List[str]) -> bytes:
+    """PDF mínimo válido com uma página por texto de `pages`."""
+    objects = []
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append("<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, text in enumerate(pages):
+        shown = " ".join(f"({_escape(line)}) '" for line in text.split("\n"))
+        stream = f"BT /F1 {FONT_SIZE} Tf 40 800 Td {LEADING} TL {shown} ET"
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return bytes(out)
+
+
+def synthetic_pdf(pages: int, words_per_page: int, seed: int = 0) -> bytes:
+    return build_pdf(synthetic_pages(pages, words_per_page, seed))
+
+
+def write_synthetic_pdf(path, pages: int, words_per_page: int, seed: int = 0) -> Path:
+    path = Path(path)
+    path.write_bytes(synthetic_pdf(pages, words_per_page, seed))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--words-per-page", type=int, default=300, help="densidade de texto")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    path = write_synthetic_pdf(args.path, args.pages, args.words_per_page, args.seed)
+    print(f"{path} ({path.stat().st_size} bytes, {args.pages} páginas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# As settings e os diretórios de storage são resolvidos na importação de
+# `app`: os testes rodam num diretório temporário, com SQLite e chaves falsas
+WORKDIR = tempfile.mkdtemp(prefix="tests-")
+os.chdir(WORKDIR)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/tests.sqlite"
+os.environ.setdefault("SECRET_KEY", "tests-secret-key-tests-secret-key-tests")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("GEMINI_API_KEY", "tests")
+
+
+@pytest.fixture
+def db():
+    """Sessão síncrona num banco recriado a cada teste."""
+    from app.core.database import Base, SessionLocal, engine
+    from app.models import models  # noqa: F401 (registra os modelos)
+
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def make_file(db):
+    """Cria um usuário (se preciso) e um arquivo dele; retorna o File."""
+    from app.models.models import File, User
+
+    def make(user_id: int = 1, name: str = "doc.pdf"):
+        if db.get(User, user_id) is None:
+            db.add(User(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com"))
+        file_rec = File(user_id=user_id, file_name=name, file_path=name, file_size=0)
+        db.add(file_rec)
+        db.commit()
+        return file_rec
+
+    return make
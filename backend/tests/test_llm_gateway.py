@@ -0,0 +1,293 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import llm_gateway as gateway_module
+from app.services.llm_errors import LLMOverloaded
+from app.services.llm_gateway import CircuitBreaker, LLMGateway
+
+
+def make_gateway(max_active=1, per_user=1, queue_size=10, queue_timeout=5.0) -> LLMGateway:
+    return LLMGateway(max_active, per_user, queue_size, queue_timeout)
+
+
+def assert_idle(gateway: LLMGateway):
+    """Nenhuma vaga presa e nenhuma espera esquecida na fila."""
+    assert gateway._active_total == 0
+    assert not gateway._active
+    assert gateway._queued == 0
+    assert not gateway._waiting
+
+
+async def settle():
+    # deixa as tarefas criadas chegarem ao ponto de espera
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+# --- admissão ---------------------------------------------------------
+
+
+def test_dispatch_round_robin_between_users():
+    gateway = make_gateway(max_active=1, per_user=1)
+    order = []
+
+    async def operation(user_id, name, release=None):
+        async with gateway.admit(user_id):
+            order.append(name)
+            if release is not None:
+                await release.wait()
+
+    async def scenario():
+        release = asyncio.Event()
+        holder = asyncio.create_task(operation(1, "h", release))
+        await settle()
+        # usuário 1 enfileira dois pedidos antes dos usuários 2 e 3
+        tasks = []
+        for user_id, name in ((1, "a1"), (1, "a2"), (2, "b1"), (3, "c1")):
+            tasks.append(asyncio.create_task(operation(user_id, name)))
+            await settle()
+        assert gateway._queued == 4
+
+        release.set()
+        await asyncio.gather(holder, *tasks)
+
+    asyncio.run(scenario())
+    # o segundo pedido do usuário 1 vai para o fim do rodízio
+    assert order == ["h", "a1", "b1", "c1", "a2"]
+    assert_idle(gateway)
+
+
+def test_queue_timeout_rejects_with_retry_after():
+    gateway = make_gateway(queue_timeout=0.05)
+
+    async def scenario():
+        await gateway._acquire(1, bounded=True)
+        with pytest.raises(LLMOverloaded) as raised:
+            await gateway._acquire(2, bounded=True)
+        assert raised.value.status_code == 429
+        assert raised.value.retry_after >= 1
+        # a espera vencida saiu da fila
+        assert gateway._queued == 0 and not gateway._waiting
+        gateway._release(1, 0.0)
+
+    asyncio.run(scenario())
+    assert_idle(gateway)
+
+
+def test_grant_arriving_with_queue_timeout_is_kept(monkeypatch):
+    gateway = make_gateway()
+    real_wait_for = asyncio.wait_for
+
+    async def late_grant_wait_for(awaitable, timeout):
+        # a vaga é entregue no mesmo instante em que o prazo vence
+        awaitable.cancel()
+        gateway._release(1, 0.0)
+        raise asyncio.TimeoutError
+
+    async def scenario():
+        await gateway._acquire(1, bounded=True)
+        monkeypatch.setattr(gateway_module.asyncio, "wait_for", late_grant_wait_for)
+        try:
+            await gateway._acquire(2, bounded=True)
+        finally:
+            monkeypatch.setattr(gateway_module.asyncio, "wait_for", real_wait_for)
+        # a operação ficou com a vaga em vez de receber 429
+        assert gateway._active == {2: 1}
+        gateway._release(2, 0.0)
+
+    asyncio.run(scenario())
+    assert_idle(gateway)
+
+
+def test_queue_full_rejects_immediately():
+    gateway = make_gateway(queue_size=0)
+
+    async def scenario():
+        await gateway._acquire(1, bounded=True)
+        with pytest.raises(LLMOverloaded):
+            await gateway._acquire(2, bounded=True)
+        with pytest.raises(LLMOverloaded):
+            gateway.check_capacity(2)
+        assert gateway.stats["rejected"] == 2
+        gateway._release(1, 0.0)
+
+    asyncio.run(scenario())
+    assert_idle(gateway)
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    gateway = make_gateway()
+
+    async def scenario():
+        await gateway._acquire(1, bounded=True)
+        waiter = asyncio.create_task(gateway._acquire(2, bounded=True))
+        await settle()
+        assert gateway._queued == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert gateway._queued == 0 and not gateway._waiting
+
+        gateway._release(1, 0.0)
+
+    asyncio.run(scenario())
+    assert_idle(gateway)
+
+
+def test_cancellation_with_grant_returns_the_slot():
+    gateway = make_gateway()
+    entered = []
+
+    async def operation():
+        async with gateway.admit(2):
+            entered.append(True)
+
+    async def scenario():
+        await gateway._acquire(1, bounded=True)
+        waiter = asyncio.create_task(operation())
+        await settle()
+
+        # a vaga chega e, antes de a tarefa rodar, ela é cancelada
+        gateway._release(1, 0.0)
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            assert not entered
+
+        # com ou sem entrada, a vaga voltou: outra operação é admitida na hora
+        await asyncio.wait_for(gateway._acquire(3, bounded=True), timeout=1)
+        gateway._release(3, 0.0)
+
+    asyncio.run(scenario())
+    assert_idle(gateway)
+
+
+def test_retry_after_follows_queue_and_average_duration():
+    gateway = make_gateway(max_active=2, queue_timeout=30)
+    # sem medições: duração inicial de 10s, duas vagas
+    assert gateway._retry_after() == 5
+
+    gateway._queued = 3
+    assert gateway._retry_after() == 20
+
+    # limitado pelo tempo máximo de espera na fila
+    gateway._queued = 100
+    assert gateway._retry_after() == 30
+
+    # e nunca menos de 1s
+    gateway._queued = 0
+    gateway._avg_duration = 0.01
+    assert gateway._retry_after() == 1
+
+
+def test_release_updates_average_duration():
+    gateway = make_gateway()
+
+    async def scenario():
+        await gateway._acquire(1, bounded=True)
+        gateway._release(1, 0.0)
+
+    asyncio.run(scenario())
+    assert gateway._avg_duration == pytest.approx(0.8 * gateway_module.INITIAL_DURATION_SECONDS)
+
+
+# --- chamadas ao provedor e circuit breaker -------------------------------
+
+
+def test_breaker_opens_and_allows_single_half_open_probe():
+    breaker = CircuitBreaker(threshold=2, cooldown=10)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    with pytest.raises(LLMOverloaded) as raised:
+        breaker.before_call()
+    assert raised.value.status_code == 503
+    assert 1 <= raised.value.retry_after <= 10
+
+    # passado o intervalo, só uma chamada de teste passa
+    breaker.opened_at -= 11
+    assert breaker.state == "half_open"
+    assert breaker.before_call() is True
+    with pytest.raises(LLMOverloaded):
+        breaker.before_call()
+
+    # falha no teste reabre o circuito por mais um intervalo
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    breaker.opened_at -= 11
+    assert breaker.before_call() is True
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
+
+
+def test_cancelled_probe_lets_the_next_call_probe():
+    breaker = CircuitBreaker(threshold=1, cooldown=10)
+    breaker.record_failure()
+    breaker.opened_at -= 11
+
+    assert breaker.before_call() is True
+    breaker.release(probe=True)
+    assert breaker.before_call() is True
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_SECONDS", 0.0)
+
+
+def test_call_retries_transient_errors(fast_retries):
+    gateway = make_gateway()
+    calls = []
+
+    async def invoke():
+        calls.append(True)
+        if len(calls) < 3:
+            raise ConnectionError("queda de conexão")
+        return "ok"
+
+    assert asyncio.run(gateway.call(invoke)) == "ok"
+    assert len(calls) == 3
+    assert gateway.stats["retries"] == 2
+    assert gateway.breaker.state == "closed"
+
+
+def test_call_does_not_retry_permanent_errors(fast_retries):
+    gateway = make_gateway()
+    calls = []
+
+    async def invoke():
+        calls.append(True)
+        raise ValueError("prompt inválido")
+
+    with pytest.raises(ValueError):
+        asyncio.run(gateway.call(invoke))
+    assert len(calls) == 1
+    assert gateway.breaker.failures == 0
+
+
+def test_open_breaker_fails_fast_without_calling_provider(fast_retries):
+    gateway = make_gateway()
+    gateway.breaker = CircuitBreaker(threshold=3, cooldown=10)
+    calls = []
+
+    async def invoke():
+        calls.append(True)
+        raise ConnectionError("provedor fora do ar")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(gateway.call(invoke))
+    assert len(calls) == 3
+    assert gateway.breaker.state == "open"
+
+    with pytest.raises(LLMOverloaded):
+        asyncio.run(gateway.call(invoke))
+    assert len(calls) == 3
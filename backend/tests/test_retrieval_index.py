@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+
+from app.models.models import DocumentChunk
+from app.services import retrieval
+from app.services.embeddings import HashingEmbedder
+from app.services.retrieval import VectorIndexCache, record_dtype, vector_path
+
+TEXTS = [
+    "contrato de locação do imóvel residencial",
+    "multa por atraso no pagamento do aluguel",
+    "garagem coberta para dois carros",
+    "vistoria de entrada e saída do imóvel",
+]
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self, dim: int = 64):
+        super().__init__(dim)
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+
+def query_vector(text: str) -> np.ndarray:
+    # embedder à parte, para não contar as consultas como vetores gerados
+    return HashingEmbedder(64).embed([text])[0]
+
+
+@pytest.fixture(autouse=True)
+def vectors_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(retrieval, "VECTORS_ROOT", tmp_path / "vectors")
+
+
+@pytest.fixture
+def embedder():
+    return CountingEmbedder()
+
+
+def add_chunks(db, file_rec, texts):
+    chunks = [
+        DocumentChunk(file_id=file_rec.id, user_id=file_rec.user_id, page_no=1, text=text)
+        for text in texts
+    ]
+    db.add_all(chunks)
+    db.commit()
+    return chunks
+
+
+def stored_ids(user_id, embedder):
+    return list(retrieval._open_records(vector_path(user_id, embedder), record_dtype(embedder.dim))["chunk_id"])
+
+
+def test_missing_vectors_are_embedded_on_first_query(db, make_file, embedder):
+    chunks = add_chunks(db, make_file(), TEXTS)
+    cache = VectorIndexCache(max_users=4)
+
+    index = cache.get(db, 1, embedder)
+    assert len(index) == len(TEXTS)
+    assert embedder.embedded == TEXTS
+    assert stored_ids(1, embedder) == [c.id for c in chunks]
+
+    query = query_vector("multa por atraso no aluguel")
+    assert index.search(query, 1)[0][0] == chunks[1].id
+
+    # sem mudanças: o índice em cache é reaproveitado, sem gerar vetores
+    embedder.embedded.clear()
+    assert cache.get(db, 1, embedder) is index
+    assert embedder.embedded == []
+
+
+def test_only_chunks_without_vectors_are_embedded(db, make_file, embedder):
+    file_rec = make_file()
+    add_chunks(db, file_rec, TEXTS[:2])
+    cache = VectorIndexCache(max_users=4)
+    cache.get(db, 1, embedder)
+
+    embedder.embedded.clear()
+    add_chunks(db, file_rec, TEXTS[2:])
+    index = cache.get(db, 1, embedder)
+    assert embedder.embedded == TEXTS[2:]
+    assert len(index) == len(TEXTS)
+
+
+def test_deleted_chunks_are_masked_then_compacted(db, make_file, embedder, monkeypatch):
+    monkeypatch.setattr(retrieval, "COMPACT_MIN_DEAD_RECORDS", 2)
+    chunks = add_chunks(db, make_file(), TEXTS)
+    cache = VectorIndexCache(max_users=4)
+    cache.get(db, 1, embedder)
+    embedder.embedded.clear()
+
+    # um registro morto: fora dos resultados, mas ainda no arquivo
+    db.delete(chunks[0])
+    db.commit()
+    index = cache.get(db, 1, embedder)
+    assert len(index) == 3
+    assert len(stored_ids(1, embedder)) == 4
+    query = query_vector(TEXTS[0])
+    assert chunks[0].id not in [chunk_id for chunk_id, _ in index.search(query, 10)]
+
+    # mortos viram maioria: o arquivo é reescrito só com os vivos
+    db.delete(chunks[1])
+    db.delete(chunks[2])
+    db.commit()
+    index = cache.get(db, 1, embedder)
+    assert len(index) == 1
+    assert stored_ids(1, embedder) == [chunks[3].id]
+    # apagar trechos não gera vetores
+    assert embedder.embedded == []
+
+
+def test_vector_written_twice_counts_once(db, make_file, embedder):
+    chunks = add_chunks(db, make_file(), TEXTS[:2])
+    cache = VectorIndexCache(max_users=4)
+    cache.get(db, 1, embedder)
+
+    # escrita repetida (ex.: reindexação interrompida)
+    retrieval._append_records(
+        vector_path(1, embedder), record_dtype(embedder.dim),
+        [chunks[0].id], chunks[0].file_id, query_vector(TEXTS[0])[None, :],
+    )
+    index = cache.get(db, 1, embedder)
+    assert len(index) == 2
+    query = query_vector(TEXTS[0])
+    ranked = [chunk_id for chunk_id, _ in index.search(query, 10)]
+    assert ranked.count(chunks[0].id) == 1
+
+
+def test_truncated_record_is_discarded_on_append(db, make_file, embedder):
+    chunks = add_chunks(db, make_file(), TEXTS[:1])
+    cache = VectorIndexCache(max_users=4)
+    cache.get(db, 1, embedder)
+
+    path = vector_path(1, embedder)
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 10)
+
+    retrieval._append_records(
+        path, record_dtype(embedder.dim), [999], chunks[0].file_id, np.zeros((1, embedder.dim), np.float32)
+    )
+    assert path.stat().st_size == 2 * record_dtype(embedder.dim).itemsize
+    assert stored_ids(1, embedder) == [chunks[0].id, 999]
@@ -0,0 +1,118 @@
+from app.models.models import DocumentPage
+from app.services import search
+from app.services.search import BM25Index, BM25IndexCache, tokenize
+
+DOCS = {
+    1: "contrato de locação do imóvel",
+    2: "o imóvel tem dois quartos e garagem",
+    3: "multa por atraso no pagamento do aluguel",
+    4: "garagem coberta para dois carros",
+}
+
+
+def build(docs) -> BM25Index:
+    index = BM25Index()
+    for doc_id, text in docs.items():
+        index.add(doc_id, tokenize(text))
+    return index
+
+
+def assert_same_index(index: BM25Index, expected: BM25Index):
+    assert index.doc_lengths == expected.doc_lengths
+    assert index.total_length == expected.total_length
+    assert dict(index.postings) == dict(expected.postings)
+
+
+def test_add_and_remove_match_a_full_rebuild():
+    index = build(DOCS)
+    index.remove(2)
+    index.add(5, tokenize("aluguel com garagem"))
+
+    expected = build({1: DOCS[1], 3: DOCS[3], 4: DOCS[4], 5: "aluguel com garagem"})
+    assert_same_index(index, expected)
+    assert index.search(["garagem"], 10) == expected.search(["garagem"], 10)
+
+
+def test_remove_drops_empty_postings():
+    index = build({1: "quartos", 2: "garagem quartos"})
+    index.remove(2)
+    assert "garagem" not in index.postings
+    assert index.postings["quartos"] == {1: 1}
+
+
+def test_add_replaces_an_existing_page():
+    index = build(DOCS)
+    index.add(1, tokenize("garagem"))
+    assert_same_index(index, build({**DOCS, 1: "garagem"}))
+
+
+def test_remove_unknown_page_is_a_noop():
+    index = build(DOCS)
+    index.remove(99)
+    assert_same_index(index, build(DOCS))
+
+
+def test_search_ranks_by_bm25():
+    index = build(DOCS)
+    ranked = index.search(tokenize("garagem coberta"), 10)
+    assert [doc_id for doc_id, _ in ranked] == [4, 2]
+    assert index.search(tokenize("inexistente"), 10) == []
+    assert len(index.search(tokenize("garagem imóvel"), 1)) == 1
+
+
+def add_pages(db, file_rec, texts):
+    pages = [
+        DocumentPage(file_id=file_rec.id, user_id=file_rec.user_id, page_no=i, text=text)
+        for i, text in enumerate(texts, start=1)
+    ]
+    db.add_all(pages)
+    db.commit()
+    return pages
+
+
+def test_cache_sync_tokenizes_only_new_pages(db, make_file, monkeypatch):
+    tokenized = []
+
+    def counting_tokenize(text):
+        tokenized.append(text)
+        return tokenize(text)
+
+    monkeypatch.setattr(search, "tokenize", counting_tokenize)
+    cache = BM25IndexCache(max_users=4)
+    cache.SYNC_BATCH_SIZE = 2
+
+    file_rec = make_file(user_id=1)
+    first = add_pages(db, file_rec, [DOCS[1], DOCS[2], DOCS[3]])
+    # páginas de outro usuário não entram no índice
+    add_pages(db, make_file(user_id=2), [DOCS[4]])
+
+    ranked = cache.search(db, 1, ["garagem"], 10)
+    assert [page_id for page_id, _ in ranked] == [first[1].id]
+    assert len(tokenized) == 3
+
+    # sem mudanças: nada é relido
+    tokenized.clear()
+    cache.search(db, 1, ["garagem"], 10)
+    assert tokenized == []
+
+    # uma página apagada e uma nova: só a nova é tokenizada
+    db.delete(first[1])
+    db.commit()
+    added = add_pages(db, file_rec, [DOCS[4]])
+    ranked = cache.search(db, 1, ["garagem"], 10)
+    assert tokenized == [DOCS[4]]
+    assert [page_id for page_id, _ in ranked] == [added[0].id]
+
+    # o índice sincronizado é igual ao montado do zero
+    index = cache._get_index(1)
+    expected = build({first[0].id: DOCS[1], first[2].id: DOCS[3], added[0].id: DOCS[4]})
+    assert_same_index(index, expected)
+
+
+def test_cache_evicts_least_recently_used_user(db):
+    cache = BM25IndexCache(max_users=2)
+    first = cache._get_index(1)
+    cache._get_index(2)
+    assert cache._get_index(1) is first
+    cache._get_index(3)
+    assert set(cache._indexes) == {1, 3}
@@ -18,10 +18,12 @@ export type { Token } from './models/Token';
 export type { UserCreate } from './models/UserCreate';
 export type { UserOut } from './models/UserOut';
 export type { UserProfileOut } from './models/UserProfileOut';
+export type { UserStatsOut } from './models/UserStatsOut';
 export type { ValidationError } from './models/ValidationError';
 
 export { AuthService } from './services/AuthService';
 export { DefaultService } from './services/DefaultService';
 export { FilesService } from './services/FilesService';
+export { StatsService } from './services/StatsService';
 export { SummaryService } from './services/SummaryService';
 export { UserService } from './services/UserService';
@@ -8,5 +8,8 @@ export type FileOut = {
     file_path: string;
     file_size: number;
     upload_date: string;
+    extraction_status?: (string | null);
+    page_count?: (number | null);
+    extracted_at?: (string | null);
 };
 
@@ -0,0 +1,13 @@
+/* generated using openapi-typescript-codegen -- do not edit */
+/* istanbul ignore file */
+/* tslint:disable */
+/* eslint-disable */
+export type UserStatsOut = {
+    file_count: number;
+    total_bytes: number;
+    single_summary_count: number;
+    consolidated_summary_count: number;
+    last_upload_at?: (string | null);
+    last_summary_at?: (string | null);
+};
+
@@ -10,14 +10,28 @@ import { request as __request } from '../core/request';
 export class FilesService {
     /**
      * List Files
-     * Lista todos os arquivos pertencentes ao usuário logado.
+     * Lista os arquivos do usuário logado, mais recentes primeiro. Com `limit`,
+     * em páginas de até `limit` itens: se houver mais, o header `X-Next-Cursor`
+     * traz o `cursor` da próxima página. Sem `limit`, a lista inteira.
+     * @param limit
+     * @param cursor
      * @returns FileOut Successful Response
      * @throws ApiError
      */
-    public static listFilesFilesGet(): CancelablePromise<Array<FileOut>> {
+    public static listFilesFilesGet(
+        limit?: (number | null),
+        cursor?: (string | null),
+    ): CancelablePromise<Array<FileOut>> {
         return __request(OpenAPI, {
             method: 'GET',
             url: '/files',
+            query: {
+                'limit': limit,
+                'cursor': cursor,
+            },
+            errors: {
+                422: `Validation Error`,
+            },
         });
     }
     /**
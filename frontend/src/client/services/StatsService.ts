@@ -0,0 +1,23 @@
+/* generated using openapi-typescript-codegen -- do not edit */
+/* istanbul ignore file */
+/* tslint:disable */
+/* eslint-disable */
+import type { UserStatsOut } from '../models/UserStatsOut';
+import type { CancelablePromise } from '../core/CancelablePromise';
+import { OpenAPI } from '../core/OpenAPI';
+import { request as __request } from '../core/request';
+export class StatsService {
+    /**
+     * Read Stats
+     * Números do painel (arquivos, bytes, resumos e última atividade), lidos
+     * de contadores mantidos a cada operação em vez de contar as listas.
+     * @returns UserStatsOut Successful Response
+     * @throws ApiError
+     */
+    public static readStatsStatsGet(): CancelablePromise<UserStatsOut> {
+        return __request(OpenAPI, {
+            method: 'GET',
+            url: '/stats',
+        });
+    }
+}
@@ -49,13 +49,31 @@ export class SummaryService {
     }
     /**
      * List Summaries
+     * Resumos do usuário, mais recentes primeiro (opcionalmente só os que
+     * incluem `file_id`). Com `limit` a lista é paginada e o header
+     * `X-Next-Cursor` traz o `cursor` da próxima página; sem ele, vem inteira.
+     * @param limit
+     * @param cursor
+     * @param fileId
      * @returns SummaryOut Successful Response
      * @throws ApiError
      */
-    public static listSummariesSummaryGet(): CancelablePromise<Array<SummaryOut>> {
+    public static listSummariesSummaryGet(
+        limit?: (number | null),
+        cursor?: (string | null),
+        fileId?: (number | null),
+    ): CancelablePromise<Array<SummaryOut>> {
         return __request(OpenAPI, {
             method: 'GET',
             url: '/summary/',
+            query: {
+                'limit': limit,
+                'cursor': cursor,
+                'file_id': fileId,
+            },
+            errors: {
+                422: `Validation Error`,
+            },
         });
     }
     /**
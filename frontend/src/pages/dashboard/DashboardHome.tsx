@@ -1,6 +1,6 @@
 import { useState, useEffect } from "react"
 import { useNavigate } from "react-router-dom"
-import { FilesService, SummaryService, UserService, type FileOut, type SummaryOut, type UserProfileOut } from "../../client"
+import { FilesService, StatsService, SummaryService, UserService, type FileOut, type SummaryOut, type UserProfileOut } from "../../client"
 
 // Componentes UI
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from "@/components/ui/card"
@@ -32,25 +32,22 @@ export default function DashboardHome() {
             if (res.ok) userData = await res.json()
         } catch (e) { console.error("Erro user", e) }
         
-        // 2. Arquivos e Resumos
-        const [files, summaries] = await Promise.all([
-          FilesService.listFilesFilesGet(),
-          SummaryService.listSummariesSummaryGet()
+        // 2. Totais (contadores do servidor) e só os itens recentes
+        const [userStats, files, summaries] = await Promise.all([
+          StatsService.readStatsStatsGet(),
+          FilesService.listFilesFilesGet(4),
+          SummaryService.listSummariesSummaryGet(3)
         ])
 
         if (userData) setUser(userData)
         
-        // Processar Arquivos Recentes (Últimos 4)
-        const sortedFiles = [...files].sort((a, b) => new Date(b.upload_date).getTime() - new Date(a.upload_date).getTime())
-        setRecentFiles(sortedFiles.slice(0, 4))
-
-        // Processar Resumos Recentes (Últimos 3)
-        const sortedSummaries = [...summaries].sort((a, b) => new Date(b.created_at || "").getTime() - new Date(a.created_at || "").getTime())
-        setRecentSummaries(sortedSummaries.slice(0, 3))
+        // Já vêm do mais recente para o mais antigo
+        setRecentFiles(files)
+        setRecentSummaries(summaries)
 
         setStats({
-          totalFiles: files.length,
-          totalSummaries: summaries.length
+          totalFiles: userStats.file_count,
+          totalSummaries: userStats.single_summary_count + userStats.consolidated_summary_count
         })
 
       } catch (error) {
@@ -69,8 +69,8 @@ export default function FileDetails() {
     if (!fileId) return
     setIsLoadingSummary(true)
     try {
-      const allSummaries = await SummaryService.listSummariesSummaryGet()
-      const existing = allSummaries.find(s => s.file_ids === String(fileId))
+      const fileSummaries = await SummaryService.listSummariesSummaryGet(undefined, undefined, fileId)
+      const existing = fileSummaries.find(s => s.file_ids === String(fileId))
       
       if (existing) {
         setSummary(existing)
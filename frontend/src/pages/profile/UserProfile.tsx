@@ -1,6 +1,6 @@
 import { useState, useEffect, useCallback } from "react"
 import { useNavigate } from "react-router-dom"
-import { FilesService, SummaryService, type UserProfileOut } from "../../client"
+import { StatsService, type UserProfileOut } from "../../client"
 import { EditProfileDialog } from "./EditProfileDialog"
 
 // Componentes UI
@@ -41,15 +41,12 @@ export default function UserProfile() {
       const userData = await userResponse.json()
       setUser(userData)
 
-      // 2. Arquivos e resumos para as estatísticas
-      const [filesData, summariesData] = await Promise.all([
-        FilesService.listFilesFilesGet(),
-        SummaryService.listSummariesSummaryGet()
-      ])
+      // 2. Estatísticas (contadores do servidor)
+      const userStats = await StatsService.readStatsStatsGet()
 
       setStats({
-        files: filesData.length,
-        summaries: summariesData.length
+        files: userStats.file_count,
+        summaries: userStats.single_summary_count + userStats.consolidated_summary_count
       })
 
     } catch (error) {